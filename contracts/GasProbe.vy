@@ -0,0 +1,20 @@
+# Gas probe for the benchmark sweeps (tests/gas_bench.py).
+# Calls `target` once per calldata blob inside a single eth_call and returns the
+# gas each call consumed: the callee's execution plus a constant CALL overhead.
+
+MAX_CALLS: constant(uint256) = 128
+MAX_CALLDATA: constant(uint256) = 324  # selector + head + length word + 256 bytes
+
+@external
+@view
+def measure(target: address, calls: DynArray[Bytes[MAX_CALLDATA], MAX_CALLS]) -> DynArray[uint256, MAX_CALLS]:
+    used: DynArray[uint256, MAX_CALLS] = []
+    # touch `start`'s memory and warm the target account before the first sample,
+    # so no sample pays memory expansion or the cold-access surcharge
+    start: uint256 = msg.gas
+    raw_call(target, calls[0], is_static_call=True)
+    for data: Bytes[MAX_CALLDATA] in calls:
+        start = msg.gas
+        raw_call(target, data, is_static_call=True)
+        used.append(start - msg.gas)
+    return used
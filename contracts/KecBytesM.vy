@@ -8,4 +8,9 @@ def h31(x: Bytes[31]) -> bytes32:
 
 @external
 def h33(x: Bytes[33]) -> bytes32:
-    return keccak256(x)
\ No newline at end of file
+    return keccak256(x)
+
+@external
+def h256(x: Bytes[256]) -> bytes32:
+    # wide variant for the length sweep (tests/gas_bench.py)
+    return keccak256(x)
@@ -0,0 +1,30 @@
+# Storage-layout strategy: both keys bounded to 128 bits and packed into one uint256 key.
+MAX_BATCH: constant(uint256) = 64
+
+s: HashMap[uint256, uint256]
+
+@internal
+@pure
+def pack(a: uint256, b: uint256) -> uint256:
+    assert a < 2**128 and b < 2**128, "key out of range"
+    return (a << 128) | b
+
+@external
+def put(a: uint256, b: uint256, v: uint256):
+    self.s[self.pack(a, b)] = v
+
+@external
+def get(a: uint256, b: uint256) -> uint256:
+    return self.s[self.pack(a, b)]
+
+@external
+def put_many(a: DynArray[uint256, MAX_BATCH], b: DynArray[uint256, MAX_BATCH], v: DynArray[uint256, MAX_BATCH]):
+    for i: uint256 in range(len(a), bound=MAX_BATCH):
+        self.s[self.pack(a[i], b[i])] = v[i]
+
+@external
+def get_many(a: DynArray[uint256, MAX_BATCH], b: DynArray[uint256, MAX_BATCH]) -> uint256:
+    acc: uint256 = 0
+    for i: uint256 in range(len(a), bound=MAX_BATCH):
+        acc = unsafe_add(acc, self.s[self.pack(a[i], b[i])])
+    return acc
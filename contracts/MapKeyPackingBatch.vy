@@ -0,0 +1,19 @@
+# MapKeyPacking with batch entry points for tests/storage_bench.py; same storage, same key.
+from . import MapKeyPacking
+
+MAX_BATCH: constant(uint256) = 64
+
+initializes: MapKeyPacking
+exports: (MapKeyPacking.put, MapKeyPacking.get)
+
+@external
+def put_many(a: DynArray[uint256, MAX_BATCH], b: DynArray[uint256, MAX_BATCH], v: DynArray[uint256, MAX_BATCH]):
+    for i: uint256 in range(len(a), bound=MAX_BATCH):
+        MapKeyPacking.s[MapKeyPacking.pack(a[i], b[i])] = v[i]
+
+@external
+def get_many(a: DynArray[uint256, MAX_BATCH], b: DynArray[uint256, MAX_BATCH]) -> uint256:
+    acc: uint256 = 0
+    for i: uint256 in range(len(a), bound=MAX_BATCH):
+        acc = unsafe_add(acc, MapKeyPacking.s[MapKeyPacking.pack(a[i], b[i])])
+    return acc
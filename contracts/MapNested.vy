@@ -0,0 +1,24 @@
+# Storage-layout strategy: nested HashMap, one keccak per level (tests/storage_bench.py).
+MAX_BATCH: constant(uint256) = 64
+
+s: HashMap[uint256, HashMap[uint256, uint256]]
+
+@external
+def put(a: uint256, b: uint256, v: uint256):
+    self.s[a][b] = v
+
+@external
+def get(a: uint256, b: uint256) -> uint256:
+    return self.s[a][b]
+
+@external
+def put_many(a: DynArray[uint256, MAX_BATCH], b: DynArray[uint256, MAX_BATCH], v: DynArray[uint256, MAX_BATCH]):
+    for i: uint256 in range(len(a), bound=MAX_BATCH):
+        self.s[a[i]][b[i]] = v[i]
+
+@external
+def get_many(a: DynArray[uint256, MAX_BATCH], b: DynArray[uint256, MAX_BATCH]) -> uint256:
+    acc: uint256 = 0
+    for i: uint256 in range(len(a), bound=MAX_BATCH):
+        acc = unsafe_add(acc, self.s[a[i]][b[i]])
+    return acc
@@ -0,0 +1,37 @@
+# Storage-layout strategy: values bounded to 128 bits, two neighbouring b keys per slot.
+MAX_BATCH: constant(uint256) = 64
+MASK: constant(uint256) = 2**128 - 1
+
+s: HashMap[uint256, HashMap[uint256, uint256]]
+
+@internal
+def _put(a: uint256, b: uint256, v: uint256):
+    assert v <= MASK, "value out of range"
+    offset: uint256 = (b & 1) * 128
+    word: uint256 = self.s[a][b >> 1]
+    self.s[a][b >> 1] = (word & ~(MASK << offset)) | (v << offset)
+
+@internal
+@view
+def _get(a: uint256, b: uint256) -> uint256:
+    return (self.s[a][b >> 1] >> ((b & 1) * 128)) & MASK
+
+@external
+def put(a: uint256, b: uint256, v: uint256):
+    self._put(a, b, v)
+
+@external
+def get(a: uint256, b: uint256) -> uint256:
+    return self._get(a, b)
+
+@external
+def put_many(a: DynArray[uint256, MAX_BATCH], b: DynArray[uint256, MAX_BATCH], v: DynArray[uint256, MAX_BATCH]):
+    for i: uint256 in range(len(a), bound=MAX_BATCH):
+        self._put(a[i], b[i], v[i])
+
+@external
+def get_many(a: DynArray[uint256, MAX_BATCH], b: DynArray[uint256, MAX_BATCH]) -> uint256:
+    acc: uint256 = 0
+    for i: uint256 in range(len(a), bound=MAX_BATCH):
+        acc = unsafe_add(acc, self._get(a[i], b[i]))
+    return acc
@@ -6,4 +6,15 @@ def s33(x: Bytes[65]) -> bytes32:
 @external
 def s31(x: Bytes[65]) -> bytes32:
     y: Bytes[31] = slice(x, 1, 31)
-    return keccak256(y)
\ No newline at end of file
+    return keccak256(y)
+
+# runtime start offset, for the offset sweep (tests/gas_bench.py)
+@external
+def s33_at(x: Bytes[65], start: uint256) -> bytes32:
+    y: Bytes[33] = slice(x, start, 33)
+    return keccak256(y)
+
+@external
+def s31_at(x: Bytes[65], start: uint256) -> bytes32:
+    y: Bytes[31] = slice(x, start, 31)
+    return keccak256(y)
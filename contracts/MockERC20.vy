@@ -0,0 +1,38 @@
+# Minimal ERC20 with an open mint, used as pool coins by the in-process fuzz backend.
+name: public(String[32])
+symbol: public(String[32])
+decimals: public(uint8)
+totalSupply: public(uint256)
+balanceOf: public(HashMap[address, uint256])
+allowance: public(HashMap[address, HashMap[address, uint256]])
+
+@deploy
+def __init__(_name: String[32], _symbol: String[32], _decimals: uint8):
+    self.name = _name
+    self.symbol = _symbol
+    self.decimals = _decimals
+
+@external
+def transfer(_to: address, _value: uint256) -> bool:
+    self.balanceOf[msg.sender] -= _value
+    self.balanceOf[_to] += _value
+    return True
+
+@external
+def transferFrom(_from: address, _to: address, _value: uint256) -> bool:
+    allowed: uint256 = self.allowance[_from][msg.sender]
+    if allowed != max_value(uint256):
+        self.allowance[_from][msg.sender] = allowed - _value
+    self.balanceOf[_from] -= _value
+    self.balanceOf[_to] += _value
+    return True
+
+@external
+def approve(_spender: address, _value: uint256) -> bool:
+    self.allowance[msg.sender][_spender] = _value
+    return True
+
+@external
+def mint(_to: address, _value: uint256):
+    self.totalSupply += _value
+    self.balanceOf[_to] += _value
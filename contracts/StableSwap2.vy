@@ -0,0 +1,300 @@
+# Reference 2-coin StableSwap (Curve v1 math, fixed A, ERC20 coins only).
+# Stand-in for the forked mainnet pool: same entry points as fuzz/abi.json,
+# plus a D() getter and an internal LP ledger (totalSupply / balanceOf).
+
+interface ERC20:
+    def transfer(_to: address, _value: uint256) -> bool: nonpayable
+    def transferFrom(_from: address, _to: address, _value: uint256) -> bool: nonpayable
+    def decimals() -> uint8: view
+
+N_COINS: constant(uint256) = 2
+FEE_DENOMINATOR: constant(uint256) = 10 ** 10
+PRECISION: constant(uint256) = 10 ** 18
+A_PRECISION: constant(uint256) = 100
+MAX_ITER: constant(uint256) = 255
+
+coins: public(address[N_COINS])
+balances: public(uint256[N_COINS])
+fee: public(uint256)
+admin_fee: public(uint256)
+owner: public(address)
+A_precise: public(uint256)
+
+totalSupply: public(uint256)
+balanceOf: public(HashMap[address, uint256])
+
+PRECISION_MUL: immutable(uint256[N_COINS])
+
+@deploy
+def __init__(_coins: address[N_COINS], _A: uint256, _fee: uint256, _admin_fee: uint256):
+    mul: uint256[N_COINS] = empty(uint256[N_COINS])
+    for i: uint256 in range(N_COINS):
+        mul[i] = 10 ** (18 - convert(staticcall ERC20(_coins[i]).decimals(), uint256))
+    PRECISION_MUL = mul
+    self.coins = _coins
+    self.A_precise = _A * A_PRECISION
+    self.fee = _fee
+    self.admin_fee = _admin_fee
+    self.owner = msg.sender
+
+# ----- math -----
+
+@internal
+@view
+def _xp(_balances: uint256[N_COINS]) -> uint256[N_COINS]:
+    xp: uint256[N_COINS] = _balances
+    for i: uint256 in range(N_COINS):
+        xp[i] *= PRECISION_MUL[i]
+    return xp
+
+@internal
+@pure
+def _get_D(_xp: uint256[N_COINS], _amp: uint256) -> uint256:
+    S: uint256 = 0
+    for x: uint256 in _xp:
+        S += x
+    if S == 0:
+        return 0
+
+    D: uint256 = S
+    Ann: uint256 = _amp * N_COINS
+    for _: uint256 in range(MAX_ITER):
+        D_P: uint256 = D
+        for x: uint256 in _xp:
+            D_P = D_P * D // (x * N_COINS)
+        Dprev: uint256 = D
+        D = (Ann * S // A_PRECISION + D_P * N_COINS) * D // ((Ann - A_PRECISION) * D // A_PRECISION + (N_COINS + 1) * D_P)
+        if D > Dprev:
+            if D - Dprev <= 1:
+                return D
+        elif Dprev - D <= 1:
+            return D
+    raise "D did not converge"
+
+@internal
+@pure
+def _solve_y(_c: uint256, _b: uint256, _D: uint256) -> uint256:
+    y: uint256 = _D
+    for _: uint256 in range(MAX_ITER):
+        y_prev: uint256 = y
+        y = (y * y + _c) // (2 * y + _b - _D)
+        if y > y_prev:
+            if y - y_prev <= 1:
+                return y
+        elif y_prev - y <= 1:
+            return y
+    raise "y did not converge"
+
+@internal
+@view
+def _get_y(i: uint256, j: uint256, x: uint256, _xp: uint256[N_COINS]) -> uint256:
+    """New balance of coin j (in xp units) after coin i's balance becomes x."""
+    assert i != j and j < N_COINS and i < N_COINS
+    amp: uint256 = self.A_precise
+    D: uint256 = self._get_D(_xp, amp)
+    Ann: uint256 = amp * N_COINS
+    c: uint256 = D
+    S_: uint256 = 0
+    _x: uint256 = 0
+    for _i: uint256 in range(N_COINS):
+        if _i == i:
+            _x = x
+        elif _i != j:
+            _x = _xp[_i]
+        else:
+            continue
+        S_ += _x
+        c = c * D // (_x * N_COINS)
+    c = c * D * A_PRECISION // (Ann * N_COINS)
+    b: uint256 = S_ + D * A_PRECISION // Ann
+    return self._solve_y(c, b, D)
+
+@internal
+@pure
+def _get_y_D(_amp: uint256, i: uint256, _xp: uint256[N_COINS], _D: uint256) -> uint256:
+    """Balance of coin i (in xp units) that brings the invariant to _D."""
+    assert i < N_COINS
+    Ann: uint256 = _amp * N_COINS
+    c: uint256 = _D
+    S_: uint256 = 0
+    for _i: uint256 in range(N_COINS):
+        if _i == i:
+            continue
+        S_ += _xp[_i]
+        c = c * _D // (_xp[_i] * N_COINS)
+    c = c * _D * A_PRECISION // (Ann * N_COINS)
+    b: uint256 = S_ + _D * A_PRECISION // Ann
+    return self._solve_y(c, b, _D)
+
+@internal
+@view
+def _dy(i: uint256, j: uint256, _dx: uint256) -> (uint256, uint256):
+    """Amount out (native units) and fee (xp units) for swapping _dx of coin i."""
+    xp: uint256[N_COINS] = self._xp(self.balances)
+    x: uint256 = xp[i] + _dx * PRECISION_MUL[i]
+    y: uint256 = self._get_y(i, j, x, xp)
+    dy: uint256 = xp[j] - y - 1
+    dy_fee: uint256 = dy * self.fee // FEE_DENOMINATOR
+    return (dy - dy_fee) // PRECISION_MUL[j], dy_fee
+
+@internal
+@view
+def _calc_withdraw_one_coin(_token_amount: uint256, i: uint256) -> (uint256, uint256):
+    amp: uint256 = self.A_precise
+    xp: uint256[N_COINS] = self._xp(self.balances)
+    D0: uint256 = self._get_D(xp, amp)
+    D1: uint256 = D0 - _token_amount * D0 // self.totalSupply
+    new_y: uint256 = self._get_y_D(amp, i, xp, D1)
+
+    base_fee: uint256 = self.fee * N_COINS // (4 * (N_COINS - 1))
+    xp_reduced: uint256[N_COINS] = xp
+    for j: uint256 in range(N_COINS):
+        dx_expected: uint256 = 0
+        if j == i:
+            dx_expected = xp[j] * D1 // D0 - new_y
+        else:
+            dx_expected = xp[j] - xp[j] * D1 // D0
+        xp_reduced[j] -= base_fee * dx_expected // FEE_DENOMINATOR
+
+    dy: uint256 = xp_reduced[i] - self._get_y_D(amp, i, xp_reduced, D1)
+    dy = (dy - 1) // PRECISION_MUL[i]
+    dy_0: uint256 = (xp[i] - new_y) // PRECISION_MUL[i]
+    return dy, dy_0 - dy
+
+# ----- views -----
+
+@external
+@view
+def A() -> uint256:
+    return self.A_precise // A_PRECISION
+
+@external
+@view
+def D() -> uint256:
+    return self._get_D(self._xp(self.balances), self.A_precise)
+
+@external
+@view
+def get_virtual_price() -> uint256:
+    return self._get_D(self._xp(self.balances), self.A_precise) * PRECISION // self.totalSupply
+
+@external
+@view
+def calc_token_amount(_amounts: uint256[N_COINS], _is_deposit: bool) -> uint256:
+    amp: uint256 = self.A_precise
+    balances: uint256[N_COINS] = self.balances
+    D0: uint256 = self._get_D(self._xp(balances), amp)
+    for i: uint256 in range(N_COINS):
+        if _is_deposit:
+            balances[i] += _amounts[i]
+        else:
+            balances[i] -= _amounts[i]
+    D1: uint256 = self._get_D(self._xp(balances), amp)
+    diff: uint256 = 0
+    if _is_deposit:
+        diff = D1 - D0
+    else:
+        diff = D0 - D1
+    return diff * self.totalSupply // D0
+
+@external
+@view
+def get_dy(i: int128, j: int128, _dx: uint256) -> uint256:
+    return self._dy(convert(i, uint256), convert(j, uint256), _dx)[0]
+
+@external
+@view
+def calc_withdraw_one_coin(_token_amount: uint256, i: int128) -> uint256:
+    return self._calc_withdraw_one_coin(_token_amount, convert(i, uint256))[0]
+
+# ----- state-changing -----
+
+@external
+def add_liquidity(_amounts: uint256[N_COINS], _min_mint_amount: uint256) -> uint256:
+    amp: uint256 = self.A_precise
+    old_balances: uint256[N_COINS] = self.balances
+    D0: uint256 = self._get_D(self._xp(old_balances), amp)
+    total_supply: uint256 = self.totalSupply
+
+    new_balances: uint256[N_COINS] = old_balances
+    for i: uint256 in range(N_COINS):
+        if total_supply == 0:
+            assert _amounts[i] > 0, "initial deposit requires all coins"
+        new_balances[i] += _amounts[i]
+    D1: uint256 = self._get_D(self._xp(new_balances), amp)
+    assert D1 > D0
+
+    mint_amount: uint256 = 0
+    if total_supply > 0:
+        # fee on the imbalanced part of the deposit
+        base_fee: uint256 = self.fee * N_COINS // (4 * (N_COINS - 1))
+        for i: uint256 in range(N_COINS):
+            ideal_balance: uint256 = D1 * old_balances[i] // D0
+            difference: uint256 = 0
+            if ideal_balance > new_balances[i]:
+                difference = ideal_balance - new_balances[i]
+            else:
+                difference = new_balances[i] - ideal_balance
+            fee: uint256 = base_fee * difference // FEE_DENOMINATOR
+            self.balances[i] = new_balances[i] - fee * self.admin_fee // FEE_DENOMINATOR
+            new_balances[i] -= fee
+        D2: uint256 = self._get_D(self._xp(new_balances), amp)
+        mint_amount = total_supply * (D2 - D0) // D0
+    else:
+        self.balances = new_balances
+        mint_amount = D1
+    assert mint_amount >= _min_mint_amount, "Slippage screwed you"
+
+    for i: uint256 in range(N_COINS):
+        if _amounts[i] > 0:
+            assert extcall ERC20(self.coins[i]).transferFrom(msg.sender, self, _amounts[i])
+
+    self.totalSupply = total_supply + mint_amount
+    self.balanceOf[msg.sender] += mint_amount
+    return mint_amount
+
+@external
+def exchange(i: int128, j: int128, _dx: uint256, _min_dy: uint256) -> uint256:
+    _i: uint256 = convert(i, uint256)
+    _j: uint256 = convert(j, uint256)
+    dy: uint256 = 0
+    dy_fee: uint256 = 0
+    dy, dy_fee = self._dy(_i, _j, _dx)
+    assert dy >= _min_dy, "Exchange resulted in fewer coins than expected"
+
+    dy_admin_fee: uint256 = dy_fee * self.admin_fee // FEE_DENOMINATOR // PRECISION_MUL[_j]
+    self.balances[_i] += _dx
+    self.balances[_j] -= dy + dy_admin_fee
+
+    assert extcall ERC20(self.coins[_i]).transferFrom(msg.sender, self, _dx)
+    assert extcall ERC20(self.coins[_j]).transfer(msg.sender, dy)
+    return dy
+
+@external
+def remove_liquidity(_amount: uint256, _min_amounts: uint256[N_COINS]) -> uint256[N_COINS]:
+    total_supply: uint256 = self.totalSupply
+    amounts: uint256[N_COINS] = empty(uint256[N_COINS])
+    for i: uint256 in range(N_COINS):
+        value: uint256 = self.balances[i] * _amount // total_supply
+        assert value >= _min_amounts[i], "Withdrawal resulted in fewer coins than expected"
+        self.balances[i] -= value
+        amounts[i] = value
+        assert extcall ERC20(self.coins[i]).transfer(msg.sender, value)
+
+    self.balanceOf[msg.sender] -= _amount
+    self.totalSupply = total_supply - _amount
+    return amounts
+
+@external
+def remove_liquidity_one_coin(_token_amount: uint256, i: int128, _min_amount: uint256) -> uint256:
+    _i: uint256 = convert(i, uint256)
+    dy: uint256 = 0
+    dy_fee: uint256 = 0
+    dy, dy_fee = self._calc_withdraw_one_coin(_token_amount, _i)
+    assert dy >= _min_amount, "Not enough coins removed"
+
+    self.balances[_i] -= dy + dy_fee * self.admin_fee // FEE_DENOMINATOR
+    self.balanceOf[msg.sender] -= _token_amount
+    self.totalSupply -= _token_amount
+    assert extcall ERC20(self.coins[_i]).transfer(msg.sender, dy)
+    return dy
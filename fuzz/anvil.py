@@ -0,0 +1,58 @@
+# fuzz/anvil.py
+"""Start anvil forks (same flags as run_anvil.sh), wait for them to answer, and pin them to a fork block."""
+import subprocess
+import time
+from typing import Optional
+
+from web3 import HTTPProvider, Web3
+
+
+def start_anvil(port: int, fork_url: str, fork_block: int, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [
+            "anvil",
+            "--fork-url", fork_url,
+            "--fork-block-number", str(fork_block),
+            "--chain-id", "1",
+            "--port", str(port),
+            "--no-rate-limit",
+        ],
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def wait_for_node(url: str, timeout: float = 60.0):
+    w3 = Web3(HTTPProvider(url))
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            w3.eth.chain_id
+            return
+        except Exception:
+            time.sleep(0.25)
+    raise RuntimeError(f"node at {url} did not come up within {timeout:.0f}s")
+
+
+def fork_block(w3: Web3) -> Optional[int]:
+    """Block the node was forked at (anvil_nodeInfo, or hardhat_metadata), or None if it is not a fork."""
+    try:
+        block = (w3.manager.request_blocking("anvil_nodeInfo", []).get("forkConfig") or {}).get("forkBlockNumber")
+        if block is not None:
+            return int(block)
+    except Exception:
+        pass
+    try:
+        return int(w3.manager.request_blocking("hardhat_metadata", [])["forkedNetwork"]["forkBlockNumber"])
+    except Exception:
+        return None
+
+
+def reset_fork(w3: Web3, block: int) -> bool:
+    """Throw away the node's local state and re-fork at `block` from the same upstream; False if refused."""
+    try:
+        w3.manager.request_blocking("anvil_reset", [{"forking": {"blockNumber": block}}])
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,258 @@
+# fuzz/failures.py
+"""
+Failure store: one SQLite file (fuzz_failures/failures.sqlite) instead of a
+fail_<rule>_<n>.json per failure.
+
+Every failure gets a signature: sha256 over the rule (or invariant) that failed,
+the revert reason with numbers and hex blobs normalized away, the failing pc and
+opcode when the node can trace the transaction, and the pool's code hash. Writes
+are deduplicated on that signature:
+
+    signatures   one row per signature: counts, first/last seen, block range, and
+                 the first record in full (params, trace) as the example to replay
+    occurrences  one small row per failure (block, shard, params, message), no trace;
+                 at most MAX_OCCURRENCES per signature are kept, the count goes on
+
+So the file grows with the number of distinct failures, not with the number of
+runs. Sharded workers write into the same file; WAL and BEGIN IMMEDIATE keep the
+upserts atomic across processes.
+
+usage: failures.py [--store PATH] list [--rule R] [--reason TEXT] [--blocks S:E]
+       failures.py [--store PATH] show SIG
+       failures.py [--store PATH] import fail_*.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Optional
+
+STORE_NAME = "failures.sqlite"
+MAX_OCCURRENCES = 1000  # per signature
+
+_HEX = re.compile(r"0x[0-9a-fA-F]+")
+_NUMBER = re.compile(r"-?\b\d+(\.\d+)?([eE][-+]?\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def store_path(fail_dir: str) -> str:
+    return os.path.join(fail_dir, STORE_NAME)
+
+
+def normalize_reason(reason: Optional[str]) -> str:
+    """Revert reason / failure message with the run-specific parts (amounts, addresses, hashes) blanked out."""
+    if not reason:
+        return ""
+    reason = _NUMBER.sub("<n>", _HEX.sub("<hex>", reason))
+    return _SPACE.sub(" ", reason).strip()
+
+
+def signature(rule: str, reason: Optional[str], pc: Optional[int] = None, opcode: Optional[str] = None,
+              code_hash: Optional[str] = None) -> str:
+    canonical = json.dumps([rule, normalize_reason(reason), pc, opcode, code_hash], separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def record_signature(record: dict) -> str:
+    """Signature of a failure record; records without a "reason" fall back to their "info" message."""
+    return signature(record["name"], record.get("reason") or record.get("info"), record.get("pc"),
+                     record.get("opcode"), record.get("code_hash"))
+
+
+def parse_blocks(spec: str) -> tuple:
+    """"S:E" -> (S, E), both inclusive; either side may be empty."""
+    start, _, end = spec.partition(":")
+    return (int(start) if start else None, int(end) if end else None)
+
+
+class FailureStore:
+    """Deduplicated failure records in one SQLite file (safe to share between threads and processes)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # autocommit; record() opens its own BEGIN IMMEDIATE so the read-then-write is atomic
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS signatures (
+                    sig TEXT PRIMARY KEY, rule TEXT, reason TEXT, pc INTEGER, opcode TEXT, code_hash TEXT,
+                    error TEXT, count INTEGER, first_seen REAL, last_seen REAL,
+                    first_block INTEGER, last_block INTEGER, example TEXT
+                );
+                CREATE TABLE IF NOT EXISTS occurrences (
+                    id INTEGER PRIMARY KEY, sig TEXT, block INTEGER, shard INTEGER, ts REAL, info TEXT, params TEXT
+                );
+                CREATE INDEX IF NOT EXISTS signatures_rule ON signatures (rule);
+                CREATE INDEX IF NOT EXISTS signatures_reason ON signatures (reason);
+                CREATE INDEX IF NOT EXISTS occurrences_sig ON occurrences (sig, block);
+                CREATE INDEX IF NOT EXISTS occurrences_block ON occurrences (block);
+                """
+            )
+
+    def record(self, record: dict, ts: Optional[float] = None) -> tuple:
+        """Store one failure record; return (signature, True if the signature is new)."""
+        sig = record_signature(record)
+        ts = time.time() if ts is None else ts
+        block = record.get("block")
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.db.execute("SELECT count FROM signatures WHERE sig = ?", (sig,)).fetchone()
+                if row is None:
+                    self.db.execute(
+                        "INSERT INTO signatures VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?)",
+                        (sig, record["name"], normalize_reason(record.get("reason") or record.get("info")),
+                         record.get("pc"), record.get("opcode"), record.get("code_hash"), record.get("error"),
+                         ts, ts, block, block, json.dumps(record)),
+                    )
+                else:
+                    self.db.execute(
+                        "UPDATE signatures SET count = count + 1, last_seen = max(last_seen, ?),"
+                        " first_block = coalesce(min(first_block, ?), first_block, ?),"
+                        " last_block = coalesce(max(last_block, ?), last_block, ?) WHERE sig = ?",
+                        (ts, block, block, block, block, sig),
+                    )
+                if row is None or row["count"] < MAX_OCCURRENCES:
+                    self.db.execute(
+                        "INSERT INTO occurrences (sig, block, shard, ts, info, params) VALUES (?, ?, ?, ?, ?, ?)",
+                        (sig, block, record.get("shard"), ts, record.get("info"), json.dumps(record.get("params"))),
+                    )
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+        return sig, row is None
+
+    def query(self, rule: Optional[str] = None, reason: Optional[str] = None, blocks: tuple = (None, None)) -> list:
+        """
+        Signature rows (without the example), most frequent first. `reason` is a substring;
+        `blocks` (inclusive) matches signatures whose first..last block range overlaps it.
+        """
+        where, args = [], []
+        if rule is not None:
+            where.append("rule = ?")
+            args.append(rule)
+        if reason is not None:
+            where.append("reason LIKE ?")
+            args.append(f"%{reason}%")
+        start, end = blocks
+        if start is not None or end is not None:
+            # the signature's own block range: occurrences stop being stored at MAX_OCCURRENCES
+            where.append("first_block <= ? AND last_block >= ?")
+            args += [end if end is not None else 2**63 - 1, start if start is not None else 0]
+        sql = ("SELECT sig, rule, reason, pc, opcode, code_hash, error, count, first_seen, last_seen, first_block, last_block"
+               " FROM signatures")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self.lock:
+            return [dict(r) for r in self.db.execute(sql + " ORDER BY count DESC, first_seen", args)]
+
+    def resolve(self, prefix: str) -> str:
+        """Full signature for a unique prefix (as printed by `list`)."""
+        with self.lock:
+            rows = self.db.execute("SELECT sig FROM signatures WHERE sig LIKE ? LIMIT 2", (f"{prefix}%",)).fetchall()
+        if len(rows) != 1:
+            raise KeyError(f"{prefix}: {'no' if not rows else 'more than one'} signature matches")
+        return rows[0]["sig"]
+
+    def example(self, sig: str) -> dict:
+        """The first record stored under `sig` (or a unique prefix of it), trace included."""
+        sig = self.resolve(sig)
+        with self.lock:
+            row = self.db.execute("SELECT example FROM signatures WHERE sig = ?", (sig,)).fetchone()
+        return json.loads(row["example"])
+
+    def occurrences(self, sig: str, blocks: tuple = (None, None)) -> list:
+        sql, args = "SELECT block, shard, ts, info, params FROM occurrences WHERE sig = ?", [self.resolve(sig)]
+        start, end = blocks
+        if start is not None or end is not None:
+            sql += " AND block BETWEEN ? AND ?"
+            args += [start if start is not None else 0, end if end is not None else 2**63 - 1]
+        with self.lock:
+            rows = self.db.execute(sql + " ORDER BY id", args).fetchall()
+        return [{**dict(r), "params": json.loads(r["params"])} for r in rows]
+
+    def total(self) -> int:
+        """Failures recorded, duplicates included."""
+        with self.lock:
+            return self.db.execute("SELECT coalesce(sum(count), 0) FROM signatures").fetchone()[0]
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def import_json(self, paths: list) -> int:
+        """Load old fail_<rule>_<n>.json records; return how many signatures were new."""
+        new = 0
+        for path in sorted(paths):
+            with open(path) as f:
+                new += self.record(json.load(f), ts=os.path.getmtime(path))[1]
+        return new
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+_STORES: dict = {}
+
+
+def write_failure(fail_dir: str, record: dict) -> tuple:
+    """Record `record` (needs at least a "name") in fail_dir/failures.sqlite; return (signature, is new)."""
+    path = store_path(fail_dir)
+    if path not in _STORES:
+        _STORES[path] = FailureStore(path)
+    return _STORES[path].record(record)
+
+
+def _when(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", default=store_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fuzz_failures")))
+    sub = parser.add_subparsers(dest="command", required=True)
+    ls = sub.add_parser("list", help="one line per signature, most frequent first")
+    ls.add_argument("--rule")
+    ls.add_argument("--reason", help="substring of the normalized reason")
+    ls.add_argument("--blocks", type=parse_blocks, default=(None, None), help="S:E, inclusive")
+    show = sub.add_parser("show", help="the stored example (full record) and recent occurrences")
+    show.add_argument("sig", help="signature or a unique prefix")
+    imp = sub.add_parser("import", help="load fail_*.json records")
+    imp.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    store = FailureStore(args.store)
+    if args.command == "list":
+        rows = store.query(args.rule, args.reason, args.blocks)
+        for r in rows:
+            where = f"{r['opcode']}@{r['pc']}" if r["pc"] is not None else "-"
+            blocks = f"{r['first_block']}..{r['last_block']}" if r["first_block"] is not None else "-"
+            print(f"{r['sig'][:12]}  {r['count']:>6}  {r['rule']:<28} {where:<14} {blocks:<19} {r['reason']}")
+        print(f"{len(rows)} signatures, {sum(r['count'] for r in rows)} failures")
+    elif args.command == "show":
+        example = store.example(args.sig)
+        occurrences = store.occurrences(args.sig)
+        print(json.dumps(example, indent=2))
+        print(f"{len(occurrences)} stored occurrences; last: "
+              + ", ".join(f"block {o['block']} ({_when(o['ts'])})" for o in occurrences[-5:]))
+    else:
+        new = store.import_json(args.paths)
+        print(f"imported {len(args.paths)} records: {new} new signatures, {len(store)} in {args.store}")
+    store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+# fuzz/feedback.py
+"""
+Execution feedback for guided fuzzing, and a coverage map that persists across runs.
+
+Every step that sends pool transactions yields three cheap signals:
+
+    gas               gas used by the step's pool transactions (approvals left out)
+    branches          JUMPDEST pcs in the pool's code the transactions reached
+    revert_proximity  log10 of the largest share of any pool reserve the step
+                      moved, clipped to [FLOOR, 0]; a step that reverted scores 0
+
+`Feedback` keeps the best of each over one example, and `target()` hands them to
+hypothesis.target() once, at teardown, together with the number of branches and
+pool states the example reached that the map had never seen. Hypothesis then
+mutates towards examples that score higher instead of sampling the rule
+arguments uniformly.
+
+JUMPDEST pcs come from debug_traceTransaction (struct logs at depth 1, i.e. the
+pool's own frame) on a node. On the in-process backend, `JumpdestHook` wraps
+py-evm's JUMPDEST opcode and counts the pool's code in transactions the actors
+sent, so the fuzzer's own eth_call reads stay out.
+
+`CoverageMap` holds pc -> hits and pool-state bucket -> hits for one pool code
+hash in .cache/coverage/<code hash>.json. `save()` merges into that file under an
+flock, so shards share one map; `report()` gives the run's figures per CPU-minute.
+"""
+import fcntl
+import json
+import math
+import os
+import time
+from typing import Optional
+
+from eth_utils import to_canonical_address
+from hypothesis import target as hypothesis_target
+
+from signatures import CACHE_DIR
+
+MODES = ("target", "measure", "off")  # measure: collect and report, but leave Hypothesis unguided
+FLOOR = -18.0
+JUMPDEST = 0x5B
+
+
+def map_path(code_hash: str, cache_dir: str = CACHE_DIR) -> str:
+    return os.path.join(cache_dir, "coverage", f"{code_hash}.json")
+
+
+def trace_jumpdests(w3, tx_hash: str) -> set:
+    """JUMPDEST pcs the transaction's top-level frame executed (debug_traceTransaction)."""
+    trace = w3.manager.request_blocking(
+        "debug_traceTransaction", [tx_hash, {"disableStack": True, "disableStorage": True, "enableMemory": False}]
+    )
+    return {log["pc"] for log in trace.get("structLogs") or [] if log["op"] == "JUMPDEST" and log["depth"] == 1}
+
+
+class JumpdestHook:
+    """Record the pool's JUMPDEST pcs on an in-process py-evm chain, for transactions from `origins`."""
+
+    def __init__(self, w3, pool: str, origins):
+        backend = w3.provider.ethereum_tester.backend
+        self.computation_class = backend.chain.get_vm().state.computation_class
+        self.pool = to_canonical_address(pool)
+        self.origins = {to_canonical_address(a) for a in origins}
+        self.hits: set = set()
+        self.original = self.computation_class.opcodes[JUMPDEST]
+        hook, original = self, self.original
+
+        def traced(computation):
+            if computation.msg.code_address == hook.pool and computation.transaction_context.origin in hook.origins:
+                hook.hits.add(computation.code.program_counter - 1)
+            return original(computation=computation)
+
+        traced.mnemonic = getattr(original, "mnemonic", "JUMPDEST")
+        self.computation_class.opcodes = {**self.computation_class.opcodes, JUMPDEST: traced}
+
+    def drain(self) -> set:
+        hits, self.hits = self.hits, set()
+        return hits
+
+    def remove(self):
+        self.computation_class.opcodes = {**self.computation_class.opcodes, JUMPDEST: self.original}
+
+
+def reserve_shift(before, after) -> float:
+    """Largest share of any coin's pool balance that moved between two snapshots."""
+    return max((abs(a - b) / b for b, a in zip(before.balances, after.balances) if b), default=0.0)
+
+
+def proximity(share: float) -> float:
+    return min(max(math.log10(share), FLOOR), 0.0) if share > 0 else FLOOR
+
+
+def state_bucket(snapshot, decimals) -> str:
+    """
+    Coarse pool state: log2 of D, and for each coin the sign and order of magnitude
+    (in half-decades) of its deviation from an even share of D. Magnitudes rather than
+    shares, so a deep pool that steps only nudge still moves between buckets.
+    """
+    xp = [b * 10 ** (18 - d) for b, d in zip(snapshot.balances, decimals)]
+    if not snapshot.D or not all(xp):
+        return f"degenerate:{[int(x > 0) for x in xp]}"
+    even = snapshot.D / len(xp)
+    parts = [str(snapshot.D.bit_length())]
+    for x in xp:
+        deviation = x / even - 1
+        parts.append(f"{'+' if deviation > 0 else '-'}{round(-2 * math.log10(abs(deviation)))}" if deviation else "0")
+    return ",".join(parts)
+
+
+class Feedback:
+    """Best-of signals over one example."""
+
+    def __init__(self):
+        self.gas = 0
+        self.branches: set = set()
+        self.states: set = set()
+        self.proximity = FLOOR
+
+    def observe(self, gas: int, branches: set, reverted: bool, share: float = 0.0, state: Optional[str] = None):
+        self.gas = max(self.gas, gas)
+        self.branches |= branches
+        self.proximity = max(self.proximity, 0.0 if reverted else proximity(share))
+        if state is not None:
+            self.states.add(state)
+
+    def target(self, new_branches: int, new_states: int):
+        hypothesis_target(float(self.gas), label="gas")
+        hypothesis_target(float(len(self.branches)), label="branches")
+        hypothesis_target(float(new_branches), label="new_branches")
+        hypothesis_target(float(new_states), label="new_states")
+        hypothesis_target(self.proximity, label="revert_proximity")
+
+
+class CoverageMap:
+    def __init__(self, path: str, mode: str = "target"):
+        self.path = path
+        self.mode = mode
+        self.pcs: dict = {}
+        self.states: dict = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            self.pcs, self.states = saved["pcs"], saved["states"]
+        self.known_pcs, self.known_states = len(self.pcs), len(self.states)
+        self.run_pcs: dict = {}  # hits since the last save(), merged into the file by it
+        self.run_states: dict = {}
+        self.reached: tuple = (set(), set())  # branches and states this run reached at all
+        self.examples = 0
+        self.cpu0 = time.process_time()
+
+    def add(self, feedback: Feedback) -> tuple:
+        """Merge one example; return (branches, states) nobody had reached before it."""
+        self.examples += 1
+        new = [0, 0]
+        for k, (seen, run, keys) in enumerate(((self.pcs, self.run_pcs, map(str, feedback.branches)),
+                                               (self.states, self.run_states, feedback.states))):
+            for key in keys:
+                new[k] += key not in seen
+                seen[key] = seen.get(key, 0) + 1
+                run[key] = run.get(key, 0) + 1
+                self.reached[k].add(key)
+        return tuple(new)
+
+    def save(self):
+        """Merge this run's hits into the file (other shards may have written since it was loaded)."""
+        if not self.run_pcs and not self.run_states:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            saved = {"pcs": {}, "states": {}}
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    saved = json.load(f)
+            for name, run in (("pcs", self.run_pcs), ("states", self.run_states)):
+                for key, hits in run.items():
+                    saved[name][key] = saved[name].get(key, 0) + hits
+            tmp = f"{self.path}.{os.getpid()}"
+            with open(tmp, "w") as f:
+                json.dump(saved, f)
+            os.replace(tmp, self.path)
+        self.run_pcs, self.run_states = {}, {}
+
+    def report(self) -> dict:
+        cpu = time.process_time() - self.cpu0
+        branches, states = (len(r) for r in self.reached)
+        report = {
+            "mode": self.mode,
+            "examples": self.examples,
+            "cpu_seconds": cpu,
+            "branches": branches,
+            "new_branches": len(self.pcs) - self.known_pcs,
+            "branches_known": len(self.pcs),
+            "states": states,
+            "new_states": len(self.states) - self.known_states,
+            "states_known": len(self.states),
+        }
+        report["branches_per_cpu_minute"] = 60 * report["branches"] / cpu if cpu else 0.0
+        report["states_per_cpu_minute"] = 60 * report["states"] / cpu if cpu else 0.0
+        return report
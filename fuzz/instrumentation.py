@@ -0,0 +1,171 @@
+# fuzz/instrumentation.py
+"""
+Per-rule timing and cost accounting for the stateful fuzzer.
+
+One `Metrics` object per process. For every rule it accumulates wall time, RPC
+calls by method (diffed from the session's RpcCounter), gas used by the step's
+transactions, and how many steps reverted, errored or were skipped. Time spent
+evaluating preconditions and invariants is accounted separately. All of this is
+a few perf_counter() calls and small dict updates per step, so it is always on.
+
+`write()` emits the same figures as JSON (for scripts/compare_metrics.py) and in
+the Prometheus text exposition format (for a node_exporter textfile collector).
+Guided runs also set `coverage` (feedback.py's CoverageMap.report()) before writing.
+"""
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+
+@dataclass
+class RuleStats:
+    steps: int = 0
+    seconds: float = 0.0
+    rpc: Counter = field(default_factory=Counter)
+    gas_used: int = 0
+    txs: int = 0
+    reverts: int = 0  # a transaction of the step reverted
+    errors: int = 0  # the step raised something other than a revert
+    skipped: int = 0  # certain revert, not sent (see _will_revert)
+    precondition_seconds: float = 0.0
+    precondition_calls: int = 0
+
+
+@dataclass
+class InvariantStats:
+    calls: int = 0
+    seconds: float = 0.0
+    failures: int = 0
+
+
+class Metrics:
+    def __init__(self, labels: Optional[dict] = None):
+        self.labels = dict(labels or {})
+        self.rules: dict = defaultdict(RuleStats)
+        self.invariants: dict = defaultdict(InvariantStats)
+        self.examples = 0
+        self.coverage: Optional[dict] = None
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+
+    # ----- hooks -----
+
+    def example(self):
+        """A new example starts; the throughput clock runs from the first one (after setup)."""
+        if not self.examples:
+            self.started, self._t0 = time.time(), time.perf_counter()
+        self.examples += 1
+
+    def precondition(self, rule: str, predicate):
+        """Wrap a precondition so its evaluation time is charged to `rule`."""
+        def timed(machine):
+            t0 = time.perf_counter()
+            try:
+                return predicate(machine)
+            finally:
+                stats = self.rules[rule]
+                stats.precondition_seconds += time.perf_counter() - t0
+                stats.precondition_calls += 1
+        return timed
+
+    def step(self, rule: str, seconds: float, rpc_before: Counter, rpc_after: Counter, outcomes=(), error=None):
+        stats = self.rules[rule]
+        stats.steps += 1
+        stats.seconds += seconds
+        stats.rpc.update(rpc_after - rpc_before)
+        stats.txs += len(outcomes)
+        stats.gas_used += sum(o.gas_used for o in outcomes)
+        reverted = any(o.reverted for o in outcomes) or (error is not None and "revert" in str(error).lower())
+        if reverted:
+            stats.reverts += 1
+        elif error is not None:
+            stats.errors += 1
+
+    def skip(self, rule: str):
+        self.rules[rule].skipped += 1
+
+    def invariant(self, name: str, seconds: float, failed: bool):
+        stats = self.invariants[name]
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.failures += int(failed)
+
+    # ----- report -----
+
+    def report(self) -> dict:
+        elapsed = time.perf_counter() - self._t0
+        steps = sum(s.steps for s in self.rules.values())
+        rules = {}
+        for name, s in sorted(self.rules.items()):
+            rules[name] = dict(asdict(s), rpc=dict(s.rpc))
+            rules[name]["revert_rate"] = s.reverts / s.steps if s.steps else 0.0
+            rules[name]["mean_ms"] = 1000 * s.seconds / s.steps if s.steps else 0.0
+        return {
+            "labels": self.labels,
+            "started": self.started,
+            "elapsed_seconds": elapsed,
+            "examples": self.examples,
+            "steps": steps,
+            "steps_per_second": steps / elapsed if elapsed else 0.0,
+            "rules": rules,
+            "invariants": {name: asdict(s) for name, s in sorted(self.invariants.items())},
+            **({"coverage": self.coverage} if self.coverage is not None else {}),
+        }
+
+    def prometheus(self, report: Optional[dict] = None) -> str:
+        report = report or self.report()
+        base = "".join(f',{k}="{v}"' for k, v in sorted(self.labels.items()))
+        lines = []
+
+        def metric(name: str, kind: str, help_: str, samples):
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels) + base
+                lines.append(f"{name}{{{label_str.lstrip(',')}}} {value}")
+
+        rules = report["rules"]
+        metric("fuzz_steps_per_second", "gauge", "Rule executions per second of wall time.",
+               [((), report["steps_per_second"])])
+        metric("fuzz_examples_total", "counter", "State machine examples started.", [((), report["examples"])])
+        for key, help_ in (
+            ("steps", "Rule executions."),
+            ("seconds", "Wall time inside rule bodies, including mining."),
+            ("gas_used", "Gas used by the rule's transactions."),
+            ("txs", "Transactions sent by the rule."),
+            ("reverts", "Rule executions with a reverted transaction."),
+            ("errors", "Rule executions that raised something other than a revert."),
+            ("skipped", "Rule executions skipped as certain reverts."),
+            ("precondition_seconds", "Time spent evaluating the rule's precondition."),
+        ):
+            metric(f"fuzz_rule_{key}_total", "counter", help_, [((("rule", r),), s[key]) for r, s in rules.items()])
+        metric("fuzz_rule_rpc_calls_total", "counter", "JSON-RPC calls made while the rule ran.",
+               [((("rule", r), ("method", m)), n) for r, s in rules.items() for m, n in sorted(s["rpc"].items())])
+        metric("fuzz_invariant_seconds_total", "counter", "Time spent checking the invariant.",
+               [((("invariant", i),), s["seconds"]) for i, s in report["invariants"].items()])
+        metric("fuzz_invariant_calls_total", "counter", "Invariant checks.",
+               [((("invariant", i),), s["calls"]) for i, s in report["invariants"].items()])
+        coverage = report.get("coverage")
+        if coverage:
+            metric("fuzz_coverage_branches", "gauge", "Pool JUMPDESTs reached this run.", [((), coverage["branches"])])
+            metric("fuzz_coverage_states", "gauge", "Pool state buckets reached this run.", [((), coverage["states"])])
+            metric("fuzz_coverage_new_branches", "gauge", "Pool JUMPDESTs no earlier run had reached.",
+                   [((), coverage["new_branches"])])
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str, stem: str) -> tuple:
+        """Write <stem>.json and <stem>.prom under `directory`; return both paths."""
+        os.makedirs(directory, exist_ok=True)
+        report = self.report()
+        json_path = os.path.join(directory, f"{stem}.json")
+        prom_path = os.path.join(directory, f"{stem}.prom")
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        # textfile collectors read whole files: write aside, then rename into place
+        with open(prom_path + ".tmp", "w") as f:
+            f.write(self.prometheus(report))
+        os.replace(prom_path + ".tmp", prom_path)
+        return json_path, prom_path
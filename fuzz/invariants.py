@@ -0,0 +1,42 @@
+# fuzz/invariants.py
+"""
+Read-only pool invariants over a pool_state.PoolSnapshot.
+
+Each check raises AssertionError with a message when the snapshot violates it.
+The stateful fuzzer runs them after every step, and scanner.py runs them over
+historical blocks. They need nothing but the snapshot and the coin decimals,
+so they hold for any number of coins.
+"""
+from typing import Callable, Dict, Optional, Sequence
+
+from stableswap import StableSwapModel
+
+
+def no_negative_balances(snapshot, decimals: Sequence[int]):
+    for b in snapshot.balances:
+        assert b >= 0, f"Negative balance detected: {b}"
+
+
+def model_D_matches_chain(snapshot, decimals: Sequence[int]):
+    # pools without a D() getter read as 0 and are not compared
+    if snapshot.D:
+        model_D = StableSwapModel.from_snapshot(snapshot, decimals).D
+        assert model_D == snapshot.D, f"model D {model_D} != on-chain D {snapshot.D}"
+
+
+READ_ONLY: Dict[str, Callable] = {
+    "no_negative_balances": no_negative_balances,
+    "model_D_matches_chain": model_D_matches_chain,
+}
+
+
+def check_all(snapshot, decimals: Sequence[int]) -> Dict[str, Optional[str]]:
+    """name -> None if the invariant holds, else its failure message."""
+    out = {}
+    for name, fn in READ_ONLY.items():
+        try:
+            fn(snapshot, decimals)
+            out[name] = None
+        except AssertionError as e:
+            out[name] = str(e) or name
+    return out
@@ -0,0 +1,66 @@
+# fuzz/local_backend.py
+"""
+In-process backend for the stateful fuzzer (FUZZ_BACKEND=local).
+
+Runs `contracts/StableSwap2.vy` and two `contracts/MockERC20.vy` coins on py-evm
+through web3's EthereumTesterProvider: no node, no socket, no fork URL. The pool
+is seeded with liquidity and every actor is minted coins at deploy time, so the
+state machine can go straight to its rules.
+"""
+import functools
+import os
+from collections import namedtuple
+
+import vyper
+from web3 import EthereumTesterProvider, Web3
+
+CONTRACTS_DIR = os.path.join(os.path.dirname(__file__), "..", "contracts")
+
+# pool parameters (in the range of mainnet StableSwap pools)
+DEFAULT_A = 100
+DEFAULT_FEE = 4_000_000  # 4 bps, 1e10 denominator
+DEFAULT_ADMIN_FEE = 0
+DECIMALS = (18, 18)  # the fuzz bounds are tuned for 18-decimal coins, as on the sETH pool
+SEED_LIQUIDITY = 1_000_000  # whole coins deposited by the deployer
+ACTOR_FUNDS = 1_000  # whole coins minted to every actor, as the whale seeding does on a fork
+
+Actor = namedtuple("Actor", "address")
+LocalPool = namedtuple("LocalPool", "w3 pool_address actors tokens")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_contract(name: str):
+    """(abi, bytecode) for contracts/<name>.vy, compiled once per process."""
+    with open(os.path.join(CONTRACTS_DIR, f"{name}.vy")) as f:
+        out = vyper.compile_code(f.read(), output_formats=["abi", "bytecode"])
+    return out["abi"], out["bytecode"]
+
+
+def _deploy(w3: Web3, name: str, sender: str, *args):
+    abi, bytecode = compile_contract(name)
+    tx_hash = w3.eth.contract(abi=abi, bytecode=bytecode).constructor(*args).transact({"from": sender})
+    address = w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress
+    return w3.eth.contract(address=address, abi=abi)
+
+
+def deploy_local_pool(n_actors: int = 10, A: int = DEFAULT_A, fee: int = DEFAULT_FEE) -> LocalPool:
+    w3 = Web3(EthereumTesterProvider())
+    deployer, *others = w3.eth.accounts
+    actors = [Actor(a) for a in others[:n_actors]]
+
+    tokens = [
+        _deploy(w3, "MockERC20", deployer, f"Mock Coin {i}", f"MC{i}", d)
+        for i, d in enumerate(DECIMALS)
+    ]
+    pool = _deploy(w3, "StableSwap2", deployer, [t.address for t in tokens], A, fee, DEFAULT_ADMIN_FEE)
+
+    seed = [SEED_LIQUIDITY * 10**d for d in DECIMALS]
+    for token, amount in zip(tokens, seed):
+        token.functions.mint(deployer, amount).transact({"from": deployer})
+        token.functions.approve(pool.address, amount).transact({"from": deployer})
+        for actor in actors:
+            token.functions.mint(actor.address, ACTOR_FUNDS * 10 ** token.functions.decimals().call()).transact(
+                {"from": deployer}
+            )
+    pool.functions.add_liquidity(seed, 0).transact({"from": deployer})
+    return LocalPool(w3, pool.address, actors, tokens)
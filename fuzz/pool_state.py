@@ -0,0 +1,209 @@
+# fuzz/pool_state.py
+"""
+Per-block pool-state snapshots for the stateful fuzzer.
+
+Every precondition and invariant wants the same handful of values (D, balances,
+the pool's token holdings). Instead of one eth_call each, `PoolStateCache` fetches
+them together in one batched JSON-RPC request pinned to a block number, and hands
+the same `PoolSnapshot` back until the chain moves to a new block. On a dev node
+where only our own transactions mine blocks, a `pinned` cache does not even ask
+for the block number: it serves from memory until `invalidate()`, which the
+TxPipeline calls (via `on_mine`) whenever it mines. The snapshot
+also carries the parameters the off-chain model needs (A, fee, admin fee, LP
+supply), and `holder()` reads one account's coin and LP balances the same way.
+
+The requests themselves are built and parsed by module-level functions, so
+scanner.py can send the same calls over its own transport.
+"""
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from web3 import Web3
+
+from rpc import RpcCounter, batch_request, block_tag, calldata, eth_call, to_address, to_int
+
+ETH_SENTINELS = (
+    "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee",
+    "0x0000000000000000000000000000000000000000",
+)
+
+
+def is_eth(addr: str) -> bool:
+    return addr.lower() in ETH_SENTINELS
+
+
+@dataclass(frozen=True)
+class PoolSnapshot:
+    block: int
+    D: int
+    balances: tuple
+    coins: tuple
+    token_balances: tuple  # pool's actual holdings of each coin (ETH via eth_getBalance)
+    A_precise: int = 0
+    fee: int = 0
+    admin_fee: int = 0
+    lp_supply: int = 0
+
+
+class PoolStateCache:
+    def __init__(
+        self,
+        w3: Web3,
+        pool_address: str,
+        n_coins: int,
+        coins: Optional[Sequence[str]] = None,
+        counter: Optional[RpcCounter] = None,
+        pinned: bool = False,
+    ):
+        self.w3 = w3
+        self.pool_address = Web3.to_checksum_address(pool_address)
+        self.n_coins = n_coins
+        self.coins = tuple(coins) if coins else None
+        self.counter = counter
+        self.pinned = pinned  # the chain only moves when we say so; see invalidate()
+        self.lp_token: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._snapshot: Optional[PoolSnapshot] = None
+        self._holders: dict = {}  # address -> (block, balances)
+
+    def get(self) -> PoolSnapshot:
+        """Snapshot for the current block; fetched at most once per block (once per invalidate() if pinned)."""
+        if self.pinned:
+            if self._snapshot is not None:
+                self.hits += 1
+                return self._snapshot
+            self.misses += 1
+            self._snapshot = self.fetch(None)
+            return self._snapshot
+        block = self.w3.eth.block_number
+        if self._snapshot is not None and self._snapshot.block == block:
+            self.hits += 1
+            return self._snapshot
+        self.misses += 1
+        self._snapshot = self.fetch(block)
+        return self._snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+        self._holders.clear()
+
+    def _resolve_lp_token(self, block: int) -> str:
+        return resolve_lp_token(self.w3, self.pool_address, block, self.counter)
+
+    def fetch(self, block: Optional[int]) -> PoolSnapshot:
+        """Snapshot at `block`; None reads the latest block, with its number fetched in the same batch."""
+        if self.lp_token is None:
+            self.lp_token = self._resolve_lp_token(block)
+        if self.coins is None:
+            self.coins = discover_coins(self.w3, self.pool_address, block, self.n_coins, self.counter)
+            if len(self.coins) != self.n_coins:
+                raise RuntimeError(f"coins(i) call failed at block {block}")
+        requests = snapshot_requests(self.pool_address, self.lp_token, self.coins, block)
+        if block is None:
+            results = batch_request(self.w3, [("eth_blockNumber", [])] + requests, self.counter)
+            return parse_snapshot(to_int(results[0]), self.coins, results[1:])
+        return parse_snapshot(block, self.coins, batch_request(self.w3, requests, self.counter))
+
+    def holder(self, address: str) -> tuple:
+        """`address`'s balance of each coin, then of the LP token, at the current block."""
+        snapshot = self.get()
+        cached = self._holders.get(address)
+        if cached is not None and cached[0] == snapshot.block:
+            return cached[1]
+        requests = [self._holding(coin, snapshot.block, address) for coin in snapshot.coins]
+        requests.append(eth_call(self.lp_token, calldata("balanceOf(address)", address), snapshot.block))
+        balances = tuple(to_int(raw) or 0 for raw in batch_request(self.w3, requests, self.counter))
+        self._holders[address] = (snapshot.block, balances)
+        return balances
+
+    def _holding(self, coin: str, block: int, owner: Optional[str] = None):
+        return holding(coin, owner or self.pool_address, block)
+
+
+# ----- request building and parsing, shared with scanner.py's async transport -----
+
+MAX_COINS = 8
+
+
+def holding(coin: str, owner: str, block: Optional[int]):
+    """`owner`'s balance of `coin` (ETH via eth_getBalance)."""
+    if is_eth(coin):
+        return ("eth_getBalance", [owner, block_tag(block)])
+    return eth_call(coin, calldata("balanceOf(address)", owner), block)
+
+
+def lp_token_requests(pool: str, block: Optional[int]) -> list:
+    return [eth_call(pool, calldata("lp_token()"), block), eth_call(pool, calldata("token()"), block)]
+
+
+def parse_lp_token(pool: str, results: Sequence) -> str:
+    # old pools keep a separate LP token (lp_token() / token()); newer ones are their own token
+    address = to_address(results[0]) or to_address(results[1])
+    return Web3.to_checksum_address(address) if address and int(address, 16) else pool
+
+
+def coins_requests(pool: str, block: Optional[int], max_coins: int = MAX_COINS) -> list:
+    # coins(uint256) on current pools, coins(int128) on the oldest ones
+    return [eth_call(pool, calldata(f"coins({t})", i), block) for t in ("uint256", "int128") for i in range(max_coins)]
+
+
+def parse_coins(results: Sequence, max_coins: int = MAX_COINS) -> tuple:
+    """The pool's coins: the answered prefix of coins(i); a reverting index marks the end."""
+    for typed in (results[:max_coins], results[max_coins:]):
+        coins = []
+        for raw in typed:
+            address = to_address(raw)
+            if address is None or int(address, 16) == 0:
+                break
+            coins.append(address)
+        if coins:
+            return tuple(coins)
+    return ()
+
+
+def resolve_lp_token(w3: Web3, pool: str, block: Optional[int], counter: Optional[RpcCounter] = None) -> str:
+    return parse_lp_token(pool, batch_request(w3, lp_token_requests(pool, block), counter))
+
+
+def discover_coins(w3: Web3, pool: str, block: Optional[int], max_coins: int = MAX_COINS,
+                   counter: Optional[RpcCounter] = None) -> tuple:
+    return parse_coins(batch_request(w3, coins_requests(pool, block, max_coins), counter), max_coins)
+
+
+def snapshot_requests(pool: str, lp_token: str, coins: Sequence[str], block: Optional[int]) -> list:
+    """Every call a snapshot of `pool` at `block` needs, in the order parse_snapshot reads them."""
+    requests = [
+        eth_call(pool, calldata("A_precise()"), block),
+        eth_call(pool, calldata("A()"), block),
+        eth_call(pool, calldata("fee()"), block),
+        eth_call(pool, calldata("admin_fee()"), block),
+        eth_call(lp_token, calldata("totalSupply()"), block),
+        eth_call(pool, calldata("D()"), block),
+    ]
+    requests += [eth_call(pool, calldata("balances(uint256)", i), block) for i in range(len(coins))]
+    requests += [holding(coin, pool, block) for coin in coins]
+    return requests
+
+
+def parse_snapshot(block: int, coins: Sequence[str], results: Sequence) -> PoolSnapshot:
+    A_precise, A, fee, admin_fee, lp_supply, D = (to_int(raw) for raw in results[:6])
+    n = len(coins)
+    balances = []
+    for i, raw in enumerate(results[6 : 6 + n]):
+        value = to_int(raw)
+        if value is None:
+            raise RuntimeError(f"balances({i}) call failed at block {block}")
+        balances.append(value)
+    return PoolSnapshot(
+        block=block,
+        D=D or 0,  # pools without a D() getter read as 0
+        balances=tuple(balances),
+        coins=tuple(coins),
+        token_balances=tuple(to_int(raw) or 0 for raw in results[6 + n : 6 + 2 * n]),
+        # pools without A_precise() predate A_PRECISION and keep A unscaled
+        A_precise=A_precise if A_precise is not None else (A or 0) * 100,
+        fee=fee or 0,
+        admin_fee=admin_fee or 0,
+        lp_supply=lp_supply or 0,
+    )
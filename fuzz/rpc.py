@@ -0,0 +1,156 @@
+# fuzz/rpc.py
+"""
+JSON-RPC helpers shared by the fuzzer and its scripts.
+
+- `batch_request` sends many requests in a single HTTP round trip when the provider
+  speaks JSON-RPC over HTTP, and degrades to one request at a time otherwise.
+- `RpcCounter` counts calls per method and per fuzz step, so savings can be measured.
+"""
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+from eth_abi import encode as abi_encode
+from web3 import Web3
+from web3.middleware import Web3Middleware
+
+
+def selector(signature: str) -> bytes:
+    """4-byte function selector for e.g. "balances(uint256)"."""
+    return bytes(Web3.keccak(text=signature)[:4])
+
+
+def calldata(signature: str, *args) -> str:
+    """Hex calldata for `signature` called with `args` (types parsed from the signature)."""
+    types = signature[signature.index("(") + 1 : -1]
+    arg_types = [t for t in types.split(",") if t]
+    return "0x" + (selector(signature) + abi_encode(arg_types, list(args))).hex()
+
+
+def block_tag(block: Optional[int]) -> str:
+    return "latest" if block is None else hex(block)
+
+
+def to_int(value: Any) -> Optional[int]:
+    """Normalise a raw (hex string) or formatted (int / bytes) RPC result to int."""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return int.from_bytes(value, "big") if value else None
+    value = str(value)
+    if value in ("", "0x"):
+        return None
+    return int(value, 16)
+
+
+def to_bytes(value: Any) -> Optional[bytes]:
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return bytes.fromhex(str(value)[2:] if str(value).startswith("0x") else str(value))
+
+
+def to_address(value: Any) -> Optional[str]:
+    """Decode an ABI-encoded address return value."""
+    raw = to_bytes(value)
+    if not raw or len(raw) < 32:
+        return None
+    return Web3.to_checksum_address(raw[12:32])
+
+
+def eth_call(to: str, data: str, block: Optional[int] = None, sender: Optional[str] = None):
+    """Build a raw eth_call request tuple for `batch_request`."""
+    tx = {"to": to, "data": data}
+    if sender:
+        tx["from"] = sender
+    return ("eth_call", [tx, block_tag(block)])
+
+
+def _is_http(w3: Web3) -> bool:
+    provider = w3.provider
+    return bool(getattr(provider, "endpoint_uri", None)) and hasattr(provider, "make_batch_request")
+
+
+def batch_request(w3: Web3, requests: Iterable[tuple], counter: Optional["RpcCounter"] = None) -> list:
+    """
+    Send `requests` (a list of (method, params)) and return their results in order.
+    A request that errors (e.g. a reverting eth_call) yields None instead of raising.
+
+    Over HTTP this is one round trip. In-process providers have no transport to save,
+    so the requests are issued one by one through web3 (and counted by its middleware).
+    """
+    requests = list(requests)
+    if not requests:
+        return []
+    if _is_http(w3):
+        responses = w3.provider.make_batch_request(requests)
+        if counter is not None:
+            counter.record([method for method, _ in requests])
+        if not isinstance(responses, list):
+            # the node rejected the whole batch (e.g. batching disabled); retry one by one
+            return [_single(w3, method, params) for method, params in requests]
+        return [r.get("result") if "error" not in r else None for r in responses]
+    return [_single(w3, method, params) for method, params in requests]
+
+
+def _single(w3: Web3, method: str, params: list):
+    try:
+        return w3.manager.request_blocking(method, params)
+    except Exception:
+        return None
+
+
+class RpcCounter:
+    """Counts JSON-RPC calls by method, plus a per-step breakdown for the state machine."""
+
+    def __init__(self):
+        self.by_method: Counter = Counter()
+        self.round_trips = 0
+        self.per_step: list[int] = []
+        self._mark = 0
+
+    @property
+    def calls(self) -> int:
+        return sum(self.by_method.values())
+
+    def record(self, methods: Iterable[str], round_trips: int = 1):
+        self.by_method.update(methods)
+        self.round_trips += round_trips
+
+    def end_step(self):
+        """Close the current step; calls made since the previous mark are attributed to it."""
+        self.per_step.append(self.calls - self._mark)
+        self._mark = self.calls
+
+    def reset_steps(self):
+        self.per_step = []
+        self._mark = self.calls
+
+    def summary(self) -> str:
+        steps = len(self.per_step)
+        mean = sum(self.per_step) / steps if steps else 0.0
+        top = ", ".join(f"{m}={n}" for m, n in self.by_method.most_common(5))
+        return (
+            f"rpc: {self.calls} calls / {self.round_trips} round trips; "
+            f"{steps} steps, {mean:.1f} calls/step (max {max(self.per_step, default=0)}); {top}"
+        )
+
+    def install(self, w3: Web3):
+        """Count every request `w3` sends. Idempotent per Web3 instance."""
+        name = "rpc_counter"
+        if name in w3.middleware_onion:
+            w3.middleware_onion.remove(name)
+        counter = self
+
+        class _CountingMiddleware(Web3Middleware):
+            def wrap_make_request(self, make_request):
+                def middleware(method, params):
+                    counter.record([method])
+                    return make_request(method, params)
+
+                return middleware
+
+        w3.middleware_onion.add(_CountingMiddleware, name=name)
+        return self
@@ -0,0 +1,223 @@
+# fuzz/rpc_proxy.py
+"""
+Recording / replaying JSON-RPC proxy for forked runs.
+
+Put it between anvil and the upstream node (`anvil --fork-url http://127.0.0.1:8600`).
+Every upstream answer is stored in one SQLite file keyed by method and params, so a
+fork pinned to a block sees exactly the same storage, code and balances on every run.
+
+    record       serve from the store, forward misses upstream and store the answer
+    replay       serve from the store only; a miss is an error response, a line on
+                 stderr and an entry in `misses` (the pytest fixture fails the session)
+    passthrough  forward everything, store nothing
+
+JSON-RPC errors from upstream are forwarded but never stored, so a rate-limit or a
+timeout during recording does not become part of the fixture.
+
+usage: rpc_proxy.py [--mode record|replay|passthrough] [--store PATH | --fork-block N]
+                    [--upstream $ETH_RPC_URL] [--port 8600]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import requests
+
+from signatures import CACHE_DIR
+
+MODES = ("record", "replay", "passthrough")
+DEFAULT_PORT = 8600
+MISSING = -32099  # JSON-RPC server error code for "not in the store"
+
+
+def store_path(fork_block: int, chain: str = "mainnet") -> str:
+    return os.path.join(CACHE_DIR, "rpc", f"{chain}-{fork_block}.sqlite")
+
+
+def request_key(method: str, params) -> str:
+    canonical = json.dumps([method, params if params is not None else []], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class RpcStore:
+    """method+params -> JSON result, in one SQLite file (safe to share between threads)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, method TEXT, params TEXT, result TEXT)"
+            )
+            self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+
+    def get(self, method: str, params):
+        """(True, result) if recorded, else (False, None); a recorded result may itself be null."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT result FROM responses WHERE key = ?", (request_key(method, params),)
+            ).fetchone()
+        return (False, None) if row is None else (True, json.loads(row[0]))
+
+    def put(self, method: str, params, result):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (request_key(method, params), method, json.dumps(params), json.dumps(result)),
+            )
+
+    def set_meta(self, name: str, value):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (name, json.dumps(value)))
+
+    def meta(self, name: str, default=None):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class RpcProxy:
+    def __init__(self, store: RpcStore, upstream: Optional[str] = None, mode: str = "record", port: int = 0):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        if mode != "replay" and not upstream:
+            raise ValueError(f"{mode} mode needs an upstream URL")
+        self.store = store
+        self.upstream = upstream
+        self.mode = mode
+        self.session = requests.Session()
+        self.stats = {"hits": 0, "forwarded": 0, "misses": 0}
+        self.misses: list = []  # (method, params) that replay could not serve
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "RpcProxy":
+        self.thread = threading.Thread(target=self.server.serve_forever, name="rpc-proxy", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, body):
+        """Answer one JSON-RPC payload (a request or a batch)."""
+        batch = body if isinstance(body, list) else [body]
+        answers = [None] * len(batch)
+        forward = []
+        for n, req in enumerate(batch):
+            method, params = req.get("method"), req.get("params", [])
+            if self.mode != "passthrough":
+                found, result = self.store.get(method, params)
+                if found:
+                    self.stats["hits"] += 1
+                    answers[n] = {"jsonrpc": "2.0", "id": req.get("id"), "result": result}
+                    continue
+            if self.mode == "replay":
+                self.stats["misses"] += 1
+                self.misses.append((method, params))
+                print(f"rpc_proxy: replay miss {method} {json.dumps(params)}", file=sys.stderr, flush=True)
+                answers[n] = {
+                    "jsonrpc": "2.0",
+                    "id": req.get("id"),
+                    "error": {"code": MISSING, "message": f"rpc_proxy replay: no recorded response for {method}"},
+                }
+                continue
+            forward.append(n)
+
+        if forward:
+            # one upstream round trip for everything the store could not answer
+            upstream = [dict(batch[n], jsonrpc="2.0", id=n) for n in forward]
+            replies = self.session.post(self.upstream, json=upstream, timeout=60).json()
+            if isinstance(replies, dict):  # some nodes answer a whole batch with a single error
+                replies = [dict(replies, id=n) for n in forward]
+            by_id = {r.get("id"): r for r in replies}
+            for n in forward:
+                reply = by_id.get(n) or {"error": {"code": -32603, "message": "no upstream reply"}}
+                self.stats["forwarded"] += 1
+                answer = {"jsonrpc": "2.0", "id": batch[n].get("id")}
+                if "result" in reply:
+                    answer["result"] = reply["result"]
+                    if self.mode == "record":
+                        self.store.put(batch[n]["method"], batch[n].get("params", []), reply["result"])
+                else:
+                    answer["error"] = reply.get("error")
+                answers[n] = answer
+        return answers if isinstance(body, list) else answers[0]
+
+    def _handler(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                try:
+                    payload = json.dumps(proxy.handle(body)).encode()
+                except requests.RequestException as e:
+                    payload = json.dumps(
+                        {"jsonrpc": "2.0", "id": None, "error": {"code": -32603, "message": f"upstream: {e}"}}
+                    ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=MODES, default="record")
+    parser.add_argument("--upstream", default=os.environ.get("ETH_RPC_URL"))
+    parser.add_argument("--store", help="SQLite file (default: .cache/rpc/mainnet-<fork block>.sqlite)")
+    parser.add_argument("--fork-block", type=int, default=None)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    if not args.store and args.fork_block is None:
+        sys.exit("pass --store or --fork-block")
+    store = RpcStore(args.store or store_path(args.fork_block))
+    if args.fork_block is not None:
+        store.set_meta("fork_block", args.fork_block)
+    proxy = RpcProxy(store, args.upstream, args.mode, args.port)
+    print(f"rpc_proxy: {args.mode} on {proxy.url} ({len(store)} responses in {store.path})", flush=True)
+    try:
+        proxy.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"rpc_proxy: {proxy.stats}", flush=True)
+        proxy.server.server_close()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
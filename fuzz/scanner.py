@@ -0,0 +1,364 @@
+# fuzz/scanner.py
+"""
+Read-only invariant scanner over many pools and a range of historical blocks.
+
+For every (pool, block) it fetches the same snapshot the fuzzer uses
+(pool_state.snapshot_requests) and runs the read-only invariants in invariants.py.
+Pools may have any number of coins; coins, LP token and decimals are read once per
+pool at the last block of the range.
+
+The transport is asyncio + aiohttp. Connections are pooled. The calls for several
+(pool, block) units go out as one JSON-RPC batch of up to --batch calls, pinned to
+the block with a block tag. At most --concurrency batches are in flight at once.
+Rows stream into part files in the output directory: parquet when pyarrow is
+installed, CSV otherwise. When a part is closed it is renamed into place, then
+its units and a line committing the part are appended to checkpoint.txt. A rerun
+with the same --out skips committed units, deletes any part the checkpoint does
+not commit (a crash between the rename and the checkpoint), and continues.
+
+A unit whose batch cannot be fetched after retries is left out and not
+checkpointed, so the next run tries it again. A unit the node answers but the pool
+cannot (not deployed yet, call reverted) is written with its error and counts as done.
+
+Point --rpc at an archive node, a local anvil, or rpc_proxy.py (record or replay).
+
+usage: scanner.py --pool ADDR [--pool ADDR ...] --blocks START:END[:STEP]
+                  [--rpc URL] [--out DIR] [--concurrency 8] [--batch 200]
+"""
+import argparse
+import asyncio
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from typing import List, Optional, Sequence
+
+import aiohttp
+from web3 import Web3
+
+import invariants
+from pool_state import (
+    coins_requests,
+    is_eth,
+    lp_token_requests,
+    parse_coins,
+    parse_lp_token,
+    parse_snapshot,
+    snapshot_requests,
+)
+from rpc import calldata, eth_call, to_int
+
+try:  # parquet output is optional
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BATCH = 200  # JSON-RPC calls per HTTP request
+ROWS_PER_PART = 50_000
+RETRIES = 4
+COLUMNS = ["pool", "block", "n_coins", "D", "A_precise", "fee", "admin_fee", "lp_supply",
+           "balances", "token_balances", "ok", "error"] + [f"inv_{name}" for name in invariants.READ_ONLY]
+
+
+def parse_blocks(spec: str) -> range:
+    """"START:END[:STEP]", END inclusive."""
+    parts = [int(p) for p in spec.split(":")]
+    if len(parts) not in (2, 3):
+        raise ValueError(f"expected START:END[:STEP], got {spec!r}")
+    start, end = parts[0], parts[1]
+    step = parts[2] if len(parts) == 3 else 1
+    return range(start, end + 1, step)
+
+
+class TransportError(Exception):
+    pass
+
+
+class AsyncRpc:
+    """JSON-RPC batches over one pooled aiohttp session; a failed request yields None, like rpc.batch_request."""
+
+    def __init__(self, url: str, concurrency: int = DEFAULT_CONCURRENCY, timeout: float = 60):
+        self.url = url
+        self.concurrency = concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.stats = {"http_requests": 0, "calls": 0, "retries": 0}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def batch(self, requests: Sequence[tuple]) -> list:
+        payload = [{"jsonrpc": "2.0", "id": n, "method": m, "params": p} for n, (m, p) in enumerate(requests)]
+        for attempt in range(RETRIES + 1):
+            try:
+                async with self.session.post(self.url, json=payload) as resp:
+                    body = await resp.json(content_type=None)
+                self.stats["http_requests"] += 1
+                self.stats["calls"] += len(requests)
+                if isinstance(body, dict):  # the whole batch was rejected (rate limit, too large, ...)
+                    raise TransportError(body.get("error"))
+                by_id = {r.get("id"): r for r in body}
+                return [by_id.get(n, {}).get("result") for n in range(len(requests))]
+            except (aiohttp.ClientError, asyncio.TimeoutError, TransportError, ValueError) as e:
+                if attempt == RETRIES:
+                    raise TransportError(f"{len(requests)} calls failed after {RETRIES} retries: {e}") from e
+                self.stats["retries"] += 1
+                await asyncio.sleep(0.25 * 2**attempt)
+
+
+class PoolMeta:
+    def __init__(self, address: str, coins: tuple, lp_token: str, decimals: tuple):
+        self.address = address
+        self.coins = coins
+        self.lp_token = lp_token
+        self.decimals = decimals
+
+
+async def load_pool(rpc: AsyncRpc, address: str, block: int) -> PoolMeta:
+    address = Web3.to_checksum_address(address)
+    results = await rpc.batch(coins_requests(address, block) + lp_token_requests(address, block))
+    coins = parse_coins(results[:-2])
+    if not coins:
+        raise RuntimeError(f"{address}: no coins(i) at block {block}; is it a Curve pool?")
+    lp_token = parse_lp_token(address, results[-2:])
+    raw = await rpc.batch([eth_call(c, calldata("decimals()"), block) for c in coins if not is_eth(c)])
+    raw = iter(raw)
+    decimals = tuple(18 if is_eth(c) else (to_int(next(raw)) or 18) for c in coins)
+    return PoolMeta(address, coins, lp_token, decimals)
+
+
+class Checkpoint:
+    """
+    Append-only log of finished units: a "pool block part" line per unit, then a
+    line holding just the part's name that commits them. Units of a part without
+    its commit line (a torn write) do not count as done.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        self.parts = set()
+        if os.path.exists(path):
+            pending = {}
+            with open(path) as f:
+                text = f.read()
+            for line in text.splitlines():
+                fields = line.split()
+                if len(fields) == 3:
+                    pending.setdefault(fields[2], []).append(tuple(fields[:2]))
+                elif len(fields) == 1:
+                    self.parts.add(fields[0])
+                    self.done.update(pending.pop(fields[0], ()))
+            if text and not text.endswith("\n"):
+                with open(path, "a") as f:
+                    f.write("\n")  # end the torn line so the next mark starts a fresh one
+
+    def __contains__(self, unit) -> bool:
+        return (unit[0], str(unit[1])) in self.done
+
+    def mark(self, units, part: str):
+        lines = "".join(f"{pool} {block} {part}\n" for pool, block in units) + f"{part}\n"
+        with open(self.path, "a") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update((pool, str(block)) for pool, block in units)
+        self.parts.add(part)
+
+
+class PartWriter:
+    """Rows into part-NNNNN.{parquet,csv}; a part is renamed into place, then committed in the checkpoint, when it closes."""
+
+    def __init__(self, directory: str, checkpoint: Checkpoint, fmt: str = "auto", rows_per_part: int = ROWS_PER_PART):
+        if fmt == "auto":
+            fmt = "parquet" if pq is not None else "csv"
+        if fmt == "parquet" and pq is None:
+            raise RuntimeError("parquet output needs pyarrow (pip install pyarrow); use --format csv")
+        self.directory = directory
+        self.checkpoint = checkpoint
+        self.fmt = fmt
+        self.rows_per_part = rows_per_part
+        for stale in glob.glob(os.path.join(directory, "*.tmp")):
+            os.remove(stale)  # an interrupted part; its units were never checkpointed
+        parts = glob.glob(os.path.join(directory, "part-*"))
+        for orphan in [p for p in parts if os.path.basename(p) not in checkpoint.parts]:
+            # renamed into place but never committed: its units run again, so its rows would be duplicated
+            os.remove(orphan)
+            parts.remove(orphan)
+        self.part = 1 + max((int(os.path.basename(p)[len("part-"):].split(".")[0]) for p in parts), default=-1)
+        self.rows: List[dict] = []
+        self.units: list = []
+        self.written = 0
+
+    def add(self, unit, rows: List[dict]):
+        self.rows.extend(rows)
+        self.units.append(unit)
+        if len(self.rows) >= self.rows_per_part:
+            self.close_part()
+
+    def close_part(self):
+        if not self.rows:
+            return
+        path = os.path.join(self.directory, f"part-{self.part:05d}.{self.fmt}")
+        tmp = path + ".tmp"
+        if self.fmt == "parquet":
+            schema = pa.schema([(c, pa.int64() if c in ("block", "n_coins") else pa.bool_() if c == "ok" else pa.string())
+                                for c in COLUMNS])
+            pq.write_table(pa.Table.from_pylist(self.rows, schema=schema), tmp, compression="zstd")
+        else:
+            with open(tmp, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=COLUMNS)
+                writer.writeheader()
+                writer.writerows(self.rows)
+        os.replace(tmp, path)
+        self.checkpoint.mark(self.units, os.path.basename(path))
+        self.written += len(self.rows)
+        self.part += 1
+        self.rows, self.units = [], []
+
+
+def row(meta: PoolMeta, block: int, results: Sequence) -> dict:
+    out = {c: None for c in COLUMNS}
+    out.update(pool=meta.address, block=block, n_coins=len(meta.coins), ok=False)
+    try:
+        snapshot = parse_snapshot(block, meta.coins, results)
+    except RuntimeError as e:
+        out["error"] = str(e)
+        return out
+    # uint256 values do not fit a 64-bit column; keep them as decimal strings
+    out.update(
+        D=str(snapshot.D), A_precise=str(snapshot.A_precise), fee=str(snapshot.fee),
+        admin_fee=str(snapshot.admin_fee), lp_supply=str(snapshot.lp_supply),
+        balances=json.dumps([str(b) for b in snapshot.balances]),
+        token_balances=json.dumps([str(b) for b in snapshot.token_balances]),
+    )
+    failures = invariants.check_all(snapshot, meta.decimals)
+    for name, message in failures.items():
+        out[f"inv_{name}"] = message or "pass"
+    out["ok"] = not any(failures.values())
+    return out
+
+
+def _groups(units, metas: dict, batch: int):
+    """Pack consecutive units into groups of at most `batch` calls."""
+    group, size = [], 0
+    for pool, block in units:
+        cost = 6 + 2 * len(metas[pool].coins)
+        if group and size + cost > batch:
+            yield group
+            group, size = [], 0
+        group.append((pool, block))
+        size += cost
+    if group:
+        yield group
+
+
+async def scan(url: str, pools: Sequence[str], blocks: range, out_dir: str, concurrency: int = DEFAULT_CONCURRENCY,
+               batch: int = DEFAULT_BATCH, fmt: str = "auto", rows_per_part: int = ROWS_PER_PART) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(out_dir, "checkpoint.txt"))
+    writer = PartWriter(out_dir, checkpoint, fmt, rows_per_part)
+    stats = {"units": 0, "skipped": 0, "failed": 0, "violations": 0, "errors": 0}
+    started = time.perf_counter()
+
+    async with AsyncRpc(url, concurrency) as rpc:
+        metas = {}
+        for address in pools:
+            meta = await load_pool(rpc, address, blocks[-1])
+            metas[meta.address] = meta
+        todo = []
+        for pool in metas:
+            for block in blocks:
+                if (pool, block) in checkpoint:
+                    stats["skipped"] += 1
+                else:
+                    todo.append((pool, block))
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2 * concurrency)
+
+        async def producer():
+            for group in _groups(todo, metas, batch):
+                await queue.put(group)
+            for _ in range(concurrency):
+                await queue.put(None)
+
+        async def worker():
+            while (group := await queue.get()) is not None:
+                requests = []
+                for pool, block in group:
+                    meta = metas[pool]
+                    requests += snapshot_requests(meta.address, meta.lp_token, meta.coins, block)
+                try:
+                    results = await rpc.batch(requests)
+                except TransportError as e:
+                    stats["failed"] += len(group)
+                    print(f"scanner: {e}", file=sys.stderr, flush=True)
+                    continue
+                offset = 0
+                for pool, block in group:
+                    meta = metas[pool]
+                    n = 6 + 2 * len(meta.coins)
+                    r = row(meta, block, results[offset : offset + n])
+                    offset += n
+                    stats["units"] += 1
+                    stats["errors"] += r["error"] is not None
+                    stats["violations"] += r["error"] is None and not r["ok"]
+                    writer.add((pool, block), [r])
+
+        await asyncio.gather(producer(), *(worker() for _ in range(concurrency)))
+        writer.close_part()
+        stats.update(rpc.stats)
+
+    stats["rows"] = writer.written
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def read_rows(out_dir: str) -> List[dict]:
+    """Every row written to `out_dir`, in part order."""
+    rows = []
+    for path in sorted(glob.glob(os.path.join(out_dir, "part-*"))):
+        if path.endswith(".parquet"):
+            rows += pq.read_table(path).to_pylist()
+        elif path.endswith(".csv"):
+            with open(path, newline="") as f:
+                for r in csv.DictReader(f):
+                    r["block"], r["n_coins"] = int(r["block"]), int(r["n_coins"])
+                    r["ok"] = r["ok"] == "True"
+                    rows.append({k: (None if v == "" else v) for k, v in r.items()})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc", default=os.environ.get("FUZZ_RPC_URL") or os.environ.get("ETH_RPC_URL"))
+    parser.add_argument("--pool", action="append", default=[], help="repeat for several pools (default: $POOL_ADDR)")
+    parser.add_argument("--blocks", required=True, help="START:END[:STEP], END inclusive")
+    parser.add_argument("--out", default=os.path.join(os.getcwd(), "scans", "latest"))
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH)
+    parser.add_argument("--format", choices=("auto", "parquet", "csv"), default="auto")
+    parser.add_argument("--rows-per-part", type=int, default=ROWS_PER_PART)
+    args = parser.parse_args()
+
+    pools = args.pool or ([os.environ["POOL_ADDR"]] if os.environ.get("POOL_ADDR") else [])
+    if not pools or not args.rpc:
+        sys.exit("need --pool (or POOL_ADDR) and --rpc (or FUZZ_RPC_URL / ETH_RPC_URL)")
+    stats = asyncio.run(scan(args.rpc, pools, parse_blocks(args.blocks), args.out, args.concurrency, args.batch,
+                             args.format, args.rows_per_part))
+    rate = stats["units"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(f"scanner: {stats} ({rate:.0f} pool-blocks/s) -> {args.out}")
+    sys.exit(1 if stats["violations"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+# fuzz/scripts/add_liquidity_batch.py
+"""
+Batch mode for scripts/add_liquidity_correct.py: provision every pool in a manifest
+in one pass against a local fork (or any node that holds the sender's key).
+
+The manifest is a JSON list; amounts are whole coins, scaled by each coin's
+decimals (ETH legs count as 18), and slippage defaults to 1% as in the single-pool
+script:
+
+    [{"pool": "0xDC24316b9AE028F1497c275EB9192a3Ea0f67022", "amounts": [0.5, 0.5]},
+     {"pool": "0xbEbc44782C7dB0a1A60Cb6fe97d0b483032FF1C7", "amounts": [100, 100, 0], "slippage": 0.005}]
+
+Instead of a call per value the pass is five rounds, each one batched request or
+one mined block:
+
+  1. coins and LP token of every pool
+  2. decimals and symbol of every coin, the sender's balances, its allowance to
+     every pool and its LP balance
+  3. calc_token_amount(amounts, True) for every entry (calc_token_amount(amounts)
+     on pools without the flag); the minimum mint is that less the slippage
+  4. approvals where the allowance falls short, mined together
+  5. every add_liquidity, mined together, then the LP balances again
+
+Transactions go through tx_pipeline.py (local nonces, manual mining), and the
+add_liquidity overload (receiver / use_eth extras) comes from signatures.py, so
+nothing is tried and retried. An entry the sender cannot fund, or with a coin whose
+decimals cannot be read, is skipped, not sent.
+
+usage: add_liquidity_batch.py MANIFEST [--rpc URL] [--sender ADDR] [--gas N] [--json OUT]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Optional
+
+from eth_abi import decode as abi_decode
+from web3 import HTTPProvider, Web3
+
+FUZZ_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, FUZZ_DIR)
+from pool_state import coins_requests, holding, is_eth, lp_token_requests, parse_coins, parse_lp_token  # noqa: E402
+from rpc import RpcCounter, batch_request, calldata, eth_call, to_bytes, to_int  # noqa: E402
+from signatures import PoolSignatures  # noqa: E402
+from tx_pipeline import DEFAULT_GAS, TxPipeline  # noqa: E402
+
+with open(os.path.join(FUZZ_DIR, "abi.json")) as f:
+    POOL_ABI = json.load(f)
+APPROVE_ABI = [{"name": "approve", "type": "function", "stateMutability": "nonpayable",
+                "inputs": [{"name": "s", "type": "address"}, {"name": "a", "type": "uint256"}],
+                "outputs": [{"type": "bool"}]}]
+DEFAULT_SLIPPAGE = 0.01
+
+
+@dataclass
+class Entry:
+    pool: str
+    human: list
+    slippage: float = DEFAULT_SLIPPAGE
+    amounts: list = field(default_factory=list)
+    expected: Optional[int] = None  # calc_token_amount, if the pool has one and it did not revert
+    min_mint: int = 0
+    status: str = "pending"
+    gas: int = 0
+
+
+@dataclass
+class Pool:
+    address: str
+    coins: tuple = ()
+    lp_token: Optional[str] = None
+    symbols: list = field(default_factory=list)
+    lp_before: int = 0
+    lp_after: int = 0
+    approvals: int = 0
+    approve_gas: int = 0
+
+
+def load_manifest(path: str) -> list:
+    with open(path) as f:
+        raw = json.load(f)
+    return [Entry(Web3.to_checksum_address(e["pool"]), list(e["amounts"]), e.get("slippage", DEFAULT_SLIPPAGE))
+            for e in raw]
+
+
+def decode_symbol(raw) -> Optional[str]:
+    # string on most tokens, bytes32 on a few old ones (MKR, SAI)
+    data = to_bytes(raw)
+    if not data:
+        return None
+    try:
+        return abi_decode(["string"], data)[0]
+    except Exception:
+        return data[:32].rstrip(b"\0").decode(errors="replace") or None
+
+
+def scale(human, decimals: int) -> int:
+    # through the decimal string, so 0.1 USDC is 100000 and not 100000.00000000001 truncated
+    return int(Decimal(str(human)).scaleb(decimals))
+
+
+def less_slippage(amount: int, slippage) -> int:
+    # the kept fraction as an exact ratio, so an 18-decimal amount never passes through a float
+    kept, whole = (1 - Decimal(str(slippage))).as_integer_ratio()
+    return amount * kept // whole
+
+
+def provision(w3: Web3, sender: str, entries: list, counter: Optional[RpcCounter] = None,
+              gas: int = DEFAULT_GAS) -> list:
+    """Run the five rounds for `entries` (updated in place); return one summary row per pool."""
+    sender = Web3.to_checksum_address(sender)
+    pools = {e.pool: Pool(e.pool) for e in entries}
+
+    # 1. coins and LP token
+    requests = []
+    for p in pools.values():
+        requests += coins_requests(p.address, None) + lp_token_requests(p.address, None)
+    results = batch_request(w3, requests, counter)
+    per_pool = len(requests) // len(pools)
+    for k, p in enumerate(pools.values()):
+        chunk = results[k * per_pool : (k + 1) * per_pool]
+        p.coins, p.lp_token = parse_coins(chunk[:-2]), parse_lp_token(p.address, chunk[-2:])
+    for e in entries:
+        n = len(pools[e.pool].coins)
+        if n != len(e.human):
+            e.status = f"skipped: {len(e.human)} amounts for {n} coins"
+
+    # 2. metadata, balances, allowances, LP balances
+    tokens = sorted({c for p in pools.values() for c in p.coins if not is_eth(c)})
+    coins = sorted({c for p in pools.values() for c in p.coins})
+    allowances = [(p.address, c) for p in pools.values() for c in p.coins if not is_eth(c)]
+    requests = [eth_call(t, calldata("decimals()")) for t in tokens]
+    requests += [eth_call(t, calldata("symbol()")) for t in tokens]
+    requests += [holding(c, sender, None) for c in coins]
+    requests += [eth_call(c, calldata("allowance(address,address)", sender, pool)) for pool, c in allowances]
+    requests += [eth_call(p.lp_token, calldata("balanceOf(address)", sender)) for p in pools.values()]
+    results = iter(batch_request(w3, requests, counter))
+    decimals = {t: to_int(next(results)) for t in tokens}  # None: unreadable, never guessed
+    symbols = {t: decode_symbol(next(results)) or t[:8] for t in tokens}
+    balance = {c: to_int(next(results)) or 0 for c in coins}
+    allowance = {key: to_int(next(results)) or 0 for key in allowances}
+    for p in pools.values():
+        p.lp_before = to_int(next(results)) or 0
+        p.symbols = ["ETH" if is_eth(c) else symbols[c] for c in p.coins]
+
+    for e in entries:
+        unknown = [symbols[c] for c in pools[e.pool].coins if not is_eth(c) and decimals[c] is None]
+        if e.status == "pending" and unknown:
+            e.status = "skipped: cannot read decimals of " + ", ".join(unknown)
+
+    active = [e for e in entries if e.status == "pending"]
+    for e in active:
+        e.amounts = [scale(h, 18 if is_eth(c) else decimals[c]) for h, c in zip(e.human, pools[e.pool].coins)]
+        short = [c for c, a in zip(pools[e.pool].coins, e.amounts) if a > balance[c]]
+        if short:
+            e.status = "skipped: sender holds too little " + ", ".join(
+                "ETH" if is_eth(c) else symbols[c] for c in short)
+            continue
+        for c, a in zip(pools[e.pool].coins, e.amounts):
+            balance[c] -= a
+    active = [e for e in active if e.status == "pending"]
+
+    # 3. dry run: both calc_token_amount forms in one batch, first answer wins
+    requests = []
+    for e in active:
+        n = len(e.amounts)
+        requests.append(eth_call(e.pool, calldata(f"calc_token_amount(uint256[{n}],bool)", e.amounts, True), sender=sender))
+        requests.append(eth_call(e.pool, calldata(f"calc_token_amount(uint256[{n}])", e.amounts), sender=sender))
+    results = batch_request(w3, requests, counter)
+    for k, e in enumerate(active):
+        e.expected = next((to_int(r) for r in results[2 * k : 2 * k + 2] if to_int(r) is not None), None)
+        e.min_mint = less_slippage(e.expected, e.slippage) if e.expected else 0
+
+    txs = TxPipeline(w3, counter=counter, gas=gas)
+    txs.enable_manual_mining()
+    try:
+        # 4. approvals, summed over the entries that share a pool
+        need = {}
+        for e in active:
+            for c, a in zip(pools[e.pool].coins, e.amounts):
+                if not is_eth(c) and a:
+                    need[(e.pool, c)] = need.get((e.pool, c), 0) + a
+        for (pool, c), amount in need.items():
+            if allowance[(pool, c)] >= amount:
+                continue
+            approve = w3.eth.contract(address=c, abi=APPROVE_ABI).functions.approve
+            if allowance[(pool, c)]:
+                # USDT-style tokens refuse to move a nonzero allowance to another nonzero value
+                txs.submit(approve(pool, 0), {"from": sender}, f"approve0:{pool}:{c}", check=False)
+            txs.submit(approve(pool, amount), {"from": sender}, f"approve:{pool}:{c}", check=False)
+        failed = set()
+        for o in txs.flush(check=False):
+            pool = o.tag.split(":")[1]
+            pools[pool].approvals += 1
+            pools[pool].approve_gas += o.gas_used
+            if o.reverted:
+                failed.add(pool)
+        for e in active:
+            if e.pool in failed:
+                e.status = "skipped: approve reverted"
+        active = [e for e in active if e.status == "pending"]
+
+        # 5. add_liquidity
+        sigs = {pool: PoolSignatures(w3, pool, POOL_ABI, len(pools[pool].coins)) for pool in {e.pool for e in active}}
+        for k, e in enumerate(entries):
+            if e.status != "pending":
+                continue
+            if not sigs[e.pool].has("add_liquidity"):
+                e.status = "skipped: no known add_liquidity overload"
+                continue
+            value = sum(a for c, a in zip(pools[e.pool].coins, e.amounts) if is_eth(c))
+            fn = sigs[e.pool].bind("add_liquidity", e.amounts, e.min_mint, receiver=sender, use_eth=value > 0)
+            txs.submit(fn, {"from": sender, "value": value}, str(k), check=False)
+        for o in txs.flush(check=False):
+            e = entries[int(o.tag)]
+            e.gas = o.gas_used
+            if o.reverted:
+                reason = txs.revert_reason(o.tx_hash)
+                e.status = f"reverted: {reason}" if reason else "reverted"
+            else:
+                e.status = "ok"
+    finally:
+        txs.restore_automine()
+
+    results = iter(batch_request(w3, [eth_call(p.lp_token, calldata("balanceOf(address)", sender))
+                                      for p in pools.values()], counter))
+    for p in pools.values():
+        p.lp_after = to_int(next(results)) or 0
+    return summary_rows(pools, entries)
+
+
+def summary_rows(pools: dict, entries: list) -> list:
+    rows = []
+    for p in pools.values():
+        mine = [e for e in entries if e.pool == p.address]
+        rows.append({
+            "pool": p.address,
+            "coins": "/".join(p.symbols),
+            "entries": len(mine),
+            "ok": sum(e.status == "ok" for e in mine),
+            "approvals": p.approvals,
+            "approve_gas": p.approve_gas,
+            "add_liquidity_gas": sum(e.gas for e in mine),
+            "expected_lp": sum(e.expected or 0 for e in mine if e.status == "ok"),
+            "minted_lp": p.lp_after - p.lp_before,
+            "status": "; ".join(dict.fromkeys(e.status for e in mine)),
+        })
+    return rows
+
+
+def format_summary(rows: list) -> str:
+    out = [f"{'pool':<44}{'coins':<20}{'ok':>6}{'approve gas':>13}{'add gas':>11}{'minted LP':>28}  status"]
+    for r in rows:
+        out.append(f"{r['pool']:<44}{r['coins'][:19]:<20}{r['ok']:>3}/{r['entries']:<2}{r['approve_gas']:>13}"
+                   f"{r['add_liquidity_gas']:>11}{r['minted_lp']:>28}  {r['status']}")
+    return "\n".join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest")
+    parser.add_argument("--rpc", default=os.environ.get("FUZZ_RPC_URL", "http://127.0.0.1:8545"))
+    parser.add_argument("--sender", help="an account the node signs for (default: its first)")
+    parser.add_argument("--gas", type=int, default=DEFAULT_GAS, help="gas limit per transaction")
+    parser.add_argument("--json", help="also write the summary rows here")
+    args = parser.parse_args()
+
+    w3 = Web3(HTTPProvider(args.rpc))
+    counter = RpcCounter().install(w3)
+    entries = load_manifest(args.manifest)
+    started = time.time()
+    rows = provision(w3, args.sender or w3.eth.accounts[0], entries, counter, args.gas)
+    print(format_summary(rows))
+    print(f"{len(entries)} entries over {len(rows)} pools in {time.time() - started:.1f}s; "
+          f"{counter.calls} rpc calls in {counter.round_trips} round trips")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+    sys.exit(0 if all(e.status == "ok" for e in entries) else 1)
+
+
+if __name__ == "__main__":
+    main()
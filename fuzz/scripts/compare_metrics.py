@@ -0,0 +1,77 @@
+# fuzz/scripts/compare_metrics.py
+"""
+Compare two fuzz metrics reports (fuzz_metrics/run-*.json) side by side.
+
+usage: compare_metrics.py BASELINE.json CANDIDATE.json
+"""
+import json
+import sys
+
+
+def per_step(stats: dict, key: str) -> float:
+    return stats[key] / stats["steps"] if stats["steps"] else 0.0
+
+
+ROWS = [
+    ("steps", lambda s: s["steps"]),
+    ("ms/step", lambda s: s["mean_ms"]),
+    ("rpc/step", lambda s: sum(s["rpc"].values()) / s["steps"] if s["steps"] else 0.0),
+    ("gas/step", lambda s: per_step(s, "gas_used")),
+    ("revert rate", lambda s: s["revert_rate"]),
+    ("skipped", lambda s: s["skipped"]),
+    ("precond ms", lambda s: 1000 * s["precondition_seconds"] / s["precondition_calls"] if s["precondition_calls"] else 0.0),
+]
+
+
+def fmt(value) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return f"{value:.3f}" if abs(value) < 10 else f"{value:.1f}"
+
+
+def delta(a, b) -> str:
+    if not a:
+        return "" if not b else "new"
+    return f"{100 * (b - a) / a:+.1f}%"
+
+
+def row(label: str, a, b) -> str:
+    return f"  {label:<32}{fmt(a):>14}{fmt(b):>14}{delta(a, b):>10}"
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit(__doc__.strip())
+    with open(sys.argv[1]) as f:
+        a = json.load(f)
+    with open(sys.argv[2]) as f:
+        b = json.load(f)
+
+    print(f"  {'':<32}{'baseline':>14}{'candidate':>14}{'delta':>10}")
+    for key in ("steps_per_second", "steps", "examples", "elapsed_seconds"):
+        print(row(key, a[key], b[key]))
+
+    empty = {"steps": 0, "mean_ms": 0.0, "rpc": {}, "gas_used": 0, "revert_rate": 0.0, "skipped": 0,
+             "precondition_seconds": 0.0, "precondition_calls": 0}
+    for rule in sorted(set(a["rules"]) | set(b["rules"])):
+        ra, rb = a["rules"].get(rule, empty), b["rules"].get(rule, empty)
+        print(f"{rule}")
+        for label, get in ROWS:
+            print(row(label, get(ra), get(rb)))
+        for method in sorted(set(ra["rpc"]) | set(rb["rpc"])):
+            print(row(f"  {method}", ra["rpc"].get(method, 0), rb["rpc"].get(method, 0)))
+
+    if "coverage" in a or "coverage" in b:
+        print(f"coverage ({a.get('coverage', {}).get('mode', '-')} vs {b.get('coverage', {}).get('mode', '-')})")
+        for key in ("branches", "states", "new_branches", "new_states", "branches_per_cpu_minute", "states_per_cpu_minute"):
+            print(row(key, a.get("coverage", {}).get(key, 0), b.get("coverage", {}).get(key, 0)))
+
+    print("invariants (ms/check)")
+    for name in sorted(set(a["invariants"]) | set(b["invariants"])):
+        ia, ib = a["invariants"].get(name), b["invariants"].get(name)
+        ms = lambda s: 1000 * s["seconds"] / s["calls"] if s and s["calls"] else 0.0  # noqa: E731
+        print(row(name, ms(ia), ms(ib)))
+
+
+if __name__ == "__main__":
+    main()
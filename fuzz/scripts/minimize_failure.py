@@ -1,16 +1,266 @@
 # fuzz/scripts/minimize_failure.py
-import json, os, subprocess, sys
+"""
+Shrink a recorded failure to a minimal rule sequence and write a reproducer.
 
-FAIL_DIR = os.path.join(os.getcwd(), "fuzz_failures")
-if len(sys.argv) < 2:
-    print("usage: minimize_failure.py fail_file.json")
-    sys.exit(2)
+The failure record's "trace" holds every rule the example ran, starting from the
+funded baseline. Each attempt builds a fresh CurveStateMachine, which reverts the
+node to that baseline snapshot (no restart, no re-seeding), replays a candidate
+subsequence with invariants checked after every step, and counts as "still failing"
+when it dies in the rule/invariant the record names with the error type it names.
+Only an error raised by a rule body or an invariant counts; a step whose rule has
+gone or takes other parameters stops the script, and a step whose preconditions do
+not hold makes the candidate a non-failing one. Candidates are chosen by delta
+debugging (ddmin).
 
-fname = sys.argv[1]
-with open(fname) as f:
-    fail = json.load(f)
+Run from fuzz/ against the same node (or FUZZ_BACKEND) the failure came from,
+naming a signature in the failure store (a prefix from `failures.py list` will do)
+or a record saved as JSON:
 
-print("Failure:", fail)
-# For now we just print the failure and leave it for manual reduction.
-# You can extend this to run Hypothesis with specific seeds or to
-# rewrite the state machine to only run the failing trace.
+    python scripts/minimize_failure.py fuzz_failures/failures.sqlite 3f2a9c
+    python scripts/minimize_failure.py fuzz_failures/fail_exchange_1.json
+
+Records carry the trace format version of the state machine that wrote them
+(TRACE_VERSION); a record from another version, or from before versions were
+stored (every old fail_*.json file), is refused since its steps would replay with
+different meanings.
+
+A fresh process seeds the actors into whatever state the node is in, so on a fork
+the node is first reset to the record's fork block (anvil_reset). The funded
+baseline the replay then starts from must sit at the record's baseline block; if
+the node cannot be reset or the baseline lands elsewhere, the script stops rather
+than minimize against a different chain.
+"""
+import json
+import os
+import sys
+import time
+
+from hypothesis.stateful import RULE_MARKER
+
+FUZZ_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.join(FUZZ_DIR, "tests")
+sys.path.insert(0, FUZZ_DIR)
+from anvil import fork_block, reset_fork  # noqa: E402
+from failures import FailureStore  # noqa: E402
+
+
+def load_failure(argv: list) -> tuple:
+    """(record, reproducer path) for `store.sqlite SIG` or `fail_file.json`."""
+    source = os.path.abspath(argv[0])
+    if source.endswith(".json"):
+        with open(source) as f:
+            record = json.load(f)
+        name = os.path.basename(source)[len("fail_"):-len(".json")]
+    else:
+        store = FailureStore(source)
+        sig = store.resolve(argv[1])
+        record = store.example(sig)
+        store.close()
+        name = f"{record['name']}_{sig[:12]}"
+    return record, os.path.join(os.path.dirname(source), f"repro_{name}.py")
+
+
+def load_machine(backend: str):
+    # the backend is read when the test module is imported
+    os.environ.setdefault("FUZZ_BACKEND", backend)
+    sys.path.insert(0, TESTS_DIR)
+    from test_curve_stateful_fuzz import CurveStateMachine
+
+    CurveStateMachine.record_failures = False
+    return CurveStateMachine
+
+
+def pin_fork(machine_cls, record: dict):
+    """Put a fork node back at the record's fork block before the session seeds it; exit on a mismatch."""
+    want = record.get("fork_block")
+    if record.get("backend", "fork") != "fork":
+        return
+    if want is None:
+        print("warning: the record has no fork block; replaying against the node as it is")
+        return
+    w3 = sys.modules[machine_cls.__module__]._get_web3()
+    have = fork_block(w3)
+    if have != want:
+        sys.exit(f"the node is forked at block {have}, the failure at {want}: "
+                 f"start anvil with --fork-block-number {want}")
+    if not reset_fork(w3, want):
+        sys.exit(f"could not reset the node to a fresh fork of block {want} (anvil_reset refused)")
+
+
+def check_baseline(machine_cls, record: dict):
+    """After the first replay: the funded baseline must be the one the failure started from."""
+    want = record.get("baseline_block")
+    have = sys.modules[machine_cls.__module__].pool_session().baseline_block
+    if want is not None and have != want:
+        sys.exit(f"the replay's funded baseline is at block {have}, the failure's at {want}; "
+                 "the node is not in the state the failure came from")
+
+
+def check_version(machine_cls, record: dict):
+    """Exit unless the record's trace was written by this version of the state machine."""
+    want = sys.modules[machine_cls.__module__].TRACE_VERSION
+    have = record.get("trace_version")
+    if have != want:
+        written = f"format {have}" if have is not None else "no format version (written before versions)"
+        sys.exit(f"the record's trace has {written}, this state machine replays format {want}: rule parameters "
+                 "have changed since, so re-run the fuzzer to record the failure again")
+
+
+def invariant_names(machine_cls) -> list:
+    return sorted(name for name in dir(machine_cls) if getattr(getattr(machine_cls, name), "is_invariant", False))
+
+
+def rules(machine_cls) -> dict:
+    """Rule name -> its Hypothesis rule (argument strategies and preconditions)."""
+    found = {}
+    for name in dir(machine_cls):
+        rule = getattr(getattr(machine_cls, name), RULE_MARKER, None)
+        if rule is not None:
+            found[name] = rule
+    return found
+
+
+class Replayer:
+    def __init__(self, machine_cls):
+        self.machine_cls = machine_cls
+        self.invariants = invariant_names(machine_cls)
+        self.rules = rules(machine_cls)
+        self.runs = 0
+
+    def validate(self, trace: list):
+        """Exit unless every step names a rule of this machine and passes exactly that rule's parameters."""
+        for n, step in enumerate(trace):
+            rule = self.rules.get(step["rule"])
+            if rule is None:
+                sys.exit(f"trace does not match this state machine: step {n} calls {step['rule']}, which is not a rule")
+            if set(step["params"]) != set(rule.arguments):
+                sys.exit(f"trace does not match this state machine: step {n} calls {step['rule']}"
+                         f"({', '.join(sorted(step['params']))}), the rule takes ({', '.join(sorted(rule.arguments))})")
+
+    def run(self, trace: list):
+        """
+        Replay `trace` from the baseline; return (where, error type) of the first error a rule
+        body or an invariant raised, or None when the trace runs clean or reaches a step whose
+        preconditions do not hold (Hypothesis could not have run it). Errors setting the
+        machine up are not failures of the trace and propagate.
+        """
+        self.validate(trace)
+        self.runs += 1
+        machine = self.machine_cls()  # reverts to the funded baseline
+        try:
+            machine.init_state()
+            self._check(machine)
+            for step in trace:
+                if not all(p(machine) for p in self.rules[step["rule"]].preconditions):
+                    return None
+                try:
+                    getattr(machine, step["rule"])(**step["params"])
+                except Exception as e:
+                    return step["rule"], type(e).__name__
+                self._check(machine)
+        except InvariantFailed as e:
+            return e.name, e.error
+        finally:
+            machine.teardown()
+        return None
+
+    def _check(self, machine):
+        for name in self.invariants:
+            try:
+                getattr(machine, name)()
+            except Exception as e:
+                raise InvariantFailed(name, type(e).__name__) from e
+
+
+class InvariantFailed(Exception):
+    def __init__(self, name: str, error: str):
+        super().__init__(f"{name}: {error}")
+        self.name, self.error = name, error
+
+
+def ddmin(steps: list, fails) -> list:
+    """Zeller's ddmin: a 1-minimal subsequence of `steps` for which fails(subsequence) holds."""
+    n = 2
+    while len(steps) >= 2:
+        chunk = -(-len(steps) // n)
+        subsets = [steps[i : i + chunk] for i in range(0, len(steps), chunk)]
+        complements = [[s for j, other in enumerate(subsets) if j != i for s in other] for i in range(len(subsets))]
+        reduced = next((subset for subset in subsets if fails(subset)), None)
+        if reduced is not None:
+            steps, n = reduced, 2
+            continue
+        reduced = next((c for c in complements if fails(c)), None) if n > 2 else None
+        if reduced is not None:
+            steps, n = reduced, max(n - 1, 2)
+            continue
+        if n >= len(steps):
+            break
+        n = min(n * 2, len(steps))
+    return steps
+
+
+def write_reproducer(path: str, source: str, backend: str, trace: list, invariants: list):
+    tests_rel = os.path.relpath(TESTS_DIR, os.path.dirname(path))
+    lines = [
+        f"# Minimal reproducer generated by scripts/minimize_failure.py from {os.path.basename(source)}",
+        "# Run from fuzz/ against the same node or backend: python " + os.path.relpath(path),
+        "import os",
+        "import sys",
+        "",
+        f"os.environ.setdefault(\"FUZZ_BACKEND\", \"{backend}\")",
+        f"sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), \"{tests_rel}\"))",
+        "from test_curve_stateful_fuzz import CurveStateMachine",
+        "",
+        "state = CurveStateMachine()",
+        "state.init_state()",
+    ]
+    checks = [f"state.{name}()" for name in invariants]
+    lines += checks
+    for step in trace:
+        args = ", ".join(f"{k}={v!r}" for k, v in step["params"].items())
+        lines.append(f"state.{step['rule']}({args})")
+        lines += checks
+    lines.append("state.teardown()")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main():
+    if len(sys.argv) < 2 or (not sys.argv[1].endswith(".json") and len(sys.argv) < 3):
+        print("usage: minimize_failure.py failures.sqlite SIG | fail_file.json")
+        sys.exit(2)
+
+    fname = " ".join(sys.argv[1:3])
+    fail, out = load_failure(sys.argv[1:])
+
+    trace = fail.get("trace")
+    backend = fail.get("backend", "fork")
+
+    started = time.time()
+    machine_cls = load_machine(backend)
+    check_version(machine_cls, fail)
+    replayer = Replayer(machine_cls)
+    replayer.validate(trace)
+    pin_fork(machine_cls, fail)
+    # the failure the record names, so ddmin cannot drift to another bug the trace also hits
+    target = fail["name"], fail["error"]
+    failed = replayer.run(trace)
+    check_baseline(machine_cls, fail)
+    if failed is None:
+        sys.exit(f"{fname}: the recorded trace ({len(trace)} steps) no longer fails; nothing to minimize")
+    if failed != target:
+        sys.exit(f"{fname}: the trace now fails with {failed[1]} in {failed[0]}, the record with "
+                 f"{target[1]} in {target[0]}; not minimizing toward a different failure")
+    print(f"reproduced: {target[1]} in {target[0]} after {len(trace)} steps")
+
+    minimal = ddmin(trace, lambda candidate: replayer.run(candidate) == target)
+    print(f"minimized {len(trace)} -> {len(minimal)} steps in {replayer.runs} replays, {time.time() - started:.1f}s")
+    for step in minimal:
+        print(f"  {step['rule']}({', '.join(f'{k}={v!r}' for k, v in step['params'].items())})")
+
+    write_reproducer(out, fname, backend, minimal, replayer.invariants)
+    print(f"reproducer: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# fuzz/scripts/run_sharded.py
+"""
+Run the Curve state machine on N workers at once, each against its own chain.
+
+For every worker this starts an anvil fork on its own port (all pinned to the same
+fork block so shards are comparable), then runs pytest in a separate process with
+FUZZ_RPC_URL pointing at that node and its own FUZZ_SEED (see shard_seed.py). With
+FUZZ_BACKEND=local no nodes are started: each worker already has a private
+in-process chain.
+
+All workers run from fuzz/, so they share one .hypothesis/ example database and one
+failure store (fuzz_failures/failures.sqlite). Both are safe to share: Hypothesis
+writes one file per example via an atomic rename, and the store serializes its
+deduplicating upserts with SQLite transactions.
+
+Seeds are drawn at random unless --seed is given, and every worker logs its seed;
+`FUZZ_SEED=<seed> pytest -p shard_seed tests/test_curve_stateful_fuzz.py` from fuzz/
+repeats that worker's run.
+
+usage: run_sharded.py [-n WORKERS] [--base-port 8545] [--seed N] [--rounds 1]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+
+from web3 import HTTPProvider, Web3
+
+FUZZ_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, FUZZ_DIR)
+from anvil import start_anvil, wait_for_node  # noqa: E402
+from failures import FailureStore, store_path  # noqa: E402
+
+LOG_DIR = os.path.join(FUZZ_DIR, "logs")
+FAIL_STORE = store_path(os.path.join(FUZZ_DIR, "fuzz_failures"))
+TEST = os.path.join("tests", "test_curve_stateful_fuzz.py")
+
+
+def worker_command(test: str = TEST) -> list:
+    # no --hypothesis-seed: a forced seed would switch off the shared example database
+    return [sys.executable, "-m", "pytest", "-q", test, "-p", "shard_seed", "-p", "no:cacheprovider"]
+
+
+def run_worker(shard: int, seed: int, rpc_url: str) -> subprocess.Popen:
+    env = dict(os.environ, FUZZ_SHARD=str(shard), FUZZ_SEED=str(seed))
+    if rpc_url:
+        env["FUZZ_RPC_URL"] = rpc_url
+    log = open(os.path.join(LOG_DIR, f"shard-{shard}.log"), "a")
+    log.write(f"--- shard {shard} seed {seed} (reproduce: FUZZ_SEED={seed})\n")
+    log.flush()
+    return subprocess.Popen(
+        worker_command(),
+        cwd=FUZZ_DIR,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def count_failures() -> tuple:
+    """(failures, distinct signatures) in the failure store."""
+    if not os.path.exists(FAIL_STORE):
+        return 0, 0
+    store = FailureStore(FAIL_STORE)
+    try:
+        return store.total(), len(store)
+    finally:
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--base-port", type=int, default=8545)
+    parser.add_argument("--seed", type=int, default=None,
+                        help="worker k, round r uses seed + k * rounds + r (default: a random seed each)")
+    parser.add_argument("--rounds", type=int, default=1, help="pytest runs (seeds) per worker")
+    parser.add_argument("--fork-url", default=os.environ.get("ETH_RPC_URL"))
+    parser.add_argument("--fork-block", type=int, default=None, help="default: upstream head at start")
+    args = parser.parse_args()
+
+    local = os.environ.get("FUZZ_BACKEND", "fork").lower() == "local"
+    if not local and not args.fork_url:
+        sys.exit("ETH_RPC_URL (or --fork-url) is required unless FUZZ_BACKEND=local")
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    nodes, urls = [], [None] * args.workers
+    failures_before = count_failures()
+    started = time.time()
+    try:
+        if not local:
+            fork_block = args.fork_block or Web3(HTTPProvider(args.fork_url)).eth.block_number
+            print(f"starting {args.workers} anvil forks at block {fork_block}")
+            for k in range(args.workers):
+                port = args.base_port + k
+                nodes.append(start_anvil(port, args.fork_url, fork_block, os.path.join(LOG_DIR, f"anvil-{port}.log")))
+                urls[k] = f"http://127.0.0.1:{port}"
+            for url in urls:
+                wait_for_node(url)
+
+        exit_codes = {}
+        for r in range(args.rounds):
+            workers = {
+                k: run_worker(k, random.randrange(2**32) if args.seed is None else args.seed + k * args.rounds + r,
+                              urls[k])
+                for k in range(args.workers)
+            }
+            for k, proc in workers.items():
+                exit_codes.setdefault(k, []).append(proc.wait())
+    finally:
+        for node in nodes:
+            node.terminate()
+        for node in nodes:
+            node.wait()
+
+    elapsed = time.time() - started
+    for k, codes in sorted(exit_codes.items()):
+        status = "ok" if not any(codes) else f"failed ({sum(1 for c in codes if c)}/{len(codes)} runs)"
+        print(f"shard {k}: {status}  (log: logs/shard-{k}.log)")
+    failures, signatures = count_failures()
+    print(f"{args.workers} workers x {args.rounds} rounds in {elapsed:.1f}s; "
+          f"{failures - failures_before[0]} failures, {signatures - failures_before[1]} new signatures "
+          f"(python failures.py list)")
+    sys.exit(1 if any(any(c) for c in exit_codes.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
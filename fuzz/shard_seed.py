@@ -0,0 +1,35 @@
+# fuzz/shard_seed.py
+"""
+pytest plugin for run_sharded.py workers (`-p shard_seed`): FUZZ_SEED seeds the
+source Hypothesis draws each test's seed from.
+
+`--hypothesis-seed` would pin the run too, and so would @seed (the public API),
+but both turn the example database off (@seed sets database=None on the test), so
+shards would stop replaying each other's examples from the shared .hypothesis/.
+Seeding the source instead leaves Hypothesis on its normal path: saved examples
+first, then generation from a seed that FUZZ_SEED reproduces.
+
+That source is a private name. If an upgrade renames it the plugin stops the run
+instead of letting every shard fall back to an unseeded stream.
+"""
+import os
+from random import Random
+
+import hypothesis
+import pytest
+from hypothesis import core
+
+SOURCE = "_hypothesis_global_random"
+
+
+def pytest_configure(config):
+    seed = os.environ.get("FUZZ_SEED")
+    if not seed:
+        return
+    threadlocal = getattr(core, "threadlocal", None)
+    if threadlocal is None or not hasattr(threadlocal, SOURCE):
+        raise pytest.UsageError(
+            f"shard_seed: hypothesis {hypothesis.__version__} has no core.threadlocal.{SOURCE}, "
+            "so FUZZ_SEED cannot seed it; update shard_seed.py for this version"
+        )
+    setattr(threadlocal, SOURCE, Random(int(seed)))
@@ -0,0 +1,142 @@
+# fuzz/signatures.py
+"""
+Resolve which overload of each Curve entry point a pool implements, once per pool.
+
+Curve pools disagree on signatures: int128 vs uint256 coin indices, and optional
+trailing `receiver` / `use_eth` arguments. Instead of trying overloads until one
+stops reverting, `PoolSignatures` picks the first candidate whose 4-byte selector
+the pool's runtime bytecode pushes onto the stack, as its dispatcher does. The code
+is walked instruction by instruction, so selector bytes that happen to sit in push
+data or immutables are not mistaken for an entry point. The ABI it is given (often the shared
+fuzz/abi.json, written for one pool) only decides when the code shows none of the
+candidates, e.g. behind a proxy. The result is cached on disk under the keccak of
+that bytecode, the coin count and a hash of the ABI, so later sessions against the
+same code skip resolution entirely.
+"""
+import json
+import os
+from typing import Optional
+
+from web3 import Web3
+
+from rpc import selector
+
+CACHE_DIR = os.environ.get("FUZZ_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+# part of the cache file name; bump it when resolve() changes so entries it wrote before are not read back
+CACHE_VERSION = 2
+
+# In preference order. The first form of each matches how the fuzzer has always called
+# the pool; trailing extras are filled in by `PoolSignatures.bind`.
+CANDIDATES = {
+    "add_liquidity": [
+        "add_liquidity(uint256[{n}],uint256)",
+        "add_liquidity(uint256[{n}],uint256,address)",
+        "add_liquidity(uint256[{n}],uint256,bool)",
+    ],
+    "exchange": [
+        "exchange(int128,int128,uint256,uint256)",
+        "exchange(uint256,uint256,uint256,uint256)",
+        "exchange(int128,int128,uint256,uint256,address)",
+        "exchange(uint256,uint256,uint256,uint256,bool)",
+    ],
+    "remove_liquidity_one_coin": [
+        "remove_liquidity_one_coin(uint256,int128,uint256)",
+        "remove_liquidity_one_coin(uint256,uint256,uint256)",
+        "remove_liquidity_one_coin(uint256,int128,uint256,address)",
+        "remove_liquidity_one_coin(uint256,uint256,uint256,bool)",
+    ],
+}
+# number of arguments every variant shares; anything after is an extra
+BASE_ARGS = {"add_liquidity": 2, "exchange": 4, "remove_liquidity_one_coin": 3}
+PAYABLE = {"add_liquidity", "exchange"}
+
+
+def arg_types(signature: str) -> list:
+    inner = signature[signature.index("(") + 1 : -1]
+    return [t for t in inner.split(",") if t]
+
+
+def abi_signatures(abi: list) -> set:
+    return {
+        f"{f['name']}({','.join(i['type'] for i in f.get('inputs', []))})"
+        for f in abi
+        if f.get("type") == "function"
+    }
+
+
+def pushed_selectors(code: bytes) -> set:
+    """Values of every PUSH1..PUSH4 in `code` (compilers push a selector with leading zero bytes in fewer bytes)."""
+    pushed, pc = set(), 0
+    while pc < len(code):
+        op = code[pc]
+        width = op - 0x5F if 0x60 <= op <= 0x7F else 0
+        if 0 < width <= 4:
+            pushed.add(int.from_bytes(code[pc + 1 : pc + 1 + width], "big"))
+        pc += 1 + width  # skip push data
+    return pushed
+
+
+def resolve(abi: list, code: bytes, n_coins: int) -> dict:
+    """name -> resolved signature (or None) for every entry point in CANDIDATES."""
+    declared = abi_signatures(abi)
+    pushed = pushed_selectors(code)
+    resolved = {}
+    for name, templates in CANDIDATES.items():
+        candidates = [t.format(n=n_coins) for t in templates]
+        found = next((sig for sig in candidates if int.from_bytes(selector(sig), "big") in pushed), None)
+        if found is None:
+            found = next((sig for sig in candidates if sig in declared), None)
+        resolved[name] = found
+    return resolved
+
+
+class PoolSignatures:
+    def __init__(self, w3: Web3, pool_address: str, abi: list, n_coins: int, cache_dir: str = CACHE_DIR):
+        self.w3 = w3
+        self.pool_address = Web3.to_checksum_address(pool_address)
+        code = bytes(w3.eth.get_code(self.pool_address))
+        self.code_hash = Web3.keccak(code).hex()
+        abi_hash = Web3.keccak(text=json.dumps(abi, sort_keys=True)).hex().removeprefix("0x")[:16]
+        self.cache_path = os.path.join(cache_dir, "signatures", f"v{CACHE_VERSION}-{self.code_hash}-{n_coins}-{abi_hash}.json")
+
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path) as f:
+                self.resolved = json.load(f)
+            self.from_cache = True
+        else:
+            self.resolved = resolve(abi, code, n_coins)
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp = f"{self.cache_path}.{os.getpid()}"
+            with open(tmp, "w") as f:
+                json.dump(self.resolved, f, indent=2)
+            os.replace(tmp, self.cache_path)
+            self.from_cache = False
+        self._functions = {}
+
+    def has(self, name: str) -> bool:
+        return self.resolved.get(name) is not None
+
+    def function(self, name: str):
+        """web3 ContractFunction for the resolved overload of `name` (built once)."""
+        if name not in self._functions:
+            signature = self.resolved.get(name)
+            if signature is None:
+                raise LookupError(f"{name}: no known overload on pool {self.pool_address} (code {self.code_hash})")
+            fragment = {
+                "type": "function",
+                "name": name,
+                "inputs": [{"name": f"arg{i}", "type": t} for i, t in enumerate(arg_types(signature))],
+                "outputs": [],
+                "stateMutability": "payable" if name in PAYABLE else "nonpayable",
+            }
+            contract = self.w3.eth.contract(address=self.pool_address, abi=[fragment])
+            self._functions[name] = contract.functions[name]
+        return self._functions[name]
+
+    def bind(self, name: str, *args, receiver: Optional[str] = None, use_eth: bool = False):
+        """Call the resolved overload with the shared `args`, filling in a receiver / use_eth extra if it has one."""
+        types = arg_types(self.resolved[name]) if self.has(name) else []
+        extras = []
+        for t in types[BASE_ARGS[name] :]:
+            extras.append(receiver if t == "address" else use_eth)
+        return self.function(name)(*args, *extras)
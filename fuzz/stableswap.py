@@ -0,0 +1,261 @@
+# fuzz/stableswap.py
+"""
+Exact-integer model of a Curve v1 StableSwap pool (the math in contracts/StableSwap2.vy).
+
+Every operation follows the contract step by step with Python ints: floor division,
+the same Newton iterations and convergence tests, and checked subtraction. Where the
+contract would revert (underflow, division by zero, no convergence, a failed assert)
+the model raises `Revert`. Results therefore match the chain to the wei, which is what
+lets the fuzzer drop inputs that would certainly revert and compare every step's
+outcome against the chain.
+
+The `*_batch` functions score many candidate inputs against one pool state. D for
+the current balances, the expensive part, is computed once and shared. Only the
+per-input Newton solve for y is repeated. uint256 values do not fit numpy dtypes,
+so the batches are plain loops.
+"""
+from dataclasses import dataclass, replace
+from typing import List, Optional, Sequence, Tuple
+
+FEE_DENOMINATOR = 10**10
+PRECISION = 10**18
+A_PRECISION = 100
+MAX_ITER = 255
+
+
+class Revert(Exception):
+    """The pool would revert on this input."""
+
+
+def _sub(a: int, b: int, what: str = "underflow") -> int:
+    if b > a:
+        raise Revert(what)
+    return a - b
+
+
+def _div(a: int, b: int) -> int:
+    if b == 0:
+        raise Revert("division by zero")
+    return a // b
+
+
+def get_D(xp: Sequence[int], amp: int) -> int:
+    n = len(xp)
+    S = sum(xp)
+    if S == 0:
+        return 0
+    D = S
+    Ann = amp * n
+    for _ in range(MAX_ITER):
+        D_P = D
+        for x in xp:
+            D_P = _div(D_P * D, x * n)
+        Dprev = D
+        D = _div((Ann * S // A_PRECISION + D_P * n) * D, (Ann - A_PRECISION) * D // A_PRECISION + (n + 1) * D_P)
+        if abs(D - Dprev) <= 1:
+            return D
+    raise Revert("D did not converge")
+
+
+def _solve_y(c: int, b: int, D: int) -> int:
+    y = D
+    for _ in range(MAX_ITER):
+        y_prev = y
+        y = _div(y * y + c, _sub(2 * y + b, D))
+        if abs(y - y_prev) <= 1:
+            return y
+    raise Revert("y did not converge")
+
+
+def get_y(i: int, j: int, x: int, xp: Sequence[int], amp: int, D: Optional[int] = None) -> int:
+    """New xp balance of coin j once coin i's xp balance is x (D of `xp` may be passed in)."""
+    n = len(xp)
+    if i == j or not (0 <= i < n and 0 <= j < n):
+        raise Revert("bad coin index")
+    if D is None:
+        D = get_D(xp, amp)
+    Ann = amp * n
+    c = D
+    S_ = 0
+    for k in range(n):
+        if k == i:
+            _x = x
+        elif k != j:
+            _x = xp[k]
+        else:
+            continue
+        S_ += _x
+        c = _div(c * D, _x * n)
+    c = _div(c * D * A_PRECISION, Ann * n)
+    b = S_ + _div(D * A_PRECISION, Ann)
+    return _solve_y(c, b, D)
+
+
+def get_y_D(amp: int, i: int, xp: Sequence[int], D: int) -> int:
+    """xp balance of coin i that brings the invariant to D."""
+    n = len(xp)
+    if not 0 <= i < n:
+        raise Revert("bad coin index")
+    Ann = amp * n
+    c = D
+    S_ = 0
+    for k in range(n):
+        if k == i:
+            continue
+        S_ += xp[k]
+        c = _div(c * D, xp[k] * n)
+    c = _div(c * D * A_PRECISION, Ann * n)
+    b = S_ + _div(D * A_PRECISION, Ann)
+    return _solve_y(c, b, D)
+
+
+@dataclass(frozen=True)
+class StableSwapModel:
+    balances: Tuple[int, ...]  # native units, as stored by the pool
+    precision_mul: Tuple[int, ...]  # 10 ** (18 - decimals)
+    A_precise: int
+    fee: int
+    admin_fee: int
+    total_supply: int
+
+    @classmethod
+    def from_snapshot(cls, snapshot, decimals: Sequence[int]) -> "StableSwapModel":
+        """Model of the pool as seen in a pool_state.PoolSnapshot."""
+        return cls(
+            balances=tuple(snapshot.balances),
+            precision_mul=tuple(10 ** (18 - int(d)) for d in decimals),
+            A_precise=snapshot.A_precise,
+            fee=snapshot.fee,
+            admin_fee=snapshot.admin_fee,
+            total_supply=snapshot.lp_supply,
+        )
+
+    @property
+    def n_coins(self) -> int:
+        return len(self.balances)
+
+    def xp(self, balances: Optional[Sequence[int]] = None) -> List[int]:
+        return [b * m for b, m in zip(self.balances if balances is None else balances, self.precision_mul)]
+
+    @property
+    def D(self) -> int:
+        return get_D(self.xp(), self.A_precise)
+
+    # ----- views -----
+
+    def get_dy(self, i: int, j: int, dx: int) -> int:
+        return self._dy(i, j, dx, self.xp(), self.D)[0]
+
+    def _dy(self, i: int, j: int, dx: int, xp: List[int], D: int) -> Tuple[int, int]:
+        """(amount out in native units, fee in xp units), as StableSwap2._dy."""
+        x = xp[i] + dx * self.precision_mul[i]
+        y = get_y(i, j, x, xp, self.A_precise, D)
+        dy = _sub(_sub(xp[j], y), 1)
+        dy_fee = dy * self.fee // FEE_DENOMINATOR
+        return (dy - dy_fee) // self.precision_mul[j], dy_fee
+
+    def calc_token_amount(self, amounts: Sequence[int], is_deposit: bool) -> int:
+        D0 = self.D
+        if is_deposit:
+            balances = [b + a for b, a in zip(self.balances, amounts)]
+        else:
+            balances = [_sub(b, a) for b, a in zip(self.balances, amounts)]
+        D1 = get_D(self.xp(balances), self.A_precise)
+        diff = _sub(D1, D0) if is_deposit else _sub(D0, D1)
+        return _div(diff * self.total_supply, D0)
+
+    def calc_withdraw_one_coin(self, token_amount: int, i: int) -> int:
+        return self._withdraw_one(token_amount, i, self.xp(), self.D)[0]
+
+    def _withdraw_one(self, token_amount: int, i: int, xp: List[int], D0: int) -> Tuple[int, int]:
+        """(amount out, fee), both in native units, as StableSwap2._calc_withdraw_one_coin."""
+        amp = self.A_precise
+        D1 = _sub(D0, _div(token_amount * D0, self.total_supply))
+        new_y = get_y_D(amp, i, xp, D1)
+        base_fee = self.fee * self.n_coins // (4 * (self.n_coins - 1))
+        xp_reduced = list(xp)
+        for j in range(self.n_coins):
+            if j == i:
+                dx_expected = _sub(xp[j] * D1 // D0, new_y)
+            else:
+                dx_expected = _sub(xp[j], xp[j] * D1 // D0)
+            xp_reduced[j] = _sub(xp_reduced[j], base_fee * dx_expected // FEE_DENOMINATOR)
+        dy = _sub(xp_reduced[i], get_y_D(amp, i, xp_reduced, D1))
+        dy = _sub(dy, 1) // self.precision_mul[i]
+        dy_0 = _sub(xp[i], new_y) // self.precision_mul[i]
+        return dy, _sub(dy_0, dy)
+
+    # ----- state transitions: (result, model of the pool afterwards) -----
+
+    def add_liquidity(self, amounts: Sequence[int], min_mint_amount: int = 0) -> Tuple[int, "StableSwapModel"]:
+        amp = self.A_precise
+        old_balances = list(self.balances)
+        D0 = self.D
+        total_supply = self.total_supply
+        new_balances = list(old_balances)
+        for k in range(self.n_coins):
+            if total_supply == 0 and amounts[k] == 0:
+                raise Revert("initial deposit requires all coins")
+            new_balances[k] += amounts[k]
+        D1 = get_D(self.xp(new_balances), amp)
+        if D1 <= D0:
+            raise Revert("D1 <= D0")
+
+        if total_supply > 0:
+            stored = list(new_balances)
+            base_fee = self.fee * self.n_coins // (4 * (self.n_coins - 1))
+            for k in range(self.n_coins):
+                ideal_balance = D1 * old_balances[k] // D0
+                fee = base_fee * abs(ideal_balance - new_balances[k]) // FEE_DENOMINATOR
+                stored[k] = _sub(new_balances[k], fee * self.admin_fee // FEE_DENOMINATOR)
+                new_balances[k] = _sub(new_balances[k], fee)
+            D2 = get_D(self.xp(new_balances), amp)
+            mint_amount = total_supply * _sub(D2, D0) // D0
+        else:
+            stored = new_balances
+            mint_amount = D1
+        if mint_amount < min_mint_amount:
+            raise Revert("Slippage screwed you")
+        return mint_amount, replace(self, balances=tuple(stored), total_supply=total_supply + mint_amount)
+
+    def exchange(self, i: int, j: int, dx: int, min_dy: int = 0) -> Tuple[int, "StableSwapModel"]:
+        dy, dy_fee = self._dy(i, j, dx, self.xp(), self.D)
+        if dy < min_dy:
+            raise Revert("Exchange resulted in fewer coins than expected")
+        dy_admin_fee = dy_fee * self.admin_fee // FEE_DENOMINATOR // self.precision_mul[j]
+        balances = list(self.balances)
+        balances[i] += dx
+        balances[j] = _sub(balances[j], dy + dy_admin_fee)
+        return dy, replace(self, balances=tuple(balances))
+
+    def remove_liquidity_one_coin(self, token_amount: int, i: int, min_amount: int = 0) -> Tuple[int, "StableSwapModel"]:
+        dy, dy_fee = self._withdraw_one(token_amount, i, self.xp(), self.D)
+        if dy < min_amount:
+            raise Revert("Not enough coins removed")
+        balances = list(self.balances)
+        balances[i] = _sub(balances[i], dy + dy_fee * self.admin_fee // FEE_DENOMINATOR)
+        total_supply = _sub(self.total_supply, token_amount)
+        return dy, replace(self, balances=tuple(balances), total_supply=total_supply)
+
+    # ----- batched scoring: one shared D, then one solve per candidate -----
+
+    def get_dy_batch(self, i: int, j: int, dxs: Sequence[int]) -> List[Optional[int]]:
+        """get_dy for every dx; None where the pool would revert."""
+        xp, D = self.xp(), self.D
+        out = []
+        for dx in dxs:
+            try:
+                out.append(self._dy(i, j, dx, xp, D)[0])
+            except Revert:
+                out.append(None)
+        return out
+
+    def calc_withdraw_one_coin_batch(self, token_amounts: Sequence[int], i: int) -> List[Optional[int]]:
+        xp, D = self.xp(), self.D
+        out = []
+        for amount in token_amounts:
+            try:
+                out.append(self._withdraw_one(amount, i, xp, D)[0])
+            except Revert:
+                out.append(None)
+        return out
@@ -0,0 +1,89 @@
+# fuzz/tests/conftest.py
+"""
+FUZZ_PROXY=record|replay|passthrough runs the fork behind rpc_proxy.py.
+
+The session starts the proxy in-process, forks a private anvil from it at
+FUZZ_FORK_BLOCK and points the fuzzer at that node (FUZZ_RPC_URL). The store is
+.cache/rpc/mainnet-<block>.sqlite unless FUZZ_PROXY_STORE names one; replay needs
+no ETH_RPC_URL and fails the session if anything had to be fetched.
+"""
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from anvil import start_anvil, wait_for_node  # noqa: E402
+from rpc_proxy import RpcProxy, RpcStore, store_path  # noqa: E402
+
+FUZZ_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _fork_block(mode: str):
+    block = os.environ.get("FUZZ_FORK_BLOCK")
+    if block:
+        return int(block)
+    if os.environ.get("FUZZ_PROXY_STORE"):
+        return RpcStore(os.environ["FUZZ_PROXY_STORE"]).meta("fork_block")
+    if mode == "replay":
+        pytest.fail("FUZZ_PROXY=replay needs FUZZ_FORK_BLOCK (or FUZZ_PROXY_STORE) to find the recording")
+    return None
+
+
+@pytest.fixture(scope="session")
+def rpc_proxy():
+    """The running RpcProxy, or None when FUZZ_PROXY is not set."""
+    mode = os.environ.get("FUZZ_PROXY", "").lower()
+    if not mode:
+        yield None
+        return
+
+    upstream = os.environ.get("ETH_RPC_URL")
+    fork_block = _fork_block(mode)
+    if fork_block is None:
+        from web3 import HTTPProvider, Web3
+
+        fork_block = Web3(HTTPProvider(upstream)).eth.block_number
+    store = RpcStore(os.environ.get("FUZZ_PROXY_STORE") or store_path(fork_block))
+    if mode == "record":
+        store.set_meta("fork_block", fork_block)
+    proxy = RpcProxy(store, upstream, mode).start()
+    proxy.fork_block = fork_block
+    yield proxy
+    proxy.stop()
+    store.close()
+    print(f"\nrpc_proxy ({mode}, block {fork_block}): {proxy.stats}")
+    if proxy.misses:
+        shown = "\n".join(f"  {method} {params}" for method, params in proxy.misses[:20])
+        pytest.fail(f"{len(proxy.misses)} requests were not in {store.path}:\n{shown}", pytrace=False)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fork_node(rpc_proxy):
+    """A private anvil fork behind the proxy; the fuzzer talks to it through FUZZ_RPC_URL."""
+    if rpc_proxy is None:
+        yield None
+        return
+    port = _free_port()
+    os.makedirs(os.path.join(FUZZ_DIR, "logs"), exist_ok=True)
+    node = start_anvil(port, rpc_proxy.url, rpc_proxy.fork_block, os.path.join(FUZZ_DIR, "logs", f"anvil-{port}.log"))
+    url = f"http://127.0.0.1:{port}"
+    previous = os.environ.get("FUZZ_RPC_URL")
+    os.environ["FUZZ_RPC_URL"] = url
+    try:
+        wait_for_node(url)
+        yield url
+    finally:
+        node.terminate()
+        node.wait()
+        if previous is None:
+            os.environ.pop("FUZZ_RPC_URL", None)
+        else:
+            os.environ["FUZZ_RPC_URL"] = previous
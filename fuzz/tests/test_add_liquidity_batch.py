@@ -0,0 +1,93 @@
+# fuzz/tests/test_add_liquidity_batch.py
+import json
+import os
+import sys
+
+from web3 import EthereumTesterProvider, Web3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+import add_liquidity_batch as batch  # noqa: E402
+from local_backend import _deploy  # noqa: E402
+from rpc import RpcCounter, calldata  # noqa: E402
+
+
+def make_pool(w3, deployer, lp, seed=True):
+    t0 = _deploy(w3, "MockERC20", deployer, "Coin 0", "MC0", 18)
+    t1 = _deploy(w3, "MockERC20", deployer, "Coin 1", "MC1", 6)
+    pool = _deploy(w3, "StableSwap2", deployer, [t0.address, t1.address], 100, 4_000_000, 0)
+    for t, d in ((t0, 18), (t1, 6)):
+        t.functions.mint(lp, 1_000 * 10**d).transact({"from": deployer})
+        if seed:
+            t.functions.mint(deployer, 1_000 * 10**d).transact({"from": deployer})
+            t.functions.approve(pool.address, 2**256 - 1).transact({"from": deployer})
+    if seed:
+        pool.functions.add_liquidity([1_000 * 10**18, 1_000 * 10**6], 0).transact({"from": deployer})
+    return pool, t0, t1
+
+
+def test_provision_manifest(tmp_path, monkeypatch):
+    w3 = Web3(EthereumTesterProvider())
+    deployer, lp = w3.eth.accounts[:2]
+    seeded, t0, _ = make_pool(w3, deployer, lp)
+    partial, p0, _ = make_pool(w3, deployer, lp)
+    empty, _, _ = make_pool(w3, deployer, lp, seed=False)
+    p0.functions.approve(partial.address, 10**18).transact({"from": lp})  # some allowance already, not enough
+    # a coin whose decimals() cannot be read: the entry is skipped, not deposited as if it had 0 decimals
+    odd, _, opaque = make_pool(w3, deployer, lp)
+    real_batch = batch.batch_request
+    unreadable = (opaque.address, calldata("decimals()"))
+
+    def batch_request(w3, requests, counter=None):
+        requests = list(requests)
+        results = real_batch(w3, requests, counter)
+        return [None if m == "eth_call" and (p[0]["to"], p[0]["data"]) == unreadable else r
+                for (m, p), r in zip(requests, results)]
+    monkeypatch.setattr(batch, "batch_request", batch_request)
+
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps([
+        {"pool": seeded.address, "amounts": [10, 10]},
+        {"pool": seeded.address, "amounts": [5, 0], "slippage": 0.05},
+        {"pool": partial.address, "amounts": [20, 20]},
+        {"pool": empty.address, "amounts": [1, 1]},
+        {"pool": empty.address, "amounts": [1, 1, 1]},
+        {"pool": partial.address, "amounts": [10**6, 1]},
+        {"pool": odd.address, "amounts": [1, 1]},
+    ]))
+    entries = batch.load_manifest(str(manifest))
+    counter = RpcCounter()
+    rows = {r["pool"]: r for r in batch.provision(w3, lp, entries, counter)}
+
+    assert [e.status for e in entries] == ["ok", "ok", "ok", "ok", "skipped: 3 amounts for 2 coins",
+                                           "skipped: sender holds too little MC0",
+                                           "skipped: cannot read decimals of MC1"]
+    # the two deposits into one pool share one approval per coin
+    assert rows[seeded.address]["approvals"] == 2 and rows[seeded.address]["ok"] == 2
+    # a nonzero allowance is reset to 0 first, then raised; the unfunded entry adds nothing to it
+    assert rows[partial.address]["approvals"] == 3
+    assert p0.functions.allowance(lp, partial.address).call() == 0  # all spent by the deposit
+    assert t0.functions.allowance(lp, seeded.address).call() == 0
+
+    for pool in (seeded, partial):
+        row = rows[pool.address]
+        assert row["minted_lp"] == pool.functions.balanceOf(lp).call() > 0
+        # calc_token_amount leaves out the imbalance fee, so the dry run bounds the mint from above
+        assert row["expected_lp"] * 0.95 <= row["minted_lp"] <= row["expected_lp"]
+        assert row["add_liquidity_gas"] > 0 and row["coins"] == "MC0/MC1"
+    # calc_token_amount reverts on an empty pool: no dry-run figure, deposited with min_mint 0
+    assert entries[3].expected is None and rows[empty.address]["minted_lp"] > 0
+    assert batch.format_summary(list(rows.values())).count("\n") == 4
+
+
+def test_scale_is_exact():
+    assert batch.scale(0.1, 6) == 100_000
+    assert batch.scale(1.1, 18) == 11 * 10**17  # 1.1 * 10**18 as a float is 1100000000000000128
+    assert batch.scale(3, 0) == 3
+
+
+def test_less_slippage_is_exact():
+    expected = 123_456_789_012_345_678_901_234_567
+    assert batch.less_slippage(expected, 0.01) == expected * 99 // 100  # the float product is off by ~3 * 10**8
+    assert batch.less_slippage(expected, 0.005) == expected * 995 // 1000
+    assert batch.less_slippage(10**18, 0) == 10**18
@@ -1,30 +1,90 @@
 # fuzz/tests/test_curve_stateful_fuzz.py
 import os
+import sys
 import json
+import atexit
 import math
+import time
+import functools
 from decimal import Decimal, getcontext
 from hypothesis.stateful import RuleBasedStateMachine, rule, precondition, invariant, initialize
-from hypothesis import settings, Verbosity
+from hypothesis import settings, Verbosity, event
+from hypothesis.control import currently_in_test_context
 from hypothesis.strategies import integers, lists, just
-from ape import accounts, chain, networks
+from ape import accounts, networks
 from web3 import Web3, HTTPProvider
 from ape.exceptions import TransactionError
 from typing import Optional
 from eth_abi import encode as abi_encode
 from web3.exceptions import ContractLogicError
 
+# shared helpers live next to abi.json in fuzz/
+FUZZ_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, FUZZ_DIR)
+from rpc import RpcCounter  # noqa: E402
+from pool_state import PoolStateCache, is_eth  # noqa: E402
+from failures import write_failure  # noqa: E402
+from signatures import PoolSignatures  # noqa: E402
+from tx_pipeline import TxPipeline  # noqa: E402
+from stableswap import Revert, StableSwapModel  # noqa: E402
+from instrumentation import Metrics  # noqa: E402
+from feedback import (  # noqa: E402
+    MODES as GUIDE_MODES, CoverageMap, Feedback, JumpdestHook, map_path, reserve_shift, state_bucket, trace_jumpdests,
+)
+import invariants  # noqa: E402
+from anvil import fork_block  # noqa: E402
+
 # Increase decimal precision for comparison to on-chain fixed-point math
 getcontext().prec = 80
 
 POOL_ADDR = os.environ.get("POOL_ADDR")
+# "fork" (default): the pool at POOL_ADDR on the connected node.
+# "local": StableSwap2 + mock coins on an in-process py-evm chain (see local_backend.py).
+BACKEND = os.environ.get("FUZZ_BACKEND", "fork").lower()
 ADMIN_ADDR = os.environ.get("ADMIN_ADDR", None)
-FAIL_DIR = os.path.join(os.getcwd(), "fuzz_failures")
+# under fuzz/ whatever the working directory, where run_sharded.py and .gitignore expect them
+FAIL_DIR = os.path.join(FUZZ_DIR, "fuzz_failures")
 os.makedirs(FAIL_DIR, exist_ok=True)
+# worker index when launched by scripts/run_sharded.py
+SHARD = int(os.environ["FUZZ_SHARD"]) if os.environ.get("FUZZ_SHARD") else None
 
 # constants for fuzz bounds (tune to pool decimals)
 DX_MIN = 10 ** 3
 DX_MAX = 10 ** 22
 SMALL = 10 ** 6
+# remove_liquidity_one draws a share (in bps) of the caller's LP rather than an absolute amount
+LP_SHARE_BPS = 10_000
+# candidates scored per step by the model's batch scorers: the drawn amount, then halvings of it
+HALVINGS = 8
+# stored with every failure's trace; bump it when a rule's parameters or their meaning change, so
+# scripts/minimize_failure.py refuses traces this machine would replay differently
+# (2: remove_liquidity_one takes a share of the caller's LP, exchange caps dx at the caller's holdings)
+TRACE_VERSION = 2
+
+# FUZZ_RPC_STATS=1 prints RPC calls per step at the end of every example
+RPC_STATS = os.environ.get("FUZZ_RPC_STATS", "") not in ("", "0")
+# one counter per session; per-step figures are reset for every example
+RPC_COUNTER = RpcCounter()
+# per-rule time / RPC / gas / revert accounting, written at exit to FUZZ_METRICS_DIR
+# (compare two runs with scripts/compare_metrics.py)
+METRICS = Metrics({"backend": BACKEND, **({"shard": SHARD} if SHARD is not None else {})})
+METRICS_DIR = os.environ.get("FUZZ_METRICS_DIR", os.path.join(FUZZ_DIR, "fuzz_metrics"))
+# FUZZ_GUIDE=target (experimental) steers Hypothesis with per-step gas / branch / revert-proximity feedback
+# (feedback.py); measure collects and reports the same figures without steering (the uniform baseline);
+# off, the default, skips it all
+GUIDE = os.environ.get("FUZZ_GUIDE", "off").lower()
+assert GUIDE in GUIDE_MODES, f"FUZZ_GUIDE must be one of {GUIDE_MODES}, got {GUIDE!r}"
+
+
+@atexit.register
+def _write_metrics():
+    if not METRICS.rules:
+        return
+    if _SESSION is not None and _SESSION.coverage is not None:
+        METRICS.coverage = _SESSION.coverage.report()
+    stem = time.strftime("run-%Y%m%d-%H%M%S") + (f"-shard{SHARD}" if SHARD is not None else f"-{os.getpid()}")
+    json_path, _ = METRICS.write(METRICS_DIR, stem)
+    print(f"fuzz metrics: {json_path} (+ .prom)")
 
 # Load ABI from file
 script_dir = os.path.dirname(__file__)
@@ -44,8 +104,11 @@ ERC20_ABI = [
 def _get_web3() -> Web3:
     """
     Return a Web3 instance.
-    Prefer Ape's connected provider; if not connected yet, fall back to ETH_RPC_URL.
+    FUZZ_RPC_URL pins the fuzzer to one node (the sharded runner sets it per worker).
+    Otherwise prefer Ape's connected provider; if not connected yet, fall back to ETH_RPC_URL.
     """
+    if os.environ.get("FUZZ_RPC_URL"):
+        return Web3(HTTPProvider(os.environ["FUZZ_RPC_URL"]))
     try:
         # Will raise ProviderNotConnectedError if Ape isn't connected yet
         return networks.provider.web3
@@ -55,19 +118,150 @@ def _get_web3() -> Web3:
             raise RuntimeError("ETH_RPC_URL must be set when Ape provider is not connected.")
         return Web3(HTTPProvider(url))
 
-def pool_contract(w3: Web3):
-    assert POOL_ADDR, "Set POOL_ADDR env var"
-    code = w3.eth.get_code(Web3.to_checksum_address(POOL_ADDR))
+def pool_contract(w3: Web3, pool_addr: Optional[str] = POOL_ADDR):
+    assert pool_addr, "Set POOL_ADDR env var"
+    code = w3.eth.get_code(Web3.to_checksum_address(pool_addr))
     if not code or code == b"":
         raise RuntimeError(
             "No contract code at POOL_ADDR on current provider. "
             "You are not on a mainnet fork. Start anvil with --fork-url and run with --network :local:anvil."
         )
-    return w3.eth.contract(address=Web3.to_checksum_address(POOL_ADDR), abi=POOL_ABI)
+    return w3.eth.contract(address=Web3.to_checksum_address(pool_addr), abi=POOL_ABI)
 
 def as_erc20(w3: Web3, addr: str):
     return w3.eth.contract(address=Web3.to_checksum_address(addr), abi=ERC20_ABI)
 
+class PoolSession:
+    """
+    State shared by every example in a session: the immutable pool metadata
+    (coins, decimals, contract handles) and an `evm_snapshot` of the funded
+    baseline that each example reverts to instead of re-seeding.
+    """
+
+    def __init__(self, backend: str = BACKEND):
+        self.local = None
+        if backend == "local":
+            from local_backend import deploy_local_pool
+
+            self.local = deploy_local_pool()
+            self.w3 = self.local.w3
+            self.pool = pool_contract(self.w3, self.local.pool_address)
+            self.actors = self.local.actors
+        elif backend == "fork":
+            self.w3 = _get_web3()
+            self.pool = pool_contract(self.w3)
+            self.actors = [accounts.test_accounts[i] for i in range(min(10, len(accounts.test_accounts)))]
+        else:
+            raise ValueError(f"unknown FUZZ_BACKEND {backend!r} (expected 'fork' or 'local')")
+        self.rpc = RPC_COUNTER.install(self.w3)
+        assert hasattr(self.pool, "functions"), "self.pool must be a web3 Contract, not ape.contracts.Contract"
+        # read coin count
+        self.n_coins = 2
+
+        # Get coins and decimals
+        self.coins = [self.pool.functions.coins(i).call() for i in range(self.n_coins)]
+        self.tokens = [None if is_eth(c) else as_erc20(self.w3, c) for c in self.coins]
+        self.decimals = [18 if token is None else token.functions.decimals().call() for token in self.tokens]
+        # add_liquidity / exchange / remove_liquidity_one_coin overloads, cached on disk by code hash
+        self.sigs = PoolSignatures(self.w3, self.pool.address, POOL_ABI, self.n_coins)
+        # pool branches and states reached, kept across runs per code hash (registered after
+        # _write_metrics, so the map is saved before the metrics report reads it)
+        self.coverage = self.jumpdests = None
+        self.can_trace = True
+        if GUIDE != "off":
+            self.coverage = CoverageMap(map_path(self.sigs.code_hash), GUIDE)
+            atexit.register(self.coverage.save)
+            if self.local is not None:
+                self.jumpdests = JumpdestHook(self.w3, self.pool.address, [a.address for a in self.actors])
+
+        self.ready = False
+        self.tx_ok = False
+        self.funded = False
+        self.baseline = None  # evm_snapshot id
+        self.txs: Optional[TxPipeline] = None
+        # where the funded baseline sits, recorded with every failure so a replay can check it starts there
+        self.fork_block: Optional[int] = None
+        self.baseline_block: Optional[int] = None
+
+    def take_baseline(self, tx_ok: bool, funded: bool):
+        self.tx_ok, self.funded = tx_ok, funded
+        self.fork_block = fork_block(self.w3) if self.local is None else None
+        self.baseline_block = self.w3.eth.block_number
+        if tx_ok:
+            self.baseline = self.w3.manager.request_blocking("evm_snapshot", [])
+            # rules submit through the pipeline; the node mines only when a step is flushed
+            self.txs = TxPipeline(self.w3, counter=self.rpc)
+            if self.txs.enable_manual_mining():
+                atexit.register(self.txs.restore_automine)
+        self.ready = True
+
+    def restore(self):
+        """Revert to the funded baseline; a no-op on read-only nodes."""
+        if self.baseline is None:
+            return
+        # anvil/hardhat answer true/false; eth-tester answers null on success
+        if self.w3.manager.request_blocking("evm_revert", [self.baseline]) is False:
+            raise RuntimeError(f"evm_revert to baseline snapshot {self.baseline} failed")
+        # anvil and hardhat drop a snapshot once it has been reverted to
+        self.baseline = self.w3.manager.request_blocking("evm_snapshot", [])
+        if self.txs is not None:
+            # nonces went back with the chain
+            self.txs.reset()
+
+_SESSION: Optional[PoolSession] = None
+
+def pool_session() -> PoolSession:
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = PoolSession()
+    return _SESSION
+
+def step(fn):
+    """
+    Mark a rule body as the start of a new fuzz step: it is appended to the
+    example's trace, counted for per-step RPC accounting, and recorded in
+    fuzz_failures/failures.sqlite if it raises. Transactions the rule submitted are mined
+    together when it returns, so a revert surfaces in the step that caused it.
+    """
+    @functools.wraps(fn)
+    def wrapper(self, **kwargs):
+        self.rpc.end_step()
+        self.trace.append({"rule": fn.__name__, "params": kwargs})
+        started, rpc_before = time.perf_counter(), self.rpc.by_method.copy()
+        before = self.state.get() if self.session.coverage is not None else None
+        outcomes, error, flushed = [], None, False
+        try:
+            result = fn(self, **kwargs)
+            flushed = True
+            outcomes = self.txs.flush()
+            return result
+        except Exception as e:
+            error = e
+            outcomes = self.txs.last_outcomes if flushed else self.txs.discard()
+            self._record_failure(fn.__name__, kwargs, e)
+            raise
+        finally:
+            METRICS.step(fn.__name__, time.perf_counter() - started, rpc_before, self.rpc.by_method, outcomes, error)
+            if before is not None:
+                self._observe(outcomes, error, before)
+    return wrapper
+
+def check(fn):
+    """Mark an invariant body: recorded in the failure store (with the trace so far) if it fails."""
+    @functools.wraps(fn)
+    def wrapper(self):
+        started, failed = time.perf_counter(), False
+        try:
+            return fn(self)
+        except Exception as e:
+            failed = True
+            self._record_failure(fn.__name__, {}, e)
+            raise
+        finally:
+            METRICS.invariant(fn.__name__, time.perf_counter() - started, failed)
+    wrapper.is_invariant = True
+    return wrapper
+
 @settings(
     max_examples=50,
     stateful_step_count=50,
@@ -75,31 +269,57 @@ def as_erc20(w3: Web3, addr: str):
     deadline=None,
 )
 class CurveStateMachine(RuleBasedStateMachine):
+    # scripts/minimize_failure.py turns this off while it replays traces
+    record_failures = True
+
     def __init__(self):
         super().__init__()
-        self.w3 = _get_web3()
-        self.pool = pool_contract(self.w3)
+        session = pool_session()
+        self.session = session
+        METRICS.example()
+        self.w3 = session.w3
+        self.rpc = session.rpc
+        self.pool = session.pool
         # record a small local ledger of account balances for invariant checks
-        self.actors = [accounts.test_accounts[i] for i in range(min(10, len(accounts.test_accounts)))]
+        self.actors = session.actors
         # pick a default caller
         self.caller = self.actors[0]
-        # read coin count
-        self.n_coins = 2
-
-        # Get coins and decimals
-        self.coins = [self.pool.functions.coins(i).call() for i in range(self.n_coins)]
-        assert hasattr(self.pool, "functions"), "self.pool must be a web3 Contract, not ape.contracts.Contract"
-        self.decimals = []
-        for coin_address in self.coins:
-            if coin_address.lower() in ("0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE".lower(), "0x0000000000000000000000000000000000000000"):
-                self.decimals.append(18)
-            else:
-                self.decimals.append(as_erc20(self.w3, coin_address).functions.decimals().call())
-
-        # Are we on a dev node where we can actually transact? (fork / local)
-        self.tx_ok = self._tx_capable()
-        # Optionally seed balances using a whale (only on dev nodes).
-        self.funded = self._seed_balances() if self.tx_ok else False
+        self.n_coins = session.n_coins
+        self.coins = session.coins
+        self.decimals = session.decimals
+        self.tokens = session.tokens
+        self.sigs = session.sigs
+
+        if not session.ready and session.local is not None:
+            # the in-process backend mints to its actors at deploy time
+            session.take_baseline(True, True)
+        elif not session.ready:
+            # First example: fund the actors once and snapshot the result.
+            # Are we on a dev node where we can actually transact? (fork / local)
+            self.tx_ok = self._tx_capable()
+            # Optionally seed balances using a whale (only on dev nodes).
+            self.funded = self._seed_balances() if self.tx_ok else False
+            session.take_baseline(self.tx_ok, self.funded)
+        else:
+            # Every later example starts from the funded baseline.
+            session.restore()
+        self.tx_ok = session.tx_ok
+        self.funded = session.funded
+        self.txs = session.txs
+
+        # D / balances / holdings, fetched in one batched request per block
+        self.state = PoolStateCache(self.w3, self.pool.address, self.n_coins, coins=self.coins, counter=self.rpc,
+                                    pinned=self.txs is not None)
+        if self.txs is not None:
+            # only our own transactions move the chain: drop the snapshot when they are mined
+            self.txs.on_mine[:] = [self.state.invalidate]
+        self.rpc.reset_steps()
+        # every rule run in this example, in order, starting from the baseline
+        self.trace = []
+        # (tx tag, model of the pool after it) for the step that just ran
+        self.expected = None
+        # gas / branches / revert proximity over this example, for hypothesis.target() at teardown
+        self.feedback = Feedback()
 
     def _tx_capable(self) -> bool:
         """True when running against Anvil/Hardhat where we can impersonate / set balances."""
@@ -112,59 +332,54 @@ class CurveStateMachine(RuleBasedStateMachine):
         except Exception:
             return False
 
-    def _impersonate_or_none(self, addr: Optional[str]):
+    def _dev_request(self, methods: tuple, params: list) -> bool:
+        """Send the first dev-node RPC (anvil_*, hardhat_*) the node accepts, on this session's node."""
+        for method in methods:
+            try:
+                self.w3.manager.request_blocking(method, params)
+                return True
+            except Exception:
+                continue
+        return False
+
+    def _impersonate_or_none(self, addr: Optional[str]) -> Optional[str]:
         if not addr:
             return None
-        # Try Anvil
-        try:
-            chain.provider.make_request("anvil_impersonateAccount", [addr])
-            return accounts[addr]
-        except Exception:
-            pass
-        # Try Hardhat
-        try:
-            chain.provider.make_request("hardhat_impersonateAccount", [addr])
-            return accounts[addr]
-        except Exception:
-            pass
+        addr = Web3.to_checksum_address(addr)
+        # Try Anvil, then Hardhat
+        if self._dev_request(("anvil_impersonateAccount", "hardhat_impersonateAccount"), [addr]):
+            return addr
         # If already unlocked
         try:
-            return accounts[addr]
+            return addr if addr in self.w3.eth.accounts else None
         except Exception:
             return None
 
     def _seed_balances(self) -> bool:
         whale_addr = os.environ.get("SETH_WHALE")
         whale = self._impersonate_or_none(whale_addr)
-        try:
-            # Always make sure test actors have gas
-            for a in self.actors:
-                chain.provider.set_balance(a.address, 10_000 * 10**18)
-        except Exception:
-            # Some providers won’t allow balance mutations; continue best-effort.
-            pass
+        # Always make sure test actors have gas
+        # (some providers won't allow balance mutations; continue best-effort)
+        for a in self.actors:
+            self._dev_request(("anvil_setBalance", "hardhat_setBalance"), [a.address, hex(10_000 * 10**18)])
         if whale is None:
             return False
         # Transfer ERC20s from whale
         for actor in self.actors:
             for i, coin_address in enumerate(self.coins):
-                is_eth = coin_address.lower() in (
-                    "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee",
-                    "0x0000000000000000000000000000000000000000",
-                )
-                if is_eth:
+                if is_eth(coin_address):
                     continue
                 # Skip Synthetix synths (sETH, etc.) – transfers may require settlement.
                 try:
-                    sym = as_erc20(self.w3, coin_address).functions.symbol().call()
+                    sym = self.tokens[i].functions.symbol().call()
                 except Exception:
                     sym = ""
                 if sym.lower().startswith("s") or coin_address.lower() == "0x5e74c9036fb86bd7ecdcb084a0673efc32ea31cb":
                     continue
-                coin = as_erc20(self.w3, coin_address)
+                coin = self.tokens[i]
                 amt = 1_000 * (10**int(self.decimals[i]))
                 try:
-                    tx = coin.functions.transfer(actor.address, amt).build_transaction({"from": whale.address})
+                    tx = coin.functions.transfer(actor.address, amt).build_transaction({"from": whale})
                     self.w3.eth.send_transaction(tx)
                 except ContractLogicError:
                     # Non-vanilla ERC20; skip seeding this asset
@@ -177,123 +392,207 @@ class CurveStateMachine(RuleBasedStateMachine):
         self.snapshot_D = self._D()
         self.snapshot_balances = self._balances()
 
-    # ----- helpers to read pool internals -----
-    def _D(self):
+    def teardown(self):
+        self.rpc.end_step()
+        if self.session.coverage is not None:
+            new_branches, new_states = self.session.coverage.add(self.feedback)
+            if GUIDE == "target" and currently_in_test_context():
+                self.feedback.target(new_branches, new_states)
+        if RPC_STATS:
+            print(f"{self.rpc.summary()}; snapshots: {self.state.misses} fetched, {self.state.hits} reused")
+
+    def _record_failure(self, name: str, params: dict, exc: Exception):
+        if not self.record_failures:
+            return
         try:
-            return int(self.pool.functions.D().call())
+            block = self.w3.eth.block_number
         except Exception:
-            return 0
+            block = None
+        record = {"name": name, "params": params, "info": str(exc) or type(exc).__name__, "block": block}
+        if SHARD is not None:
+            record["shard"] = SHARD
+        # enough to replay the example from the funded baseline (scripts/minimize_failure.py)
+        record["backend"] = BACKEND
+        record["fork_block"], record["baseline_block"] = self.session.fork_block, self.session.baseline_block
+        record["error"] = type(exc).__name__
+        record["trace"], record["trace_version"] = list(self.trace), TRACE_VERSION
+        # signature fields (failures.py): reverts flushed by the pipeline carry the decoded reason and failing pc
+        outcome = getattr(exc, "outcome", None)
+        record["reason"] = outcome.reason if outcome is not None and outcome.reason else record["info"]
+        record["pc"], record["opcode"] = (outcome.pc, outcome.op) if outcome is not None else (None, None)
+        record["code_hash"] = self.sigs.code_hash
+        write_failure(FAIL_DIR, record)
+
+    def _observe(self, outcomes: list, error, before):
+        """Feed one step's gas, pool branches and reserve shift into this example's Feedback."""
+        branches = self.session.jumpdests.drain() if self.session.jumpdests is not None else set()
+        pool_txs = [o for o in outcomes if not o.tag.startswith("approve")]
+        if not pool_txs and error is None:
+            return  # skipped as a certain revert: nothing ran
+        if self.session.jumpdests is None and self.session.can_trace:
+            try:
+                for o in pool_txs:
+                    branches |= trace_jumpdests(self.w3, o.tx_hash)
+            except Exception:
+                # no debug_traceTransaction on this node; gas and proximity still guide
+                self.session.can_trace = False
+        reverted = error is not None or any(o.reverted for o in pool_txs)
+        share, state = 0.0, None
+        if not reverted:
+            after = self.state.get()
+            share, state = reserve_shift(before, after), state_bucket(after, self.decimals)
+        self.feedback.observe(sum(o.gas_used for o in pool_txs), branches, reverted, share, state)
+
+    # ----- helpers to read pool internals (served from the per-block snapshot) -----
+    def _D(self):
+        return self.state.get().D
 
     def _balances(self):
-        bals = []
-        for i in range(self.n_coins):
-            bals.append(int(self.pool.functions.balances(i).call()))
-        return bals
+        return list(self.state.get().balances)
 
-    # ---- helpers: ABI-robust pool calls ----
-    def _pool_has_fn(self, name: str, arg_types: list[str]) -> bool:
-        """Check if ABI has a function by name + exact arg types."""
+    # ---- helpers: off-chain model ----
+    def _model(self) -> StableSwapModel:
+        return StableSwapModel.from_snapshot(self.state.get(), self.decimals)
+
+    def _skip(self, reason: str):
+        METRICS.skip(self.trace[-1]["rule"])
+        # shows up in --hypothesis-show-statistics; replays outside Hypothesis have no event log
+        if currently_in_test_context():
+            event(reason)
+
+    def _will_revert(self, action: str, caller: str, needs: dict, transition) -> bool:
+        """
+        True (and the step is skipped) when the transaction would certainly revert:
+        `caller` holds less than `needs` ({coin index or "lp": amount}), or the
+        integer model of the pool reverts on `transition(model)`. Otherwise the
+        model's post-state is kept for the model_matches_chain invariant.
+        """
+        holdings = self.state.holder(caller)
+        for k, amount in needs.items():
+            held = holdings[-1] if k == "lp" else holdings[k]
+            if held < amount:
+                self._skip(f"{action}: skipped, caller holds too little {k}")
+                return True
         try:
-            fns = [f for f in self.pool.functions if f.fn_name == name]
-        except Exception:
-            fns = []
-        for f in fns:
-            try:
-                sig = f._function.signature
-                # crude check: compare "name(type1,type2,...)"
-                if sig == f"{name}({','.join(arg_types)})":
-                    return True
-            except Exception:
-                continue
+            _, after = transition(self._model())
+        except Revert as e:
+            self._skip(f"{action}: skipped, model predicts revert ({e})")
+            return True
+        self.expected = (action, after)
         return False
 
+    def _lp_held(self) -> int:
+        return self.state.holder(self.caller.address)[-1]
+
+    def _feasible(self, amount: int, score) -> int:
+        """
+        `amount`, or the largest of its halvings the model expects the pool to pay out on,
+        scored together by one of StableSwapModel's *_batch methods (one shared D). Falls back
+        to `amount`, so an input nothing can rescue still reaches _will_revert and is skipped.
+        """
+        candidates = [amount >> k for k in range(HALVINGS) if amount >> k]
+        results = score(self._model(), candidates)
+        return next((c for c, r in zip(candidates, results) if r), amount)
+
+    # ---- helpers: ABI-robust pool calls ----
     def _call_add_liquidity(self, amounts, caller_addr, eth_value: int):
         """
-        Try common Curve add_liquidity signatures, provide explicit gas to bypass estimate.
-        Order:
-          1) (uint256[2], uint256)
-          2) (uint256[2], uint256, address)  # receiver
-          3) (uint256[2], uint256, bool)     # use_eth
+        Call the add_liquidity overload resolved for this pool (see signatures.py),
+        with explicit gas to bypass estimate. Extras are filled in as
+        receiver=caller and use_eth=(one coin is the native-ETH sentinel).
         """
         tx_args = {"from": caller_addr, "value": eth_value, "gas": 2_000_000}
-
-        # v1: (amounts, min_mint)
-        if self._pool_has_fn("add_liquidity", ["uint256[2]","uint256"]):
-            try:
-                return self.pool.functions.add_liquidity(amounts, 0).transact(tx_args)
-            except ContractLogicError as e:
-                # fallthrough to try other variants
-                pass
-
-        # v2: (amounts, min_mint, receiver)
-        if self._pool_has_fn("add_liquidity", ["uint256[2]","uint256","address"]):
-            try:
-                return self.pool.functions.add_liquidity(amounts, 0, caller_addr).transact(tx_args)
-            except ContractLogicError:
-                pass
-
-        # v3: (amounts, min_mint, use_eth)
-        # Important: only set use_eth=True if one coin is native-ETH sentinel in coins[].
-        use_eth = eth_value > 0
-        if self._pool_has_fn("add_liquidity", ["uint256[2]","uint256","bool"]):
-            try:
-                return self.pool.functions.add_liquidity(amounts, 0, use_eth).transact(tx_args)
-            except ContractLogicError:
-                pass
-
-        # If ABI didn’t expose signature metadata, brute-try safely in decreasing likelihood
-        # (all within explicit gas; errors stay local to hypothesis run)
-        for variant in ("2", "3-addr", "3-bool"):
-            try:
-                if variant == "2":
-                    return self.pool.functions.add_liquidity(amounts, 0).transact(tx_args)
-                if variant == "3-addr":
-                    return self.pool.functions.add_liquidity(amounts, 0, caller_addr).transact(tx_args)
-                if variant == "3-bool":
-                    return self.pool.functions.add_liquidity(amounts, 0, use_eth).transact(tx_args)
-            except Exception:
-                continue
-        raise ContractLogicError("add_liquidity: all known signatures reverted (ABI mismatch or balance/allowance).")
+        fn = self.sigs.bind("add_liquidity", amounts, 0, receiver=caller_addr, use_eth=eth_value > 0)
+        # unchecked: with explicit gas a revert is mined rather than raised, as it always was
+        return self.txs.submit(fn, tx_args, tag="add_liquidity", check=False)
 
     # ----- invariants (checked after each rule) -----
     @invariant()
+    @check
+    def model_matches_chain(self):
+        snapshot = self.state.get()
+        invariants.model_D_matches_chain(snapshot, self.decimals)
+        if self.expected is None:
+            return
+        action, predicted = self.expected
+        self.expected = None
+        outcome = next((o for o in reversed(self.txs.last_outcomes) if o.tag == action), None)
+        assert outcome is not None and not outcome.reverted, f"{action} reverted; the model predicted success"
+        assert snapshot.balances == predicted.balances, f"{action}: balances {snapshot.balances} != model {predicted.balances}"
+        assert snapshot.lp_supply == predicted.total_supply, (
+            f"{action}: LP supply {snapshot.lp_supply} != model {predicted.total_supply}"
+        )
+
+    @invariant()
+    @check
     def no_negative_balances(self):
-        bals = self._balances()
-        for b in bals:
-            assert b >= 0, f"Negative balance detected: {b}"
+        invariants.no_negative_balances(self.state.get(), self.decimals)
 
     # ----- rules (operations) -----
-    @precondition(lambda self: self.tx_ok and self.funded)
+    @precondition(METRICS.precondition("add_liquidity", lambda self: self.tx_ok and self.funded and self.sigs.has("add_liquidity")))
     @rule(amounts=lists(integers(10**16, 10**18), min_size=2, max_size=2))
+    @step
     def add_liquidity(self, amounts):
         caller = self.caller
+        if self._will_revert("add_liquidity", caller.address, dict(enumerate(amounts)), lambda m: m.add_liquidity(amounts)):
+            return
 
         eth_index = -1
         for i, coin_address in enumerate(self.coins):
-            if coin_address.lower() in ("0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE".lower(), "0x0000000000000000000000000000000000000000"):
+            if is_eth(coin_address):
                 eth_index = i
             else:
-                as_erc20(self.w3, coin_address).functions.approve(self.pool.address, amounts[i]).transact({"from": caller.address})
+                self.txs.submit(
+                    self.tokens[i].functions.approve(self.pool.address, amounts[i]), {"from": caller.address}, tag=f"approve[{i}]"
+                )
 
         eth_value = amounts[eth_index] if eth_index != -1 else 0
-        # Bypass estimateGas by setting 'gas' and try all Curve variants
+        # Bypass estimateGas by setting 'gas'; the overload was resolved once per pool
         self._call_add_liquidity(amounts, caller.address, eth_value)
 
-    @precondition(lambda self: self.tx_ok and self._D() > 0 and self.funded)
+    @precondition(METRICS.precondition(
+        "exchange", lambda self: self.tx_ok and self._D() > 0 and self.funded and self.sigs.has("exchange")
+    ))
     @rule(i=just(0), j=just(1), dx=integers(DX_MIN, 10**17))
+    @step
     def exchange(self, i, j, dx):
         caller = self.actors[(dx % len(self.actors))]
+        # within what the caller holds, and where the model says the pool pays out
+        dx = self._feasible(max(min(dx, self.state.holder(caller.address)[i]), DX_MIN),
+                            lambda m, dxs: m.get_dy_batch(i, j, dxs))
+        if self._will_revert("exchange", caller.address, {i: dx}, lambda m: m.exchange(i, j, dx)):
+            return
 
-        eth_value = dx if self.coins[i].lower() in ("0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE".lower(), "0x0000000000000000000000000000000000000000") else 0
+        eth_value = dx if is_eth(self.coins[i]) else 0
         if not eth_value:
-            as_erc20(self.w3, self.coins[i]).functions.approve(self.pool.address, dx).transact({"from": caller.address})
+            self.txs.submit(self.tokens[i].functions.approve(self.pool.address, dx), {"from": caller.address}, tag=f"approve[{i}]")
 
-        self.pool.functions.exchange(i, j, dx, 0).transact({"from": caller.address, "value": eth_value})
+        self.txs.submit(
+            self.sigs.bind("exchange", i, j, dx, 0, receiver=caller.address, use_eth=eth_value > 0),
+            {"from": caller.address, "value": eth_value},
+            tag="exchange",
+        )
 
-    @precondition(lambda self: self.tx_ok and self._D() > 0 and self.funded)
-    @rule(lp_amount=integers(min_value=10**16, max_value=10**18), i=integers(0,1))
-    def remove_liquidity_one(self, lp_amount, i):
+    @precondition(METRICS.precondition(
+        "remove_liquidity_one",
+        lambda self: self.tx_ok and self._D() > 0 and self.funded and self.sigs.has("remove_liquidity_one_coin")
+        and self._lp_held() > 0,
+    ))
+    @rule(share=integers(1, LP_SHARE_BPS), i=integers(0,1))
+    @step
+    def remove_liquidity_one(self, share, i):
         caller = self.caller
-        self.pool.functions.remove_liquidity_one_coin(lp_amount, i, 0).transact({"from": caller.address})
+        # a share of the caller's LP (so never more than it holds), cut down until the model says the pool pays out
+        lp_amount = self._feasible(max(self._lp_held() * share // LP_SHARE_BPS, 1),
+                                   lambda m, amounts: m.calc_withdraw_one_coin_batch(amounts, i))
+        if self._will_revert(
+            "remove_liquidity_one_coin", caller.address, {"lp": lp_amount}, lambda m: m.remove_liquidity_one_coin(lp_amount, i)
+        ):
+            return
+        self.txs.submit(
+            self.sigs.bind("remove_liquidity_one_coin", lp_amount, i, 0, receiver=caller.address),
+            {"from": caller.address},
+            tag="remove_liquidity_one_coin",
+        )
 
 TestStateMachine = CurveStateMachine.TestCase
@@ -0,0 +1,119 @@
+# fuzz/tests/test_failure_store.py
+import glob
+import json
+import multiprocessing
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import failures  # noqa: E402
+from failures import FailureStore, normalize_reason, write_failure  # noqa: E402
+from tx_pipeline import TxPipeline  # noqa: E402
+
+FAIL_DIR = os.path.join(os.path.dirname(__file__), "..", "fuzz_failures")
+CODE_HASH = "0x" + "ab" * 32
+
+
+def failure(rule="exchange", reason="Exchange resulted in fewer coins than expected", block=100, dx=10**18,
+            pc=1234, opcode="REVERT", steps=3):
+    trace = [{"rule": rule, "params": {"i": 0, "j": 1, "dx": dx + k}} for k in range(steps)]
+    return {"name": rule, "params": trace[-1]["params"], "info": f"{rule}: execution reverted: {reason}",
+            "block": block, "backend": "fork", "error": "ContractLogicError", "trace": trace,
+            "reason": reason, "pc": pc, "opcode": opcode, "code_hash": CODE_HASH}
+
+
+def test_normalize_reason():
+    assert normalize_reason("model D 1002 != on-chain D 1003") == normalize_reason("model D 7 != on-chain D 9")
+    assert normalize_reason("transfer to 0x00000000000000000000000000000000000000c1 failed") == "transfer to <hex> failed"
+    assert normalize_reason(None) == ""
+
+
+def test_duplicates_keep_one_example(tmp_path):
+    store = FailureStore(str(tmp_path / "f.sqlite"))
+    sig, new = store.record(failure(block=100, dx=5, steps=4))
+    assert new
+    for block in range(101, 110):
+        assert store.record(failure(block=block, dx=block, steps=40)) == (sig, False)
+    # a different pc, reason or pool is a different failure
+    assert store.record(failure(pc=99))[1]
+    assert store.record(failure(reason="Slippage screwed you"))[1]
+    assert store.record({**failure(), "code_hash": "0x" + "cd" * 32})[1]
+
+    assert (len(store), store.total()) == (4, 13)
+    example = store.example(sig[:10])
+    assert len(example["trace"]) == 4 and example["block"] == 100  # the first one, in full
+    occurrences = store.occurrences(sig)
+    assert [o["block"] for o in occurrences] == list(range(100, 110))
+    assert "trace" not in occurrences[0] and occurrences[-1]["params"]["dx"] == 109 + 39
+    row = next(r for r in store.query() if r["sig"] == sig)
+    assert (row["count"], row["first_block"], row["last_block"], row["opcode"], row["pc"]) == (10, 100, 109, "REVERT", 1234)
+
+
+def test_query_by_rule_reason_and_blocks(tmp_path):
+    store = FailureStore(str(tmp_path / "f.sqlite"))
+    store.record(failure("exchange", block=100))
+    store.record(failure("exchange", block=250))
+    store.record(failure("add_liquidity", reason="D0 is zero", block=180, pc=None, opcode=None))
+    store.record({"name": "model_matches_chain", "params": {}, "info": "model D 5 != on-chain D 6", "block": 300})
+
+    assert [r["rule"] for r in store.query(rule="exchange")] == ["exchange"]
+    assert [r["rule"] for r in store.query(reason="on-chain D")] == ["model_matches_chain"]
+    assert {r["rule"] for r in store.query(blocks=(150, 260))} == {"exchange", "add_liquidity"}
+    assert [r["rule"] for r in store.query(blocks=(251, None))] == ["model_matches_chain"]
+    assert [o["block"] for o in store.occurrences(store.query(rule="exchange")[0]["sig"], blocks=(200, 300))] == [250]
+
+
+def test_query_by_blocks_past_the_occurrence_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(failures, "MAX_OCCURRENCES", 2)
+    store = FailureStore(str(tmp_path / "f.sqlite"))
+    for block in (100, 101, 500):
+        store.record(failure(block=block))
+    sig = store.query()[0]["sig"]
+    assert [o["block"] for o in store.occurrences(sig)] == [100, 101]  # block 500 was counted, not stored
+    assert [r["sig"] for r in store.query(blocks=(400, 600))] == [sig]
+    assert store.query(blocks=(600, None)) == []
+
+
+def test_failure_point_is_the_last_top_level_revert():
+    # the pool calls a token that reverts (and catches it), then reverts itself
+    logs = [{"pc": 1, "op": "CALL", "depth": 1}, {"pc": 40, "op": "REVERT", "depth": 2},
+            {"pc": 7, "op": "JUMPI", "depth": 1}, {"pc": 900, "op": "REVERT", "depth": 1}]
+    trace = {"structLogs": logs}
+    txs = TxPipeline.__new__(TxPipeline)
+    txs.w3 = SimpleNamespace(manager=SimpleNamespace(request_blocking=lambda method, params: trace))
+    assert txs.failure_point("0x01") == (900, "REVERT")
+    trace["structLogs"] = logs[:3]  # out of gas: no REVERT at the top, the last step is reported
+    assert txs.failure_point("0x01") == (7, "JUMPI")
+
+
+def _write_many(path, shard, n):
+    for k in range(n):
+        rule = ("exchange", "add_liquidity", "remove_liquidity_one_coin")[k % 3]
+        write_failure(path, {**failure(rule, block=1000 + k, dx=k, steps=200), "shard": shard})
+
+
+def test_concurrent_writers_stay_small(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_write_many, args=(str(tmp_path), shard, 300)) for shard in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert all(w.exitcode == 0 for w in workers)
+
+    store = FailureStore(failures.store_path(str(tmp_path)))
+    assert (len(store), store.total()) == (3, 1200)
+    assert {o["shard"] for o in store.occurrences(store.query(rule="exchange")[0]["sig"])} == {0, 1, 2, 3}
+    # 1200 traces of 200 steps would be several MB as JSON files; three are kept
+    size = sum(os.path.getsize(p) for p in glob.glob(str(tmp_path / "failures.sqlite*")))
+    assert size < 1200 * len(json.dumps(failure(steps=200)["trace"])) / 10
+
+
+def test_import_legacy_json(tmp_path):
+    paths = glob.glob(os.path.join(FAIL_DIR, "fail_*.json"))
+    store = FailureStore(str(tmp_path / "f.sqlite"))
+    new = store.import_json(paths)
+    assert store.total() == len(paths)
+    assert new == len(store) < len(paths)
+    assert {r["rule"] for r in store.query()} == {json.load(open(p))["name"] for p in paths}
@@ -0,0 +1,87 @@
+# fuzz/tests/test_feedback.py
+import json
+import math
+import os
+import sys
+
+from hypothesis import given, settings
+from hypothesis.strategies import integers
+
+ABI_PATH = os.path.join(os.path.dirname(__file__), "..", "abi.json")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import feedback  # noqa: E402
+from feedback import CoverageMap, Feedback, JumpdestHook  # noqa: E402
+from local_backend import deploy_local_pool  # noqa: E402
+from pool_state import PoolSnapshot  # noqa: E402
+
+
+def snapshot(balances, D=None):
+    return PoolSnapshot(block=0, D=D if D is not None else sum(balances), balances=tuple(balances), coins=(),
+                        token_balances=())
+
+
+def test_jumpdests_count_actor_transactions_only():
+    local = deploy_local_pool(n_actors=2)
+    w3, actor = local.w3, local.actors[0].address
+    with open(ABI_PATH) as f:
+        pool = w3.eth.contract(address=local.pool_address, abi=json.load(f))
+    hook = JumpdestHook(w3, local.pool_address, [actor])
+    try:
+        pool.functions.get_dy(0, 1, 10**18).call()
+        assert hook.drain() == set()  # the fuzzer's own reads stay out
+
+        local.tokens[0].functions.approve(local.pool_address, 2 * 10**18).transact({"from": actor})
+        assert hook.drain() == set()  # a token, not the pool
+        pool.functions.exchange(0, 1, 10**18, 0).transact({"from": actor})
+        small = hook.drain()
+        assert small and all(isinstance(pc, int) for pc in small)
+
+        # a failing exchange takes a different path through the pool
+        pool.functions.exchange(0, 1, 10**18, 2**255).transact({"from": actor, "gas": 1_000_000})
+        assert hook.drain() != small
+    finally:
+        hook.remove()
+
+
+def test_signals():
+    assert feedback.reserve_shift(snapshot([100, 200]), snapshot([110, 150])) == 0.25
+    assert feedback.proximity(0.25) == math.log10(0.25)
+    assert feedback.proximity(0.0) == feedback.FLOOR and feedback.proximity(3.0) == 0.0
+    even, skewed = snapshot([10**24, 10**24]), snapshot([19 * 10**23, 10**23], D=2 * 10**24)
+    assert feedback.state_bucket(even, (18, 18)) != feedback.state_bucket(skewed, (18, 18))
+    assert feedback.state_bucket(snapshot([10**24, 10**12], D=2 * 10**24), (18, 6)) == feedback.state_bucket(even, (18, 18))
+
+    fb = Feedback()
+    fb.observe(50_000, {1, 2}, False, 1e-6, "a")
+    fb.observe(20_000, {2, 3}, True)
+    assert (fb.gas, fb.branches, fb.states, fb.proximity) == (50_000, {1, 2, 3}, {"a"}, 0.0)
+
+
+def test_map_persists_and_merges_shards(tmp_path):
+    path = str(tmp_path / "coverage" / "0xabc.json")
+    first, second = CoverageMap(path), CoverageMap(path)
+    fb = Feedback()
+    fb.observe(1, {10, 11}, False, 0.1, "s1")
+    assert first.add(fb) == (2, 1)
+    assert first.add(fb) == (0, 0)
+    other = Feedback()
+    other.observe(1, {11, 12}, False, 0.1, "s2")
+    assert second.add(other) == (2, 1)
+    first.save()
+    second.save()
+
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved["pcs"] == {"10": 2, "11": 3, "12": 1} and saved["states"] == {"s1": 2, "s2": 1}
+    later = CoverageMap(path)
+    assert later.add(fb) == (0, 0)
+    report = first.report()
+    assert (report["branches"], report["new_branches"], report["states"]) == (2, 2, 1)
+
+
+@settings(max_examples=5, database=None)
+@given(integers(0, 10**6))
+def test_targets_are_accepted(gas):
+    fb = Feedback()
+    fb.observe(gas, {1}, False, 0.5, "s")
+    fb.target(1, 1)
@@ -0,0 +1,78 @@
+# fuzz/tests/test_minimize_failure.py
+import os
+import sys
+
+import pytest
+from hypothesis.stateful import RuleBasedStateMachine, invariant, precondition, rule
+from hypothesis.strategies import integers
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+from minimize_failure import Replayer, ddmin  # noqa: E402
+
+
+def checked(fn):
+    fn.is_invariant = True
+    return fn
+
+
+class Counter(RuleBasedStateMachine):
+    def __init__(self):
+        super().__init__()
+        self.x = 0
+
+    def init_state(self):
+        pass
+
+    @invariant()
+    @checked
+    def below_ten(self):
+        assert self.x < 10
+
+    @rule(n=integers(0, 5))
+    def add(self, n):
+        self.x += n
+
+    @precondition(lambda self: self.x > 0)
+    @rule()
+    def halve(self):
+        self.x //= 2
+
+    @rule()
+    def boom(self):
+        raise ValueError("boom")
+
+
+def steps(*calls):
+    return [{"rule": name, "params": params} for name, params in calls]
+
+
+def test_replay_reports_rule_and_invariant_failures():
+    replayer = Replayer(Counter)
+    assert replayer.run(steps(("add", {"n": 5}), ("add", {"n": 5}))) == ("below_ten", "AssertionError")
+    assert replayer.run(steps(("add", {"n": 1}), ("boom", {}))) == ("boom", "ValueError")
+    assert replayer.run(steps(("add", {"n": 1}), ("halve", {}))) is None
+
+
+def test_a_disabled_step_does_not_reproduce():
+    # halve first: its precondition does not hold, so the boom after it is never reached
+    assert Replayer(Counter).run(steps(("halve", {}), ("boom", {}))) is None
+
+
+@pytest.mark.parametrize("trace", [
+    steps(("add_many", {"n": 1})),  # renamed rule
+    steps(("add", {"amount": 1})),  # renamed parameter
+    steps(("add", {})),  # missing parameter
+])
+def test_a_trace_from_another_machine_is_refused(trace):
+    replayer = Replayer(Counter)
+    with pytest.raises(SystemExit, match="trace does not match this state machine"):
+        replayer.run(trace)
+    assert replayer.runs == 0
+
+
+def test_ddmin_keeps_the_recorded_failure():
+    replayer = Replayer(Counter)
+    trace = steps(("boom", {}), *[("add", {"n": 5})] * 3)
+    minimal = ddmin(trace, lambda c: replayer.run(c) == ("below_ten", "AssertionError"))
+    assert minimal == steps(("add", {"n": 5}), ("add", {"n": 5}))
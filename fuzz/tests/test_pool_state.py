@@ -0,0 +1,42 @@
+# fuzz/tests/test_pool_state.py
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from local_backend import deploy_local_pool  # noqa: E402
+from pool_state import PoolStateCache  # noqa: E402
+from rpc import RpcCounter  # noqa: E402
+from tx_pipeline import TxPipeline  # noqa: E402
+
+ABI_PATH = os.path.join(os.path.dirname(__file__), "..", "abi.json")
+
+
+def test_pinned_snapshot_is_dropped_when_the_pipeline_mines():
+    local = deploy_local_pool(n_actors=1)
+    w3, actor = local.w3, local.actors[0].address
+    counter = RpcCounter().install(w3)
+    txs = TxPipeline(w3, counter=counter)
+    txs.enable_manual_mining()
+    state = PoolStateCache(w3, local.pool_address, 2, counter=counter, pinned=True)
+    txs.on_mine.append(state.invalidate)
+    with open(ABI_PATH) as f:
+        pool = w3.eth.contract(address=local.pool_address, abi=json.load(f))
+    try:
+        first = state.get()
+        calls = counter.calls
+        assert state.get() is first
+        assert counter.calls == calls  # served from memory
+        assert state.holder(actor) == state.holder(actor)
+        assert counter.by_method["eth_blockNumber"] == 1  # the first fetch only
+
+        txs.submit(local.tokens[0].functions.approve(local.pool_address, 10**18), {"from": actor}, "approve")
+        txs.submit(pool.functions.exchange(0, 1, 10**18, 0), {"from": actor}, "exchange")
+        if txs.manual_mining:
+            assert state.get() is first  # nothing mined until the flush
+        txs.flush()
+        after = state.get()
+        assert after.block > first.block and after.balances[0] == first.balances[0] + 10**18
+        assert state.get() is after
+    finally:
+        txs.restore_automine()
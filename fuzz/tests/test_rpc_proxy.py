@@ -0,0 +1,117 @@
+# fuzz/tests/test_rpc_proxy.py
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from rpc_proxy import RpcProxy, RpcStore  # noqa: E402
+
+# what a forked node would ask for, with fixed answers
+UPSTREAM = {
+    "eth_chainId": "0x1",
+    "eth_getStorageAt": "0x" + "00" * 31 + "2a",
+    "eth_getCode": "0x6000",
+}
+
+
+class Upstream:
+    """A JSON-RPC endpoint that answers from UPSTREAM and counts requests."""
+
+    def __init__(self):
+        upstream = self
+        self.requests = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                batch = body if isinstance(body, list) else [body]
+                upstream.requests += len(batch)
+                replies = [
+                    {"jsonrpc": "2.0", "id": r["id"], "result": UPSTREAM[r["method"]]}
+                    if r["method"] in UPSTREAM
+                    else {"jsonrpc": "2.0", "id": r["id"], "error": {"code": -32601, "message": "no such method"}}
+                    for r in batch
+                ]
+                payload = json.dumps(replies if isinstance(body, list) else replies[0]).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def call(url, method, params, id=1):
+    return requests.post(url, json={"jsonrpc": "2.0", "id": id, "method": method, "params": params}).json()
+
+
+SLOT = ["0xc5424b857f758e906013f3555dad202e4bdb4567", "0x0", "0x1234"]
+
+
+def test_record_then_replay_offline(tmp_path):
+    upstream = Upstream()
+    store = RpcStore(str(tmp_path / "fork.sqlite"))
+    proxy = RpcProxy(store, upstream.url, "record").start()
+    try:
+        assert call(proxy.url, "eth_getStorageAt", SLOT)["result"] == UPSTREAM["eth_getStorageAt"]
+        assert call(proxy.url, "eth_getStorageAt", SLOT, id=7) == {
+            "jsonrpc": "2.0", "id": 7, "result": UPSTREAM["eth_getStorageAt"]
+        }
+        # errors are passed through but not recorded
+        assert "error" in call(proxy.url, "eth_unknown", [])
+    finally:
+        proxy.stop()
+        upstream.stop()
+    assert upstream.requests == 2
+    assert len(store) == 1
+
+    # upstream is gone: replay needs nothing but the store
+    replay = RpcProxy(store, None, "replay").start()
+    try:
+        assert call(replay.url, "eth_getStorageAt", SLOT)["result"] == UPSTREAM["eth_getStorageAt"]
+        assert replay.stats == {"hits": 1, "forwarded": 0, "misses": 0}
+    finally:
+        replay.stop()
+
+
+def test_replay_miss_is_an_error(tmp_path):
+    store = RpcStore(str(tmp_path / "empty.sqlite"))
+    proxy = RpcProxy(store, None, "replay").start()
+    try:
+        reply = call(proxy.url, "eth_getCode", ["0xc5424b857f758e906013f3555dad202e4bdb4567", "0x1234"])
+    finally:
+        proxy.stop()
+    assert "rpc_proxy replay" in reply["error"]["message"]
+    assert proxy.misses == [("eth_getCode", ["0xc5424b857f758e906013f3555dad202e4bdb4567", "0x1234"])]
+
+
+def test_batch_forwards_only_misses(tmp_path):
+    upstream = Upstream()
+    store = RpcStore(str(tmp_path / "fork.sqlite"))
+    store.put("eth_chainId", [], "0x1")
+    proxy = RpcProxy(store, upstream.url, "record").start()
+    try:
+        batch = [
+            {"jsonrpc": "2.0", "id": 1, "method": "eth_chainId", "params": []},
+            {"jsonrpc": "2.0", "id": 2, "method": "eth_getCode", "params": ["0xc5424b857f758e906013f3555dad202e4bdb4567", "0x1234"]},
+        ]
+        replies = requests.post(proxy.url, json=batch).json()
+    finally:
+        proxy.stop()
+        upstream.stop()
+    assert [r["id"] for r in replies] == [1, 2]
+    assert [r["result"] for r in replies] == ["0x1", "0x6000"]
+    assert upstream.requests == 1
@@ -0,0 +1,59 @@
+# fuzz/tests/test_run_sharded.py
+import os
+import subprocess
+import sys
+
+import pytest
+from hypothesis import core
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+import run_sharded  # noqa: E402
+import shard_seed  # noqa: E402
+
+FUZZ_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# fails from x = 1000 up; every value tried is logged, in order, to seen-<shard>
+SHARD_TEST = """
+import os
+from hypothesis import given, settings
+from hypothesis.strategies import integers
+
+@settings(max_examples=300)
+@given(integers(0, 10**6))
+def test_small(x):
+    with open("seen-" + os.environ["FUZZ_SHARD"], "a") as f:
+        f.write(f"{x}\\n")
+    assert x < 1000
+"""
+
+
+def run_shard(tmp_path, shard, seed):
+    env = dict(os.environ, FUZZ_SHARD=str(shard), FUZZ_SEED=str(seed),
+               PYTHONPATH=os.pathsep.join([FUZZ_DIR, os.environ.get("PYTHONPATH", "")]))
+    proc = subprocess.run(run_sharded.worker_command("test_shard.py"), cwd=tmp_path, env=env,
+                          capture_output=True, text=True)
+    return proc.returncode, (tmp_path / f"seen-{shard}").read_text().split()
+
+
+def test_shards_replay_each_others_examples(tmp_path):
+    (tmp_path / "test_shard.py").write_text(SHARD_TEST)
+    code, first = run_shard(tmp_path, 0, 1)
+    assert code == 1 and first[-1] == "1000"  # found, shrunk and saved to tmp_path/.hypothesis
+    assert (tmp_path / ".hypothesis" / "examples").is_dir()
+
+    # another shard, another seed: it starts from the example shard 0 saved
+    code, second = run_shard(tmp_path, 1, 2)
+    assert code == 1 and second[0] == "1000"
+
+    # the logged seed repeats a run: same values once the saved example is replayed
+    (tmp_path / "seen-1").unlink()
+    _, again = run_shard(tmp_path, 1, 2)
+    assert again == second
+
+
+def test_a_missing_seed_source_stops_the_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "threadlocal", object())
+    monkeypatch.setenv("FUZZ_SEED", "1")
+    with pytest.raises(pytest.UsageError, match="cannot seed"):
+        shard_seed.pytest_configure(None)
@@ -0,0 +1,178 @@
+# fuzz/tests/test_scanner.py
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import scanner  # noqa: E402
+from rpc import selector  # noqa: E402
+from rpc_proxy import RpcProxy, RpcStore  # noqa: E402
+from stableswap import get_D  # noqa: E402
+
+POOL = "0x00000000000000000000000000000000000000aa"
+COINS = ["0x00000000000000000000000000000000000000c0", "0x00000000000000000000000000000000000000c1",
+         "0x00000000000000000000000000000000000000c2"]
+DECIMALS = [18, 6, 6]
+A_PRECISE = 200 * 100
+BAD_BLOCK = 103  # D() is off by one here
+
+
+def balances(block):
+    return [1_000 * 10**18 + block * 10**15, 990 * 10**6 + block, 1_010 * 10**6 - block]
+
+
+def word(value: int) -> str:
+    return "0x" + value.to_bytes(32, "big").hex()
+
+
+class FakePool:
+    """An archive node that knows one 3-coin pool (which is its own LP token) and its coins."""
+
+    def __init__(self):
+        fake = self
+        self.calls = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                batch = body if isinstance(body, list) else [body]
+                fake.calls += len(batch)
+                replies = []
+                for r in batch:
+                    result = fake.eth_call(*r["params"]) if r["method"] == "eth_call" else None
+                    if result is None:
+                        replies.append({"jsonrpc": "2.0", "id": r["id"], "error": {"code": 3, "message": "execution reverted"}})
+                    else:
+                        replies.append({"jsonrpc": "2.0", "id": r["id"], "result": result})
+                payload = json.dumps(replies if isinstance(body, list) else replies[0]).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+
+    def eth_call(self, tx, tag):
+        block = int(tag, 16)
+        to, data = tx["to"].lower(), bytes.fromhex(tx["data"][2:])
+        sel, arg = data[:4], int.from_bytes(data[4:36], "big") if len(data) > 4 else None
+        bals = balances(block)
+        if to == POOL:
+            if sel == selector("coins(uint256)"):
+                return word(int(COINS[arg], 16)) if arg < len(COINS) else None
+            if sel == selector("balances(uint256)"):
+                return word(bals[arg])
+            xp = [b * 10 ** (18 - d) for b, d in zip(bals, DECIMALS)]
+            D = get_D(xp, A_PRECISE) + (block == BAD_BLOCK)
+            fixed = {"A_precise()": A_PRECISE, "A()": A_PRECISE // 100, "fee()": 4_000_000, "admin_fee()": 5 * 10**9,
+                     "D()": D, "totalSupply()": D}
+            for signature, value in fixed.items():
+                if sel == selector(signature):
+                    return word(value)
+            return None  # coins(int128), lp_token(), token()
+        i = COINS.index(to)
+        if sel == selector("decimals()"):
+            return word(DECIMALS[i])
+        if sel == selector("balanceOf(address)"):
+            return word(bals[i] + 1)  # admin fees sit on top of the accounted balance
+        return None
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run(url, out, blocks, **kwargs):
+    return asyncio.run(scanner.scan(url, [POOL], blocks, str(out), concurrency=3, batch=40, fmt="csv", **kwargs))
+
+
+def test_scan_flags_the_bad_block(tmp_path):
+    node = FakePool()
+    try:
+        stats = run(node.url, tmp_path / "scan", range(100, 110))
+    finally:
+        node.stop()
+    rows = sorted(scanner.read_rows(str(tmp_path / "scan")), key=lambda r: r["block"])
+    assert [r["block"] for r in rows] == list(range(100, 110))
+    assert stats["violations"] == 1 and stats["errors"] == 0
+    assert all(r["n_coins"] == 3 for r in rows)
+    bad = [r for r in rows if not r["ok"]]
+    assert [r["block"] for r in bad] == [BAD_BLOCK]
+    assert bad[0]["inv_model_D_matches_chain"].startswith("model D")
+    assert bad[0]["inv_no_negative_balances"] == "pass"
+    # 14 calls per pool-block, packed into batches of at most 40
+    assert stats["calls"] >= 10 * 14 and stats["http_requests"] < 10
+
+
+def test_resume_skips_checkpointed_blocks(tmp_path):
+    node = FakePool()
+    try:
+        first = run(node.url, tmp_path / "scan", range(100, 106), rows_per_part=2)
+        second = run(node.url, tmp_path / "scan", range(100, 112), rows_per_part=2)
+    finally:
+        node.stop()
+    assert first["rows"] == 6
+    assert (second["skipped"], second["rows"]) == (6, 6)
+    blocks = sorted(r["block"] for r in scanner.read_rows(str(tmp_path / "scan")))
+    assert blocks == list(range(100, 112))
+
+
+def test_resume_drops_a_part_the_checkpoint_never_committed(tmp_path, monkeypatch):
+    node = FakePool()
+    try:
+        run(node.url, tmp_path / "scan", range(100, 104), rows_per_part=2)
+
+        # the next part is renamed into place, then the run dies before its checkpoint is written
+        def crash(self, units, part):
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(scanner.Checkpoint, "mark", crash)
+        try:
+            run(node.url, tmp_path / "scan", range(100, 108), rows_per_part=2)
+        except KeyboardInterrupt:
+            pass
+        monkeypatch.undo()
+        assert len(list((tmp_path / "scan").glob("part-*"))) == 3
+
+        # a torn line at the end of the checkpoint does not count either
+        with open(tmp_path / "scan" / "checkpoint.txt", "a") as f:
+            f.write(f"{POOL} 10")
+        resumed = run(node.url, tmp_path / "scan", range(100, 108), rows_per_part=2)
+    finally:
+        node.stop()
+    assert (resumed["skipped"], resumed["rows"]) == (4, 4)
+    blocks = sorted(r["block"] for r in scanner.read_rows(str(tmp_path / "scan")))
+    assert blocks == list(range(100, 108))
+
+
+def test_replay_through_the_proxy_matches_live(tmp_path):
+    node = FakePool()
+    store = RpcStore(str(tmp_path / "rpc.sqlite"))
+    proxy = RpcProxy(store, node.url, "record").start()
+    try:
+        live = run(proxy.url, tmp_path / "live", range(100, 106))
+    finally:
+        proxy.stop()
+        node.stop()
+    assert live["units"] == 6
+
+    # the node is gone; the same scan is served from the recording
+    replay = RpcProxy(store, None, "replay").start()
+    try:
+        run(replay.url, tmp_path / "replay", range(100, 106))
+    finally:
+        replay.stop()
+    key = lambda r: r["block"]  # noqa: E731
+    assert sorted(scanner.read_rows(str(tmp_path / "replay")), key=key) == sorted(scanner.read_rows(str(tmp_path / "live")), key=key)
+    # only calls that revert on the node (and so were never recorded) miss
+    assert {params[0]["data"][:10] for _, params in replay.misses} <= {
+        "0x" + selector(s).hex() for s in ("coins(uint256)", "coins(int128)", "lp_token()", "token()")
+    }
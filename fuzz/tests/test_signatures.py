@@ -0,0 +1,61 @@
+# fuzz/tests/test_signatures.py
+import json
+import os
+import sys
+
+import vyper
+from web3 import EthereumTesterProvider, Web3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from rpc import selector  # noqa: E402
+from signatures import PoolSignatures, pushed_selectors, resolve  # noqa: E402
+
+ABI_PATH = os.path.join(os.path.dirname(__file__), "..", "abi.json")
+
+# a crypto-pool style surface: uint256 indices, use_eth on exchange, receiver on add_liquidity
+FACTORY_POOL = """
+@external
+@payable
+def add_liquidity(amounts: uint256[2], min_mint: uint256, receiver: address) -> uint256:
+    return 1
+
+@external
+@payable
+def exchange(i: uint256, j: uint256, dx: uint256, min_dy: uint256, use_eth: bool) -> uint256:
+    return 2
+"""
+
+
+def deploy(w3, source):
+    out = vyper.compile_code(source, output_formats=["abi", "bytecode"])
+    tx = w3.eth.contract(abi=out["abi"], bytecode=out["bytecode"]).constructor().transact({"from": w3.eth.accounts[0]})
+    return w3.eth.get_transaction_receipt(tx)["contractAddress"]
+
+
+def test_bytecode_wins_over_a_shared_abi(tmp_path):
+    w3 = Web3(EthereumTesterProvider())
+    pool = deploy(w3, FACTORY_POOL)
+    with open(ABI_PATH) as f:
+        abi = json.load(f)  # declares the sETH pool's int128 forms, which this pool does not have
+
+    sigs = PoolSignatures(w3, pool, abi, 2, cache_dir=str(tmp_path))
+    assert sigs.resolved == {
+        "add_liquidity": "add_liquidity(uint256[2],uint256,address)",
+        "exchange": "exchange(uint256,uint256,uint256,uint256,bool)",
+        "remove_liquidity_one_coin": "remove_liquidity_one_coin(uint256,int128,uint256)",  # only the ABI says so
+    }
+    sigs.bind("exchange", 0, 1, 10, 0, use_eth=True).call()  # the pool has it: no revert
+    assert not sigs.from_cache and PoolSignatures(w3, pool, abi, 2, cache_dir=str(tmp_path)).from_cache
+    # another coin count or ABI is resolved afresh, not read back from this pool's cache entry
+    assert not PoolSignatures(w3, pool, abi, 3, cache_dir=str(tmp_path)).from_cache
+    assert not PoolSignatures(w3, pool, [], 2, cache_dir=str(tmp_path)).from_cache
+
+
+def test_selector_bytes_in_push_data_do_not_count():
+    int128 = selector("exchange(int128,int128,uint256,uint256)")
+    uint256 = selector("exchange(uint256,uint256,uint256,uint256)")
+    # PUSH32 whose data holds the int128 selector, then PUSH4 of the uint256 one, then the raw bytes again as trailing data
+    code = bytes([0x7F]) + int128 + bytes(28) + bytes([0x63]) + uint256 + bytes([0x00]) + int128
+    assert resolve([], code, 2)["exchange"] == "exchange(uint256,uint256,uint256,uint256)"
+    # a selector with a leading zero byte (0x00abcdef) is pushed in three
+    assert pushed_selectors(bytes([0x62, 0xAB, 0xCD, 0xEF, 0x7F]) + bytes(32)) == {0xABCDEF}
@@ -0,0 +1,206 @@
+# fuzz/tx_pipeline.py
+"""
+Pipelined transaction submission for dev nodes.
+
+`TxPipeline` switches the node to manual mining (evm_setAutomine false), assigns
+nonces locally and sends transactions back to back without estimating gas or
+waiting for receipts. `flush()` mines everything pending with one evm_mine,
+fetches all receipts in one batched request and matches them back to the tags
+they were submitted under.
+
+A checked transaction (the default) that reverts raises ContractLogicError from
+`flush()`, as `transact()` does today when its gas estimate reverts; an unchecked
+one (explicit gas in the old code) is mined as a failed transaction and reported
+only in the outcomes. Nodes without manual mining (eth-tester) mine on send; the
+same code path then just saves the gas estimates and receipt round trips.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from eth_abi import decode as abi_decode
+from web3 import Web3
+from web3.exceptions import ContractLogicError
+
+from rpc import RpcCounter, batch_request, to_bytes, to_int
+
+DEFAULT_GAS = 2_000_000
+ERROR_SELECTOR = bytes.fromhex("08c379a0")  # Error(string)
+
+
+@dataclass
+class Outcome:
+    tag: str
+    tx_hash: str
+    status: int
+    gas_used: int
+    block: Optional[int]
+    reason: Optional[str] = None
+    check: bool = True
+    pc: Optional[int] = None  # where a checked revert happened, if the node can trace it
+    op: Optional[str] = None
+
+    @property
+    def reverted(self) -> bool:
+        return self.status == 0
+
+
+def decode_revert(data) -> Optional[str]:
+    raw = to_bytes(data)
+    if not raw:
+        return None
+    if raw[:4] == ERROR_SELECTOR:
+        try:
+            return abi_decode(["string"], raw[4:])[0]
+        except Exception:
+            pass
+    return "0x" + raw.hex()
+
+
+class TxPipeline:
+    def __init__(self, w3: Web3, counter: Optional[RpcCounter] = None, gas: int = DEFAULT_GAS):
+        self.w3 = w3
+        self.counter = counter
+        self.gas = gas
+        self.chain_id = w3.eth.chain_id
+        # fixed for the session; comfortably above the base fee of a quiet dev chain
+        self.gas_price = 2 * w3.eth.gas_price
+        self.manual_mining = False
+        self.nonces: dict = {}
+        self.pending: list = []  # (tag, tx_hash, check)
+        self.last_outcomes: list = []
+        # called whenever a block with our transactions is mined (or the chain is reverted),
+        # so per-block caches such as PoolStateCache can drop their snapshot
+        self.on_mine: list = []
+
+    def enable_manual_mining(self) -> bool:
+        try:
+            self.w3.manager.request_blocking("evm_setAutomine", [False])
+            self.manual_mining = True
+        except Exception:
+            self.manual_mining = False
+        return self.manual_mining
+
+    def restore_automine(self):
+        if self.manual_mining:
+            try:
+                self.w3.manager.request_blocking("evm_setAutomine", [True])
+            except Exception:
+                pass
+            self.manual_mining = False
+
+    def reset(self):
+        """Forget local nonces, e.g. after evm_revert."""
+        self.nonces.clear()
+        self.pending.clear()
+        self._mined()
+
+    def _mined(self):
+        for callback in self.on_mine:
+            callback()
+
+    def _next_nonce(self, sender: str) -> int:
+        if sender not in self.nonces:
+            self.nonces[sender] = self.w3.eth.get_transaction_count(sender, "pending")
+        nonce = self.nonces[sender]
+        self.nonces[sender] += 1
+        return nonce
+
+    def submit(self, fn, tx_args: dict, tag: str, check: bool = True) -> str:
+        """Send contract call `fn` (a bound ContractFunction) without waiting; return the tx hash."""
+        sender = Web3.to_checksum_address(tx_args["from"])
+        tx = {
+            "gas": self.gas,
+            "gasPrice": self.gas_price,
+            "chainId": self.chain_id,
+            "value": 0,
+            **tx_args,
+            "from": sender,
+            "nonce": self._next_nonce(sender),
+        }
+        try:
+            tx_hash = self.w3.eth.send_transaction(fn.build_transaction(tx))
+        except Exception:
+            # the node did not take it, so the nonce was not used
+            self.nonces.pop(sender, None)
+            raise
+        self.pending.append((tag, tx_hash, check))
+        if not self.manual_mining:
+            self._mined()  # automine: the send was the block
+        return tx_hash
+
+    def flush(self, check: bool = True) -> list:
+        """Mine pending transactions and return their outcomes; raise on the first checked revert."""
+        pending, self.pending = self.pending, []
+        if not pending:
+            self.last_outcomes = []
+            return []
+        if self.manual_mining:
+            self.w3.manager.request_blocking("evm_mine", [])
+            self._mined()
+
+        receipts = batch_request(
+            self.w3, [("eth_getTransactionReceipt", [Web3.to_hex(h)]) for _, h, _ in pending], self.counter
+        )
+        outcomes = []
+        for (tag, tx_hash, checked), receipt in zip(pending, receipts):
+            if receipt is None:
+                raise RuntimeError(f"{tag}: no receipt for {Web3.to_hex(tx_hash)} after mining")
+            outcomes.append(
+                Outcome(
+                    tag=tag,
+                    tx_hash=Web3.to_hex(tx_hash),
+                    status=to_int(receipt["status"]),
+                    gas_used=to_int(receipt["gasUsed"]),
+                    block=to_int(receipt["blockNumber"]),
+                    check=checked,
+                )
+            )
+        self.last_outcomes = outcomes
+
+        if check:
+            failed = next((o for o in outcomes if o.reverted and o.check), None)
+            if failed is not None:
+                failed.reason = self.revert_reason(failed.tx_hash)
+                failed.pc, failed.op = self.failure_point(failed.tx_hash)
+                suffix = f": {failed.reason}" if failed.reason else ""
+                error = ContractLogicError(f"{failed.tag}: execution reverted{suffix}")
+                error.outcome = failed  # the failure store signs on reason, pc and opcode
+                raise error
+        return outcomes
+
+    def discard(self) -> list:
+        """Mine whatever is pending without raising (used after a rule has already failed)."""
+        try:
+            return self.flush(check=False)
+        except Exception:
+            self.pending = []
+            return []
+
+    def revert_reason(self, tx_hash: str) -> Optional[str]:
+        """Best effort: the revert data of a mined transaction, via the call tracer."""
+        try:
+            trace = self.w3.manager.request_blocking("debug_traceTransaction", [tx_hash, {"tracer": "callTracer"}])
+        except Exception:
+            return None
+        return trace.get("revertReason") or decode_revert(trace.get("output"))
+
+    def failure_point(self, tx_hash: str) -> tuple:
+        """
+        Best effort: (pc, opcode) of the last REVERT/INVALID the transaction itself executed (top call
+        depth), else of its last step. Reverts inside calls the pool catches or bubbles up are not the
+        failure point; the one that ended the transaction is.
+        """
+        try:
+            trace = self.w3.manager.request_blocking(
+                "debug_traceTransaction",
+                [tx_hash, {"disableStack": True, "disableStorage": True, "enableMemory": False}],
+            )
+        except Exception:
+            return None, None
+        logs = trace.get("structLogs") or []
+        if not logs:
+            return None, None
+        top = min(entry.get("depth", 1) for entry in logs)
+        ends = [entry for entry in logs if entry.get("depth", 1) == top and entry.get("op") in ("REVERT", "INVALID")]
+        log = ends[-1] if ends else logs[-1]
+        return log.get("pc"), log.get("op")
@@ -1,4 +1,5 @@
 # scripts/add_liquidity_correct.py
+# One pool at a time; fuzz/scripts/add_liquidity_batch.py provisions a whole manifest of pools in one pass.
 import os
 from ape import accounts, Contract, chain
 from ape.exceptions import ContractLogicError
@@ -0,0 +1,79 @@
+# tests/conftest.py
+"""
+Each experiment contract is deployed once per session. ape's isolation takes a
+chain snapshot around every test and reverts it afterwards, so a test sees the
+contracts exactly as deployed, whatever ran before it.
+
+Under pytest-xdist (`ape test -n auto tests/`) every worker is its own process
+with its own local chain and deploys its own copies. Gas does not depend on
+which worker or which test came first.
+"""
+import pytest
+
+
+@pytest.fixture(scope="session")
+def owner(accounts):
+    return accounts[0]
+
+
+@pytest.fixture(scope="session")
+def kec_bytes_m(project, owner):
+    return project.KecBytesM.deploy(sender=owner)
+
+
+@pytest.fixture(scope="session")
+def kec_fixed32(project, owner):
+    return project.KecFixed32.deploy(sender=owner)
+
+
+@pytest.fixture(scope="session")
+def map_key_packing(project, owner):
+    return project.MapKeyPacking.deploy(sender=owner)
+
+
+@pytest.fixture(scope="session")
+def storage_layouts(project, owner):
+    """Layout name -> deployment, for every strategy behind MapKeyPacking's put/get interface."""
+    # MapKeyPacking itself has no batch entry points; the wrapper adds them over the same storage
+    layouts = {"MapKeyPacking": project.MapKeyPackingBatch.deploy(sender=owner)}
+    for name in ("MapNested", "MapBitPacked", "MapPackedValue"):
+        layouts[name] = getattr(project, name).deploy(sender=owner)
+    return layouts
+
+
+@pytest.fixture(scope="session")
+def mem_fuzz(project, owner):
+    return project.MemFuzz.deploy(sender=owner)
+
+
+@pytest.fixture(scope="session")
+def misalign_slice(project, owner):
+    return project.MisalignSlice.deploy(sender=owner)
+
+
+@pytest.fixture(scope="session")
+def gas_probe(project, owner):
+    return project.GasProbe.deploy(sender=owner)
+
+
+def deploy_pool(project, owner, admin_fee=0):
+    t0 = project.MockERC20.deploy("Coin 0", "MC0", 18, sender=owner)
+    t1 = project.MockERC20.deploy("Coin 1", "MC1", 6, sender=owner)
+    pool = project.StableSwap2.deploy([t0, t1], 100, 4_000_000, admin_fee, sender=owner)
+    for t, d in ((t0, 18), (t1, 6)):
+        t.mint(owner, 10**6 * 10**d, sender=owner)
+        t.approve(pool, 2**256 - 1, sender=owner)
+    pool.add_liquidity([1_000 * 10**18, 1_000 * 10**6], 0, sender=owner)
+    return pool, t0, t1
+
+
+@pytest.fixture(scope="session")
+def stableswap(project, owner):
+    """(pool, coin0, coin1): 18 and 6 decimals, 1000 of each deposited, no admin fee."""
+    return deploy_pool(project, owner)
+
+
+@pytest.fixture(scope="session")
+def stableswap_admin_fee(project, owner):
+    """As `stableswap`, with half of every fee going to the admin."""
+    return deploy_pool(project, owner, admin_fee=5 * 10**9)
@@ -0,0 +1,195 @@
+# Generated variants of the experiment contracts, compiled through an on-disk cache.
+#
+# Each template takes its sizes as parameters: MemFuzz over DynArray[Bytes[K], N],
+# KecBytesM for a single Bytes[M], and MisalignSlice for a constant offset and length.
+# An artifact (abi, bytecode, runtime bytecode) is stored under the sha256 of the
+# source, the vyper version and the compiler settings. A hit is a JSON read. Misses
+# are compiled in a process pool and written back.
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import vyper
+from vyper.compiler.settings import OptimizationLevel, Settings
+
+CACHE_DIR = os.environ.get("VARIANT_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", ".cache", "variants"))
+DEFAULT_SETTINGS = {"optimize": "gas", "evm_version": None}
+OUTPUTS = ["abi", "bytecode", "bytecode_runtime"]
+
+MEMFUZZ = """\
+# generated: MemFuzz.run over DynArray[Bytes[{k}], {n}]
+@external
+def run(chunks: DynArray[Bytes[{k}], {n}]) -> bytes32:
+    acc: bytes32 = empty(bytes32)
+    for c: Bytes[{k}] in chunks:
+        acc = keccak256(c)
+    return acc
+"""
+
+KEC_BYTES = """\
+# generated: keccak256 of a Bytes[{m}]
+@external
+def h(x: Bytes[{m}]) -> bytes32:
+    return keccak256(x)
+"""
+
+MISALIGN_SLICE = """\
+# generated: slice of {length} bytes at constant offset {offset}
+@external
+def s(x: Bytes[{size}]) -> bytes32:
+    y: Bytes[{length}] = slice(x, {offset}, {length})
+    return keccak256(y)
+"""
+
+
+@dataclass(frozen=True)
+class Variant:
+    name: str
+    source: str
+    params: tuple  # ((param, value), ...)
+
+
+def memfuzz(k: int, n: int) -> Variant:
+    return Variant(f"MemFuzz_K{k}_N{n}", MEMFUZZ.format(k=k, n=n), (("k", k), ("n", n)))
+
+
+def kec_bytes(m: int) -> Variant:
+    return Variant(f"KecBytes_M{m}", KEC_BYTES.format(m=m), (("m", m),))
+
+
+def misalign_slice(offset: int, length: int) -> Variant:
+    size = offset + length
+    return Variant(f"MisalignSlice_O{offset}_L{length}", MISALIGN_SLICE.format(offset=offset, length=length, size=size),
+                   (("offset", offset), ("length", length)))
+
+
+def memfuzz_grid(ks=(32, 64, 128, 256), ns=(8, 16, 32, 64)):
+    return [memfuzz(k, n) for k in ks for n in ns]
+
+
+def kec_bytes_grid(ms=range(1, 257)):
+    return [kec_bytes(m) for m in ms]
+
+
+def misalign_slice_grid(offsets=range(32), lengths=(31, 32, 33)):
+    return [misalign_slice(o, n) for o in offsets for n in lengths]
+
+
+def cache_key(source: str, settings: dict = DEFAULT_SETTINGS) -> str:
+    blob = json.dumps({"source": source, "vyper": vyper.__version__, "settings": settings}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def _compile(source: str, settings: dict) -> dict:
+    # module-level so a pool worker can unpickle it
+    s = Settings(
+        optimize=OptimizationLevel.from_string(settings["optimize"]) if settings.get("optimize") else None,
+        evm_version=settings.get("evm_version"),
+    )
+    return vyper.compile_code(source, output_formats=OUTPUTS, settings=s)
+
+
+class ArtifactCache:
+    """artifacts/<key[:2]>/<key>.json; writes go through a temp file so parallel runs never see half an artifact."""
+
+    def __init__(self, directory: str = CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key)) as f:
+                artifact = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return artifact
+
+    def put(self, key: str, artifact: dict):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(artifact, f)
+        os.replace(tmp, path)
+
+
+def compile_all(variants, cache: ArtifactCache = None, settings: dict = DEFAULT_SETTINGS, workers: int = None) -> dict:
+    """name -> artifact for every variant; only cache misses reach the compiler."""
+    cache = cache or ArtifactCache()
+    artifacts, missing = {}, []
+    for v in variants:
+        key = cache_key(v.source, settings)
+        artifact = cache.get(key)
+        if artifact is None:
+            missing.append((v, key))
+        else:
+            artifacts[v.name] = artifact
+    if not missing:
+        return artifacts
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(missing) == 1:
+        outputs = [_compile(v.source, settings) for v, _ in missing]
+    else:
+        # spawn, not fork: the caller is usually a test process with the provider's threads running
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(missing)), mp_context=ctx) as pool:
+            outputs = list(pool.map(_compile, [v.source for v, _ in missing], [settings] * len(missing)))
+    for (v, key), out in zip(missing, outputs):
+        artifact = {"name": v.name, "params": dict(v.params), "vyper": vyper.__version__, "settings": settings, **out}
+        cache.put(key, artifact)
+        artifacts[v.name] = artifact
+    return artifacts
+
+
+def contract_type(artifact: dict):
+    """An ethpm ContractType for ape (`owner.deploy(ContractContainer(contract_type(a)))`)."""
+    from ethpm_types import ContractType
+
+    return ContractType.model_validate({
+        "contractName": artifact["name"],
+        "abi": artifact["abi"],
+        "deploymentBytecode": {"bytecode": artifact["bytecode"]},
+        "runtimeBytecode": {"bytecode": artifact["bytecode_runtime"]},
+    })
+
+
+def deploy(owner, artifact: dict):
+    from ape.contracts import ContractContainer
+
+    return owner.deploy(ContractContainer(contract_type(artifact)))
+
+
+GRIDS = {"memfuzz": memfuzz_grid, "kec": kec_bytes_grid, "slice": misalign_slice_grid}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile contract variants into the artifact cache.")
+    parser.add_argument("grids", nargs="*", help=f"any of {', '.join(sorted(GRIDS))} (default: all)")
+    parser.add_argument("--cache", default=CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    unknown = set(args.grids) - set(GRIDS)
+    if unknown:
+        parser.error(f"unknown grid(s): {', '.join(sorted(unknown))}")
+
+    variants = [v for g in args.grids or sorted(GRIDS) for v in GRIDS[g]()]
+    cache = ArtifactCache(args.cache)
+    t0 = time.time()
+    compile_all(variants, cache, workers=args.workers)
+    print(f"{len(variants)} variants: {cache.hits} cached, {cache.misses} compiled in {time.time() - t0:.1f}s -> {args.cache}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Gas sweeps for the keccak / slice experiments.
+#
+# Each contract is deployed once. Every data point is one call measured inside
+# GasProbe.measure, up to MAX_CALLS per eth_call, so a sweep of hundreds of points
+# costs only a handful of calls. The gas figure is execution gas: what the call
+# consumed, plus a constant CALL overhead. The intrinsic calldata cost a transaction
+# would add is reported next to it.
+import csv
+import json
+import os
+
+from eth_abi import encode
+from eth_utils import keccak
+
+MAX_CALLS = 128  # GasProbe.MAX_CALLS
+MAX_LEN = 256  # widest sweep input, KecBytesM.h256
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "gas_baseline.json")
+REPORT_DIR = os.path.join(os.path.dirname(__file__), "..", "reports")
+DEFAULT_THRESHOLD = 0.02  # relative gas increase that counts as a regression
+
+
+def pad(n):
+    return bytes([0xAB]) * n
+
+
+def calldata(signature, *args):
+    types = signature[signature.index("(") + 1 : -1].split(",")
+    return keccak(text=signature)[:4] + encode(types, list(args))
+
+
+def sweeps(n=MAX_LEN):
+    """(contract, signature, param, value, calldata) for every data point."""
+    n = min(n, MAX_LEN)
+    for fn, cap in (("h16", 16), ("h31", 31), ("h33", 33), ("h256", MAX_LEN)):
+        for length in range(min(cap, n) + 1):
+            yield "KecBytesM", f"{fn}(bytes)", "length", length, calldata(f"{fn}(bytes)", pad(length))
+    yield "KecFixed32", "h32(bytes32)", "length", 32, calldata("h32(bytes32)", pad(32))
+    for length in range(33):
+        yield "KecFixed32", "h_dyn(bytes)", "length", length, calldata("h_dyn(bytes)", pad(length))
+    buf = bytes(range(65))
+    for fn in ("s31_at", "s33_at"):
+        for offset in range(32):
+            yield "MisalignSlice", f"{fn}(bytes,uint256)", "offset", offset, calldata(f"{fn}(bytes,uint256)", buf, offset)
+
+
+def calldata_gas(data):
+    return sum(16 if b else 4 for b in data)
+
+
+def run(project, sender, n=MAX_LEN, probe=None, targets=None):
+    """Measure every sweep point; one deployment per contract, MAX_CALLS points per eth_call.
+
+    `probe` and `targets` (contract name -> instance) reuse existing deployments; anything missing is deployed.
+    """
+    probe = probe or project.GasProbe.deploy(sender=sender)
+    points = list(sweeps(n))
+    targets = dict(targets or {})
+    for name in dict.fromkeys(p[0] for p in points):
+        if name not in targets:
+            targets[name] = getattr(project, name).deploy(sender=sender)
+    rows = []
+    for name in dict.fromkeys(p[0] for p in points):
+        target = targets[name]
+        mine = [p for p in points if p[0] == name]
+        for i in range(0, len(mine), MAX_CALLS):
+            chunk = mine[i : i + MAX_CALLS]
+            gas = probe.measure(target, [p[4] for p in chunk])
+            for (contract, signature, param, value, data), used in zip(chunk, gas):
+                rows.append({
+                    "contract": contract,
+                    "function": signature.split("(")[0],
+                    "param": param,
+                    "value": value,
+                    "gas": used,
+                    "calldata_gas": calldata_gas(data),
+                    "word_boundary": param == "length" and value % 32 == 0,
+                })
+    return rows
+
+
+def key(row):
+    return f"{row['contract']}.{row['function']}[{row['param']}={row['value']}]"
+
+
+def write_table(rows, directory=REPORT_DIR):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "gas_sweep.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(directory, "gas_sweep.json"), "w") as f:
+        json.dump(rows, f, indent=1)
+
+
+def write_baseline(rows, compiler, path=BASELINE_PATH):
+    with open(path, "w") as f:
+        json.dump({"compiler": compiler, "points": {key(r): r["gas"] for r in rows}}, f, indent=1, sort_keys=True)
+
+
+def regressions(rows, baseline, threshold=DEFAULT_THRESHOLD):
+    """(key, baseline gas, gas, relative change) for every point more than `threshold` above its baseline."""
+    out = []
+    for row in rows:
+        old = baseline["points"].get(key(row))
+        if old and (row["gas"] - old) / old > threshold:
+            out.append((key(row), old, row["gas"], (row["gas"] - old) / old))
+    return out
@@ -0,0 +1,276 @@
+# Per-opcode and per-source-line gas profiler for the experiment contracts.
+#
+# A profile starts from a struct-log trace of one call. That trace comes either
+# from a node (debug_traceCall, e.g. anvil) or from the in-process py-evm chain
+# behind ape's test provider, which has no debug_ namespace. In the second case
+# the VM's opcode table is wrapped for the duration of the call and records the
+# same fields: pc, op, gas remaining, depth and memory size.
+#
+# Costs are exclusive. A CALL is charged its own cost, not the child frame's.
+# Memory expansion is split out of the opcode that caused it. Opcodes at the
+# target's depth are mapped to .vy lines through the compiler's pc_pos_map.
+import contextlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Optional
+
+import vyper
+from vyper.compiler import OUTPUT_FORMATS
+
+OP_CLASSES = {
+    "KECCAK256": "keccak",
+    "MLOAD": "memory", "MSTORE": "memory", "MSTORE8": "memory", "MCOPY": "memory",
+    "CALLDATACOPY": "calldata copy", "CALLDATALOAD": "calldata copy", "CALLDATASIZE": "calldata copy",
+    "CODECOPY": "code/returndata copy", "RETURNDATACOPY": "code/returndata copy", "EXTCODECOPY": "code/returndata copy",
+    "SLOAD": "storage", "SSTORE": "storage", "TLOAD": "storage", "TSTORE": "storage",
+    "CALL": "call", "STATICCALL": "call", "DELEGATECALL": "call", "CALLCODE": "call",
+    "JUMP": "control flow", "JUMPI": "control flow", "JUMPDEST": "control flow",
+}
+MEMORY_EXPANSION = "memory expansion"
+# STOP, JUMP, JUMPI, RETURN, REVERT, INVALID, SELFDESTRUCT: the next instruction starts a new basic block
+BLOCK_END = {0x00, 0x56, 0x57, 0xF3, 0xFD, 0xFE, 0xFF}
+# py-evm spells a few mnemonics the old way
+ALIASES = {"SHA3": "KECCAK256"}
+STORAGE_OPS = {"SLOAD", "SSTORE"}
+
+
+def op_class(op: str) -> str:
+    if op in OP_CLASSES:
+        return OP_CLASSES[op]
+    if op.startswith(("PUSH", "DUP", "SWAP")) or op == "POP":
+        return "stack"
+    return "arithmetic/other"
+
+
+def memory_cost(size_bytes: int) -> int:
+    words = (size_bytes + 31) // 32
+    return 3 * words + words * words // 512
+
+
+# ----- trace sources -----
+
+def trace_call_rpc(w3, tx: dict, block="latest") -> list:
+    """Struct logs from a node's debug_traceCall."""
+    result = w3.manager.request_blocking(
+        "debug_traceCall", [tx, block, {"disableStorage": True, "disableStack": True, "enableMemory": False}]
+    )
+    return [dict(log) for log in result["structLogs"]]
+
+
+@contextlib.contextmanager
+def recording(computation_class, logs: list):
+    """Wrap every opcode of `computation_class` so each execution appends a struct log to `logs`.
+
+    SLOAD and SSTORE logs also carry "storage": (storage address, slot).
+    """
+    original = computation_class.opcodes
+
+    def wrap(value, fn):
+        # some table entries are decorated functions that keep the Opcode in __wrapped__
+        mnemonic = getattr(fn, "mnemonic", None) or getattr(getattr(fn, "__wrapped__", None), "mnemonic", f"0x{value:02x}")
+        op = ALIASES.get(mnemonic, mnemonic)
+
+        def traced(computation):
+            log = {
+                "pc": computation.code.program_counter - 1,
+                "op": op,
+                "gas": computation.get_gas_remaining(),
+                "depth": computation.msg.depth + 1,  # geth counts the outermost frame as 1
+                "memSize": len(computation._memory._bytes),
+            }
+            if op in STORAGE_OPS:
+                # (contract, slot) the opcode is about to touch, for access lists
+                slot = computation._stack.values[-1]
+                log["storage"] = (computation.msg.storage_address, slot if isinstance(slot, int) else int.from_bytes(slot, "big"))
+            logs.append(log)
+            try:
+                fn(computation=computation)
+            finally:
+                log["gasCost"] = log["gas"] - computation.get_gas_remaining()
+                log["memSizeAfter"] = len(computation._memory._bytes)
+        traced.mnemonic = mnemonic
+        return traced
+
+    computation_class.opcodes = {value: wrap(value, fn) for value, fn in original.items()}
+    try:
+        yield logs
+    finally:
+        computation_class.opcodes = original
+
+
+def trace_call_pyevm(backend, w3, tx: dict) -> list:
+    """Struct logs for an eth_call served by an eth-tester PyEVMBackend (e.g. ape's test provider)."""
+    computation_class = backend.chain.get_vm().state.computation_class
+    logs = []
+    with recording(computation_class, logs):
+        w3.eth.call(tx)
+    return logs
+
+
+def trace_call(provider, tx: dict) -> list:
+    """The in-process tracer on ape's test provider, debug_traceCall on a node."""
+    backend = getattr(provider, "evm_backend", None)
+    if hasattr(backend, "chain"):
+        return trace_call_pyevm(backend, provider.web3, tx)
+    return trace_call_rpc(provider.web3, tx)
+
+
+# ----- attribution -----
+
+@dataclass
+class Step:
+    pc: int
+    op: str
+    depth: int
+    cost: int  # exclusive of child frames and of memory expansion
+    expansion: int
+    line: Optional[int] = None
+
+
+def exclusive_steps(logs: list) -> list:
+    """One Step per struct log, with child-frame gas and memory expansion taken out of the opcode's cost."""
+    n = len(logs)
+    steps = []
+    for k, log in enumerate(logs):
+        # the next step in the same frame tells us gas and memory after this one
+        nxt = next((logs[m] for m in range(k + 1, n) if logs[m]["depth"] <= log["depth"]), None)
+        same_frame = nxt is not None and nxt["depth"] == log["depth"]
+        if same_frame:
+            inclusive, mem_after = log["gas"] - nxt["gas"], nxt.get("memSize")
+        else:
+            inclusive, mem_after = log.get("gasCost", 0), log.get("memSizeAfter")
+        child = 0
+        for m in range(k + 1, n):
+            if logs[m]["depth"] <= log["depth"]:
+                break
+            if logs[m]["depth"] == log["depth"] + 1:
+                child += _child_total(logs, m)
+        expansion = 0
+        if mem_after is not None and log.get("memSize") is not None:
+            expansion = max(0, memory_cost(mem_after) - memory_cost(log["memSize"]))
+        steps.append(Step(log["pc"], log["op"], log["depth"], inclusive - child - expansion, expansion))
+    return steps
+
+
+def _child_total(logs: list, m: int) -> int:
+    # gas a child-frame step consumed, including anything it called
+    log = logs[m]
+    nxt = next((x for x in logs[m + 1 :] if x["depth"] <= log["depth"]), None)
+    if nxt is not None and nxt["depth"] == log["depth"]:
+        return log["gas"] - nxt["gas"]
+    return log.get("gasCost", 0)
+
+
+class SourceMap:
+    """runtime pc -> line of the .vy source, from vyper's pc_pos_map."""
+
+    def __init__(self, path: str):
+        with open(path) as f:
+            self.source = f.read()
+        self.lines = self.source.splitlines()
+        # vyper 0.4.1+ has a runtime-relative map; older "source_map" pcs are already runtime pcs
+        fmt = "source_map_runtime" if "source_map_runtime" in OUTPUT_FORMATS else "source_map"
+        out = vyper.compile_code(self.source, output_formats=[fmt, "bytecode_runtime"])
+        self.runtime = bytes.fromhex(out["bytecode_runtime"].removeprefix("0x"))
+        # a node spanning the whole module is the selector dispatcher, not a line of code
+        mapped = {
+            int(pc): None if (pos[0], pos[2]) == (1, len(self.lines)) else pos[0]
+            for pc, pos in out[fmt]["pc_pos_map"].items()
+        }
+        self.pc_lines = self._spread(mapped)
+
+    def _spread(self, mapped: dict) -> dict:
+        """Give every instruction the line of the closest mapped pc before it in the same basic block."""
+        lines, current, pc = {}, None, 0
+        while pc < len(self.runtime):
+            op = self.runtime[pc]
+            if op == 0x5B:  # JUMPDEST starts a new block
+                current = None
+            current = mapped.get(pc, current)
+            lines[pc] = current
+            if op in BLOCK_END:
+                current = None
+            pc += 1 + (op - 0x5F if 0x60 <= op <= 0x7F else 0)  # skip PUSH data
+        return lines
+
+    def line(self, pc: int) -> Optional[int]:
+        return self.pc_lines.get(pc)
+
+    def text(self, lineno: Optional[int]) -> str:
+        if lineno is None or not 0 < lineno <= len(self.lines):
+            return "<dispatch>"
+        return self.lines[lineno - 1].strip()
+
+
+def profile(logs: list, source_map: Optional[SourceMap] = None) -> list:
+    steps = exclusive_steps(logs)
+    target_depth = min((s.depth for s in steps), default=1)
+    if source_map is not None:
+        for s in steps:
+            if s.depth == target_depth:
+                s.line = source_map.line(s.pc)
+    return steps
+
+
+def by_class(steps: list) -> Counter:
+    gas = Counter()
+    for s in steps:
+        gas[op_class(s.op)] += s.cost
+        if s.expansion:
+            gas[MEMORY_EXPANSION] += s.expansion
+    return gas
+
+
+def by_line(steps: list) -> Counter:
+    gas = Counter()
+    for s in steps:
+        gas[s.line] += s.cost + s.expansion
+    return gas
+
+
+def flat_table(steps: list, source_map: Optional[SourceMap] = None) -> str:
+    total = sum(s.cost + s.expansion for s in steps) or 1
+    rows = [f"{'class':<24}{'gas':>8}{'%':>7}"]
+    for name, gas in by_class(steps).most_common():
+        rows.append(f"{name:<24}{gas:>8}{100 * gas / total:>6.1f}%")
+    rows.append("")
+    rows.append(f"{'line':<6}{'gas':>8}  source")
+    for lineno, gas in sorted(by_line(steps).items(), key=lambda kv: (kv[0] is None, kv[0] or 0)):
+        text = source_map.text(lineno) if source_map else ""
+        rows.append(f"{lineno if lineno is not None else '-':<6}{gas:>8}  {text}")
+    return "\n".join(rows)
+
+
+def folded(steps: list, root: str, source_map: Optional[SourceMap] = None) -> str:
+    """Folded stacks (flamegraph.pl / speedscope): root;Lnn source;OPCODE gas"""
+    stacks = Counter()
+    for s in steps:
+        if source_map is None:
+            where = f"depth{s.depth}"
+        else:
+            where = f"L{s.line} {source_map.text(s.line)}" if s.line else source_map.text(None)
+        stacks[f"{root};{where};{s.op}"] += s.cost
+        if s.expansion:
+            stacks[f"{root};{where};{MEMORY_EXPANSION}"] += s.expansion
+    return "\n".join(f"{stack} {gas}" for stack, gas in sorted(stacks.items()) if gas) + "\n"
+
+
+def diff(a: list, b: list, label_a: str = "a", label_b: str = "b") -> str:
+    """Side-by-side opcode-class and opcode gas of two profiles."""
+    rows = [f"{'':<24}{label_a:>10}{label_b:>10}{'delta':>8}"]
+    ca, cb = by_class(a), by_class(b)
+    for name in sorted(set(ca) | set(cb), key=lambda k: -abs(cb[k] - ca[k])):
+        rows.append(f"{name:<24}{ca[name]:>10}{cb[name]:>10}{cb[name] - ca[name]:>+8}")
+    oa, ob = defaultdict(int), defaultdict(int)
+    for s in a:
+        oa[s.op] += s.cost
+    for s in b:
+        ob[s.op] += s.cost
+    rows.append("")
+    for op in sorted(set(oa) | set(ob), key=lambda k: -abs(ob[k] - oa[k])):
+        if oa[op] != ob[op]:
+            rows.append(f"  {op:<22}{oa[op]:>10}{ob[op]:>10}{ob[op] - oa[op]:>+8}")
+    total_a = sum(s.cost + s.expansion for s in a)
+    total_b = sum(s.cost + s.expansion for s in b)
+    rows.append(f"{'total':<24}{total_a:>10}{total_b:>10}{total_b - total_a:>+8}")
+    return "\n".join(rows)
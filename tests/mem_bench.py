@@ -0,0 +1,176 @@
+# Memory-expansion scaling of MemFuzz.run across declared bounds and actual input.
+#
+# Every MemFuzz_K{k}_N{n} variant (tests/contract_variants.py) is called with a
+# grid of chunk counts and chunk sizes up to its bounds. Each call is traced
+# (tests/gas_profile.py), which gives its execution gas, the peak memory size of the
+# frame, and the gas the node charged each MLOAD/MSTORE/MSTORE8 that grew memory.
+# expansion_gas is derived from the memory sizes with gas_profile.memory_cost, not
+# measured. Three least-squares fits summarise the runs:
+#
+#   memory:    charged gas = static * ops + lin * dW + quad * d(W^2), summed over the
+#              word ops that grew memory from W0 to W1 words (dW = W1 - W0). Their
+#              only other cost is a fixed 3 gas, so the node's own gas counter shows
+#              how it prices memory; the EVM says 3, 3 and 1/512.
+#   allocator: peak words = base + per_declared * declared + per_actual * actual.
+#              per_declared near 1 means memory is reserved for the declared
+#              maximum; per_actual counts words that grow with the input.
+#   gas:       execution gas = base + count * (per_chunk + per_chunk_word * size words
+#              + per_chunk_bound_word * K words) + lin * declared + quad * declared^2.
+#              per_chunk_bound_word prices work done for each chunk's declared
+#              bound rather than its length; lin and quad the array's declared size.
+#
+# declared is the words Vyper needs to hold DynArray[Bytes[K], N] at full size.
+# actual is the words of the ABI-encoded argument that was really passed.
+import csv
+import json
+import os
+
+import contract_variants
+import gas_profile
+from gas_bench import REPORT_DIR, calldata
+
+DEFAULT_KS = (32, 64, 128)
+DEFAULT_NS = (4, 16, 64)
+FULL_KS = (32, 64, 96, 128, 192, 256)
+FULL_NS = (1, 2, 4, 8, 16, 32, 64, 128)
+# memory ops with a fixed cost besides expansion (copies add a per-word term the trace does not size)
+WORD_OPS = {"MLOAD", "MSTORE", "MSTORE8"}
+
+
+def words(n_bytes: int) -> int:
+    return (n_bytes + 31) // 32
+
+
+def declared_words(k: int, n: int) -> int:
+    # DynArray length word plus N slots of (length word + K bytes)
+    return 1 + n * (1 + words(k))
+
+
+def actual_words(count: int, size: int) -> int:
+    # array length word plus one offset, one length and the data of each chunk
+    return 1 + count * (2 + words(size))
+
+
+def word_op_expansions(logs: list, depth: int) -> list:
+    """(gas the node charged, words before, words after) for each word op at `depth` that grew memory."""
+    grown = []
+    for log, nxt in zip(logs, logs[1:]):
+        if log["op"] in WORD_OPS and log["depth"] == nxt["depth"] == depth and nxt["memSize"] > log["memSize"]:
+            grown.append((log["gas"] - nxt["gas"], words(log["memSize"]), words(nxt["memSize"])))
+    return grown
+
+
+def inputs(k: int, n: int):
+    """(chunk count, chunk size) pairs from empty to full."""
+    seen = set()
+    for count in (0, 1, max(1, n // 2), n):
+        for size in (1, max(1, k // 2), k):
+            point = (count, size if count else 0)
+            if point not in seen:
+                seen.add(point)
+                yield point
+
+
+def measure(provider, sender: str, contract, count: int, size: int) -> dict:
+    chunks = [bytes([(i + j) % 256 for j in range(size)]) for i in range(count)]
+    tx = {"from": sender, "to": contract.address, "data": "0x" + calldata("run(bytes[])", chunks).hex(), "gas": 30_000_000}
+    logs = gas_profile.trace_call(provider, tx)
+    steps = gas_profile.exclusive_steps(logs)
+    depth = min(log["depth"] for log in logs)
+    peak = max(max(log.get("memSizeAfter", log["memSize"]), log["memSize"]) for log in logs if log["depth"] == depth)
+    grown = word_op_expansions(logs, depth)
+    return {
+        "gas": sum(s.cost + s.expansion for s in steps),
+        "expansion_gas": sum(s.expansion for s in steps if s.depth == depth),
+        "peak_words": words(peak),
+        "word_op_count": len(grown),
+        "word_op_words": sum(after - before for _, before, after in grown),
+        "word_op_words_sq": sum(after * after - before * before for _, before, after in grown),
+        "word_op_gas": sum(gas for gas, _, _ in grown),
+    }
+
+
+def run(owner, provider, ks=DEFAULT_KS, ns=DEFAULT_NS, cache=None) -> list:
+    variants = [contract_variants.memfuzz(k, n) for k in ks for n in ns]
+    artifacts = contract_variants.compile_all(variants, cache)
+    rows = []
+    for v in variants:
+        k, n = dict(v.params)["k"], dict(v.params)["n"]
+        contract = contract_variants.deploy(owner, artifacts[v.name])
+        for count, size in inputs(k, n):
+            row = {"k": k, "n": n, "count": count, "size": size,
+                   "declared_words": declared_words(k, n), "actual_words": actual_words(count, size)}
+            row.update(measure(provider, owner.address, contract, count, size))
+            rows.append(row)
+    return rows
+
+
+def lstsq(xs: list, ys: list) -> list:
+    """Ordinary least squares through the normal equations (a handful of columns, so no numpy)."""
+    m = len(xs[0])
+    a = [[sum(x[i] * x[j] for x in xs) for j in range(m)] + [sum(x[i] * y for x, y in zip(xs, ys))] for i in range(m)]
+    for col in range(m):
+        pivot = max(range(col, m), key=lambda r: abs(a[r][col]))
+        a[col], a[pivot] = a[pivot], a[col]
+        if a[col][col] == 0:
+            raise ValueError(f"column {col} is not independent of the others")
+        for r in range(m):
+            if r != col:
+                f = a[r][col] / a[col][col]
+                a[r] = [vr - f * vc for vr, vc in zip(a[r], a[col])]
+    return [a[i][m] / a[i][i] for i in range(m)]
+
+
+def fit(rows: list, columns: dict, target: str) -> dict:
+    """Fit `target` on named feature functions of a row; coefficients, residuals and R^2."""
+    xs = [[f(r) for f in columns.values()] for r in rows]
+    ys = [r[target] for r in rows]
+    coef = lstsq(xs, ys)
+    predicted = [sum(c * x for c, x in zip(coef, row)) for row in xs]
+    residuals = [y - p for y, p in zip(ys, predicted)]
+    mean = sum(ys) / len(ys)
+    total = sum((y - mean) ** 2 for y in ys)
+    return {
+        "target": target,
+        "coefficients": dict(zip(columns, coef)),
+        "residuals": residuals,
+        "max_abs_residual": max(abs(e) for e in residuals),
+        "r2": 1 - sum(e * e for e in residuals) / total if total else 1.0,
+    }
+
+
+MODELS = {
+    "memory": ({"static": lambda r: r["word_op_count"], "lin": lambda r: r["word_op_words"],
+                "quad": lambda r: r["word_op_words_sq"]}, "word_op_gas"),
+    "allocator": ({"base": lambda r: 1, "per_declared": lambda r: r["declared_words"], "per_actual": lambda r: r["actual_words"]}, "peak_words"),
+    "gas": ({"base": lambda r: 1, "per_chunk": lambda r: r["count"],
+             "per_chunk_word": lambda r: r["count"] * words(r["size"]),
+             "per_chunk_bound_word": lambda r: r["count"] * words(r["k"]),
+             "lin": lambda r: r["declared_words"], "quad": lambda r: r["declared_words"] ** 2}, "gas"),
+}
+
+
+def fits(rows: list) -> dict:
+    return {name: fit(rows, columns, target) for name, (columns, target) in MODELS.items()}
+
+
+def write_report(rows: list, fitted: dict, compiler: str, directory=REPORT_DIR):
+    os.makedirs(directory, exist_ok=True)
+    for name, f in fitted.items():
+        for row, e in zip(rows, f["residuals"]):
+            row[f"residual_{name}"] = round(e, 3)
+    with open(os.path.join(directory, "mem_bench.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    summary = {name: {k: v for k, v in f.items() if k != "residuals"} for name, f in fitted.items()}
+    with open(os.path.join(directory, "mem_bench.json"), "w") as f:
+        json.dump({"compiler": compiler, "fits": summary, "rows": rows}, f, indent=1)
+
+
+def format_fits(fitted: dict) -> str:
+    out = []
+    for name, f in fitted.items():
+        coef = "  ".join(f"{k}={v:.6g}" for k, v in f["coefficients"].items())
+        out.append(f"{name:<10} {f['target']:<14} {coef}  r2={f['r2']:.6f}  max|res|={f['max_abs_residual']:.1f}")
+    return "\n".join(out)
@@ -0,0 +1,157 @@
+# Storage-layout strategies behind MapKeyPacking's put/get interface, under EIP-2929 pricing.
+#
+# Every layout is driven with the same key sets, drawn from a few distributions,
+# in one batch transaction (put_many / get_many). So the first touch of a slot
+# is cold (2100 gas) and every later touch in the same transaction is warm (100).
+# Scenarios cover fresh writes, updates, reads, one key read over and over, and
+# updates and reads sent with an EIP-2930 access list. The access list is built
+# from the slots the call touches: eth_createAccessList on a node, the py-evm
+# tracer locally.
+#
+# Gas per access is the receipt's gas_used minus the 21000 base fee and the calldata
+# cost, divided by the batch size. Every layout gets identical calldata, so the
+# numbers compare layouts directly. Access-list costs stay in.
+import csv
+import json
+import os
+import random
+
+from eth_utils import to_checksum_address
+
+import gas_profile
+from gas_bench import REPORT_DIR, calldata, calldata_gas
+
+LAYOUTS = ("MapKeyPacking", "MapNested", "MapBitPacked", "MapPackedValue")
+BATCH = 32  # accesses per transaction; the contracts take up to MAX_BATCH = 64
+PUT_MANY = "put_many(uint256[],uint256[],uint256[])"
+GET_MANY = "get_many(uint256[],uint256[])"
+
+# share of each scenario in a path's traffic; reads and updates may use an access list if that is cheaper
+PATHS = {
+    "read-heavy": {"read": 0.9, "update": 0.1},
+    "write-heavy": {"read": 0.2, "update": 0.5, "write_new": 0.3},
+}
+
+
+def sequential(rng, n):
+    # one owner, consecutive indices: per-account arrays, nonces, order books
+    a = rng.randrange(1, 2**64)
+    return [(a, b) for b in range(n)]
+
+
+def uniform(rng, n):
+    # unrelated pairs: approvals between random accounts
+    return [(rng.randrange(2**64), rng.randrange(2**64)) for _ in range(n)]
+
+
+def hot(rng, n, hot_keys=8):
+    # a few popular pairs hit over and over (Zipf-like 1/rank weights)
+    keys = uniform(rng, hot_keys)
+    return rng.choices(keys, weights=[1 / (rank + 1) for rank in range(hot_keys)], k=n)
+
+
+DISTRIBUTIONS = {"sequential": sequential, "uniform": uniform, "hot": hot}
+
+
+def access_list(provider, tx: dict) -> list:
+    """EIP-2930 access list covering every storage slot `tx` touches."""
+    backend = getattr(provider, "evm_backend", None)
+    if not hasattr(backend, "chain"):
+        return provider.web3.manager.request_blocking("eth_createAccessList", [tx, "latest"])["accessList"]
+    slots = {}
+    for log in gas_profile.trace_call(provider, tx):
+        if "storage" in log:
+            address, slot = log["storage"]
+            slots.setdefault(to_checksum_address(address), set()).add(slot)
+    return [{"address": address, "storageKeys": ["0x" + slot.to_bytes(32, "big").hex() for slot in sorted(keys)]}
+            for address, keys in slots.items()]
+
+
+def _send(provider, owner, contract, signature, args, with_access_list=False):
+    data = calldata(signature, *args)
+    method = getattr(contract, signature.split("(")[0])
+    kwargs = {"sender": owner}
+    al = []
+    if with_access_list:
+        al = access_list(provider, {"from": owner.address, "to": contract.address, "data": "0x" + data.hex(), "gas": 10_000_000})
+        kwargs.update(type=1, access_list=al)  # ape reads the RPC spelling; storage_keys would be dropped silently
+    receipt = method(*args, **kwargs)
+    return receipt.gas_used - 21_000 - calldata_gas(data), sum(len(e["storageKeys"]) for e in al)
+
+
+def run(provider, owner, contracts: dict, batch=BATCH, seed=0) -> list:
+    """One row per (layout, distribution, scenario). `contracts` maps layout name -> deployed instance."""
+    rows = []
+    for dist, draw in DISTRIBUTIONS.items():
+        keys = draw(random.Random(f"{seed}-{dist}"), batch)
+        a, b = [k[0] for k in keys], [k[1] for k in keys]
+        values = [i + 1 for i in range(batch)]
+        updates = [v + 1000 for v in values]
+        repeat = ([a[0]] * batch, [b[0]] * batch)
+        scenarios = [
+            ("write_new", PUT_MANY, (a, b, values), False),
+            ("update", PUT_MANY, (a, b, updates), False),
+            ("update_access_list", PUT_MANY, (a, b, values), True),
+            ("read", GET_MANY, (a, b), False),
+            ("read_access_list", GET_MANY, (a, b), True),
+            ("read_repeat", GET_MANY, repeat, False),
+        ]
+        for layout, contract in contracts.items():
+            for name, signature, args, with_al in scenarios:
+                gas, listed = _send(provider, owner, contract, signature, args, with_al)
+                rows.append({
+                    "layout": layout,
+                    "distribution": dist,
+                    "scenario": name,
+                    "accesses": batch,
+                    "distinct_keys": len(set(keys)) if name != "read_repeat" else 1,
+                    "listed_slots": listed,
+                    "gas": gas,
+                    "gas_per_access": round(gas / batch, 1),
+                })
+    return rows
+
+
+def path_costs(rows: list) -> list:
+    """Per (path, distribution, layout): traffic-weighted gas per access, best of with/without access list."""
+    per = {(r["layout"], r["distribution"], r["scenario"]): r["gas_per_access"] for r in rows}
+    out = []
+    for path, mix in PATHS.items():
+        for dist in DISTRIBUTIONS:
+            for layout in dict.fromkeys(r["layout"] for r in rows):
+                cost = 0.0
+                for scenario, share in mix.items():
+                    options = [per[(layout, dist, scenario)]]
+                    if (layout, dist, f"{scenario}_access_list") in per:
+                        options.append(per[(layout, dist, f"{scenario}_access_list")])
+                    cost += share * min(options)
+                out.append({"path": path, "distribution": dist, "layout": layout, "gas_per_access": round(cost, 1)})
+    return out
+
+
+def summary(rows: list, paths: list) -> str:
+    out = []
+    for path in PATHS:
+        out.append(f"{path} ({', '.join(f'{s} {share:.0%}' for s, share in PATHS[path].items())}), gas per access")
+        for dist in DISTRIBUTIONS:
+            ranked = sorted((p for p in paths if (p["path"], p["distribution"]) == (path, dist)), key=lambda p: p["gas_per_access"])
+            out.append(f"  {dist:<11}" + "  ".join(f"{p['layout']} {p['gas_per_access']:.0f}" for p in ranked))
+        out.append("")
+    scenarios = list(dict.fromkeys(r["scenario"] for r in rows))
+    out.append(f"{'layout':<16}{'distribution':<13}" + "".join(f"{s:>20}" for s in scenarios))
+    for (layout, dist) in dict.fromkeys((r["layout"], r["distribution"]) for r in rows):
+        per = {r["scenario"]: r["gas_per_access"] for r in rows if (r["layout"], r["distribution"]) == (layout, dist)}
+        out.append(f"{layout:<16}{dist:<13}" + "".join(f"{per[s]:>20.1f}" for s in scenarios))
+    return "\n".join(out) + "\n"
+
+
+def write_report(rows: list, paths: list, directory=REPORT_DIR):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "storage_layouts.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(directory, "storage_layouts.json"), "w") as f:
+        json.dump({"batch": rows[0]["accesses"], "paths": paths, "rows": rows}, f, indent=1)
+    with open(os.path.join(directory, "storage_layouts.txt"), "w") as f:
+        f.write(summary(rows, paths))
@@ -0,0 +1,38 @@
+import vyper
+from ape import reverts
+from eth_utils import keccak
+
+import contract_variants as cv
+from gas_bench import pad
+
+def test_cache_hits_skip_the_compiler(tmp_path, monkeypatch):
+    variants = [cv.kec_bytes(8), cv.kec_bytes(40), cv.memfuzz(32, 4)]
+    cache = cv.ArtifactCache(str(tmp_path))
+    built = cv.compile_all(variants, cache, workers=2)  # two misses go through the process pool
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    def no_compiler(*args, **kwargs):
+        raise AssertionError("cache hit reached the compiler")
+    monkeypatch.setattr(vyper, "compile_code", no_compiler)
+    again = cv.compile_all(variants, cache)
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert again == built
+
+def test_key_covers_source_and_settings():
+    src = cv.kec_bytes(8).source
+    assert cv.cache_key(src) == cv.cache_key(src)
+    assert cv.cache_key(src) != cv.cache_key(cv.kec_bytes(9).source)
+    assert cv.cache_key(src) != cv.cache_key(src, {"optimize": "codesize", "evm_version": None})
+
+def test_variants_deploy_and_run(tmp_path, owner):
+    variants = [cv.kec_bytes(48), cv.memfuzz(64, 3), cv.misalign_slice(5, 33)]
+    artifacts = cv.compile_all(variants, cv.ArtifactCache(str(tmp_path)), workers=1)
+    kec = cv.deploy(owner, artifacts["KecBytes_M48"])
+    assert kec.h.call(pad(48)) == keccak(pad(48))
+    mem = cv.deploy(owner, artifacts["MemFuzz_K64_N3"])
+    assert mem.run.call([pad(1), pad(64), pad(7)]) == keccak(pad(7))
+    buf = bytes(range(38))
+    sl = cv.deploy(owner, artifacts["MisalignSlice_O5_L33"])
+    assert sl.s.call(buf) == keccak(buf[5:38])
+    with reverts():  # N bounds the array: ABI decoding reverts, without a reason string
+        mem.run.call([pad(1)] * 4)
@@ -0,0 +1,39 @@
+import os
+
+import gas_profile
+from gas_bench import REPORT_DIR, calldata, pad
+
+CONTRACTS = os.path.join(os.path.dirname(__file__), "..", "contracts")
+
+def run_profile(chain, contract, name, signature, *args):
+    source_map = gas_profile.SourceMap(os.path.join(CONTRACTS, f"{name}.vy"))
+    tx = {"from": chain.provider.web3.eth.accounts[0], "to": contract.address, "data": "0x" + calldata(signature, *args).hex(), "gas": 1_000_000}
+    logs = gas_profile.trace_call(chain.provider, tx)
+    return gas_profile.profile(logs, source_map), source_map, logs
+
+def test_profile_accounts_for_all_gas(kec_fixed32, chain):
+    c = kec_fixed32
+    steps, source_map, logs = run_profile(chain, c, "KecFixed32", "h32(bytes32)", pad(32))
+    assert source_map.runtime == bytes(chain.provider.web3.eth.get_code(c.address))
+    # exclusive costs plus expansion add up to what the frame consumed
+    total = sum(s.cost + s.expansion for s in steps)
+    assert total == logs[0]["gas"] - (logs[-1]["gas"] - logs[-1]["gasCost"])
+    assert gas_profile.by_class(steps)["keccak"] > 0
+    # every executed opcode of the function body maps to a line of the source
+    assert "return keccak256(x)" in {source_map.text(s.line) for s in steps}
+
+def test_h32_vs_h_dyn(kec_fixed32, chain):
+    c = kec_fixed32
+    fast, source_map, _ = run_profile(chain, c, "KecFixed32", "h32(bytes32)", pad(32))
+    dyn, _, _ = run_profile(chain, c, "KecFixed32", "h_dyn(bytes)", pad(32))
+    # same 32-byte keccak; Bytes[32] additionally copies its length-prefixed calldata into memory
+    assert gas_profile.by_class(fast)["keccak"] == gas_profile.by_class(dyn)["keccak"]
+    assert gas_profile.by_class(dyn)["calldata copy"] > gas_profile.by_class(fast)["calldata copy"]
+
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    with open(os.path.join(REPORT_DIR, "profile_h32_vs_h_dyn.txt"), "w") as f:
+        f.write(gas_profile.flat_table(fast, source_map) + "\n\n" + gas_profile.flat_table(dyn, source_map) + "\n\n")
+        f.write(gas_profile.diff(fast, dyn, "h32", "h_dyn") + "\n")
+    with open(os.path.join(REPORT_DIR, "profile_kecfixed32.folded"), "w") as f:
+        f.write(gas_profile.folded(fast, "KecFixed32.h32", source_map))
+        f.write(gas_profile.folded(dyn, "KecFixed32.h_dyn", source_map))
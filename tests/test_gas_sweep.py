@@ -0,0 +1,43 @@
+import json
+import os
+
+import vyper
+
+import gas_bench
+
+# GAS_BASELINE_UPDATE=1 rewrites tests/gas_baseline.json from this run (after a deliberate change)
+UPDATE = os.environ.get("GAS_BASELINE_UPDATE", "") not in ("", "0")
+THRESHOLD = float(os.environ.get("GAS_REGRESSION_THRESHOLD", gas_bench.DEFAULT_THRESHOLD))
+
+def by_point(rows):
+    # execution gas plus the calldata cost, i.e. what the single-point tests see in gas_used
+    return {(r["contract"], r["function"], r["value"]): r["gas"] + r["calldata_gas"] for r in rows}
+
+def test_gas_sweep(project, owner, gas_probe, kec_bytes_m, kec_fixed32, misalign_slice):
+    targets = {"KecBytesM": kec_bytes_m, "KecFixed32": kec_fixed32, "MisalignSlice": misalign_slice}
+    rows = gas_bench.run(project, owner, probe=gas_probe, targets=targets)
+    gas_bench.write_table(rows)
+    assert len(rows) == len(list(gas_bench.sweeps()))
+    g = by_point(rows)
+
+    # the hand-picked comparisons of the single-point tests hold across the sweep
+    assert g[("KecFixed32", "h32", 32)] <= g[("KecFixed32", "h_dyn", 32)]
+    assert g[("KecBytesM", "h16", 16)] <= g[("KecBytesM", "h31", 31)] <= g[("KecBytesM", "h33", 33)]
+    # a misaligned start costs nothing extra: the slice copy is priced per word, not per offset
+    for fn in ("s31_at", "s33_at"):
+        assert len({g[("MisalignSlice", fn, offset)] - g[("MisalignSlice", fn, 1)] for offset in range(1, 32)}) == 1
+    # keccak execution cost only grows with the input, one step per 32-byte word
+    h256 = [r["gas"] for r in rows if r["function"] == "h256"]
+    assert h256 == sorted(h256)
+    assert len(set(h256)) == 1 + (gas_bench.MAX_LEN + 31) // 32
+
+    if UPDATE or not os.path.exists(gas_bench.BASELINE_PATH):
+        gas_bench.write_baseline(rows, vyper.__version__)
+        return
+    with open(gas_bench.BASELINE_PATH) as f:
+        baseline = json.load(f)
+    worse = gas_bench.regressions(rows, baseline, THRESHOLD)
+    assert not worse, (
+        f"gas regressions above {THRESHOLD:.0%} vs baseline (vyper {baseline['compiler']} -> {vyper.__version__}):\n"
+        + "\n".join(f"  {k}: {old} -> {new} ({pct:+.1%})" for k, old, new, pct in worse)
+    )
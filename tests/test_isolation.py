@@ -0,0 +1,16 @@
+from gas_bench import pad
+
+# each test writes the same slot; whichever runs second sees it empty only if the first was reverted
+def test_writes_are_reverted_a(map_key_packing, owner):
+    assert map_key_packing.get(7, 7, sender=owner).return_value == 0
+    map_key_packing.put(7, 7, 1, sender=owner)
+
+def test_writes_are_reverted_b(map_key_packing, owner):
+    assert map_key_packing.get(7, 7, sender=owner).return_value == 0
+    map_key_packing.put(7, 7, 2, sender=owner)
+
+def test_shared_gas_matches_fresh_deploy(project, owner, kec_bytes_m, map_key_packing):
+    fresh = project.KecBytesM.deploy(sender=owner)
+    assert kec_bytes_m.h33(pad(33), sender=owner).gas_used == fresh.h33(pad(33), sender=owner).gas_used
+    fresh = project.MapKeyPacking.deploy(sender=owner)
+    assert map_key_packing.put(1, 2, 3, sender=owner).gas_used == fresh.put(1, 2, 3, sender=owner).gas_used
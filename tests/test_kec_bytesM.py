@@ -1,13 +1,13 @@
 def pad(n): return bytes([0xAB]) * n
 
-def test_values(project, accounts):
-    c = project.KecBytesM.deploy(sender=accounts[0])
-    assert c.h16(pad(16), sender=accounts[0]).return_value != c.h31(pad(31), sender=accounts[0]).return_value
-    assert c.h33(pad(33), sender=accounts[0]).return_value != c.h31(pad(31), sender=accounts[0]).return_value
+def test_values(kec_bytes_m, owner):
+    c = kec_bytes_m
+    assert c.h16(pad(16), sender=owner).return_value != c.h31(pad(31), sender=owner).return_value
+    assert c.h33(pad(33), sender=owner).return_value != c.h31(pad(31), sender=owner).return_value
 
-def test_gas_trend(project, accounts):
-    c = project.KecBytesM.deploy(sender=accounts[0])
-    g16 = c.h16(pad(16), sender=accounts[0]).gas_used
-    g31 = c.h31(pad(31), sender=accounts[0]).gas_used
-    g33 = c.h33(pad(33), sender=accounts[0]).gas_used
+def test_gas_trend(kec_bytes_m, owner):
+    c = kec_bytes_m
+    g16 = c.h16(pad(16), sender=owner).gas_used
+    g31 = c.h31(pad(31), sender=owner).gas_used
+    g33 = c.h33(pad(33), sender=owner).gas_used
     assert g16 <= g31 <= g33
\ No newline at end of file
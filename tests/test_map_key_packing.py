@@ -1,12 +1,12 @@
-def test_ordering(project, accounts):
-    c = project.MapKeyPacking.deploy(sender=accounts[0])
-    c.put(1, 2, 42, sender=accounts[0])
-    assert c.get(1, 2, sender=accounts[0]).return_value == 42
-    assert c.get(2, 1, sender=accounts[0]).return_value == 0
+def test_ordering(map_key_packing, owner):
+    c = map_key_packing
+    c.put(1, 2, 42, sender=owner)
+    assert c.get(1, 2, sender=owner).return_value == 42
+    assert c.get(2, 1, sender=owner).return_value == 0
 
-def test_collision_guard(project, accounts):
-    c = project.MapKeyPacking.deploy(sender=accounts[0])
-    c.put(0, 1, 1, sender=accounts[0])
-    c.put(1 << 255, 1, 2, sender=accounts[0])
-    assert c.get(0, 1, sender=accounts[0]).return_value == 1
-    assert c.get(1 << 255, 1, sender=accounts[0]).return_value == 2
\ No newline at end of file
+def test_collision_guard(map_key_packing, owner):
+    c = map_key_packing
+    c.put(0, 1, 1, sender=owner)
+    c.put(1 << 255, 1, 2, sender=owner)
+    assert c.get(0, 1, sender=owner).return_value == 1
+    assert c.get(1 << 255, 1, sender=owner).return_value == 2
\ No newline at end of file
@@ -0,0 +1,27 @@
+import os
+
+import vyper
+
+import mem_bench
+
+# MEM_BENCH=full sweeps the wider grid (48 variants) instead of the 9 used by default
+FULL = os.environ.get("MEM_BENCH", "") == "full"
+
+def test_memory_scaling(owner, chain):
+    ks, ns = (mem_bench.FULL_KS, mem_bench.FULL_NS) if FULL else (mem_bench.DEFAULT_KS, mem_bench.DEFAULT_NS)
+    rows = mem_bench.run(owner, chain.provider, ks, ns)
+    fitted = mem_bench.fits(rows)
+    mem_bench.write_report(rows, fitted, vyper.__version__)
+    print("\n" + mem_bench.format_fits(fitted))
+
+    # the gas the node charged for growing memory: 3 per word plus words^2 / 512, on top of the op's 3
+    memory = fitted["memory"]["coefficients"]
+    assert abs(memory["static"] - 3) < 0.5 and abs(memory["lin"] - 3) < 0.05 and abs(memory["quad"] - 1 / 512) < 2e-4
+    # more input never costs less gas in the same variant
+    for k in ks:
+        for n in ns:
+            mine = sorted((r for r in rows if (r["k"], r["n"]) == (k, n)), key=lambda r: (r["count"], r["size"]))
+            by_count = {}
+            for r in mine:
+                by_count.setdefault(r["count"], []).append(r["gas"])
+            assert all(g == sorted(g) for g in by_count.values())
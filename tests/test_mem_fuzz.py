@@ -5,12 +5,12 @@ def make_chunks():
         chunks.append(bytes([(j + i) % 256 for j in range(size)]))
     return chunks
 
-def test_runs(project, accounts):
-    c = project.MemFuzz.deploy(sender=accounts[0])
-    out = c.run(make_chunks(), sender=accounts[0]).return_value
+def test_runs(mem_fuzz, owner):
+    c = mem_fuzz
+    out = c.run(make_chunks(), sender=owner).return_value
     assert isinstance(out, bytes) and len(out) == 32
 
-def test_gas_ceiling(project, accounts):
-    c = project.MemFuzz.deploy(sender=accounts[0])
-    r = c.run(make_chunks(), sender=accounts[0])
+def test_gas_ceiling(mem_fuzz, owner):
+    c = mem_fuzz
+    r = c.run(make_chunks(), sender=owner)
     assert r.gas_used < 2_000_000
\ No newline at end of file
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pytest
+from ape import reverts
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fuzz"))
+from stableswap import Revert, StableSwapModel  # noqa: E402
+
+def test_balanced_deposit_mints_D(stableswap):
+    pool, _, _ = stableswap
+    assert pool.D() == pool.totalSupply() == 2_000 * 10**18
+    assert pool.get_virtual_price() == 10**18
+
+def test_exchange_matches_get_dy(stableswap, owner):
+    pool, t0, t1 = stableswap
+    a = owner
+    dx = 10 * 10**18
+    expected = pool.get_dy(0, 1, dx)
+    before = t1.balanceOf(a)
+    pool.exchange(0, 1, dx, expected, sender=a)
+    assert t1.balanceOf(a) - before == expected
+    assert 9 * 10**6 < expected < 10 * 10**6
+
+def test_remove_one_coin_matches_calc(stableswap, owner):
+    pool, t0, _ = stableswap
+    a = owner
+    lp = 10**18
+    expected = pool.calc_withdraw_one_coin(lp, 0)
+    before = t0.balanceOf(a)
+    pool.remove_liquidity_one_coin(lp, 0, expected, sender=a)
+    assert t0.balanceOf(a) - before == expected
+
+def model_of(pool):
+    return StableSwapModel(
+        balances=(pool.balances(0), pool.balances(1)),
+        precision_mul=(1, 10**12),
+        A_precise=pool.A_precise(),
+        fee=pool.fee(),
+        admin_fee=pool.admin_fee(),
+        total_supply=pool.totalSupply(),
+    )
+
+def test_model_matches_pool_to_the_wei(stableswap_admin_fee, owner):
+    pool, _, _ = stableswap_admin_fee
+    a = owner
+    model = model_of(pool)
+    assert model.D == pool.D()
+    dxs = [1, 10**12, 10**18, 300 * 10**18]
+    assert model.get_dy_batch(0, 1, dxs) == [pool.get_dy(0, 1, dx) for dx in dxs]
+    assert model.calc_token_amount([10**18, 3 * 10**6], True) == pool.calc_token_amount([10**18, 3 * 10**6], True)
+
+    _, model = model.add_liquidity([5 * 10**18, 10**6])
+    pool.add_liquidity([5 * 10**18, 10**6], 0, sender=a)
+    _, model = model.exchange(1, 0, 40 * 10**6)
+    pool.exchange(1, 0, 40 * 10**6, 0, sender=a)
+    lp = 7 * 10**17
+    assert model.calc_withdraw_one_coin_batch([lp], 1) == [pool.calc_withdraw_one_coin(lp, 1)]
+    _, model = model.remove_liquidity_one_coin(lp, 1)
+    pool.remove_liquidity_one_coin(lp, 1, 0, sender=a)
+    assert model == model_of(pool)
+
+def test_model_reverts_where_pool_reverts(stableswap, owner):
+    pool, _, _ = stableswap
+    model = model_of(pool)
+    with pytest.raises(Revert):
+        model.remove_liquidity_one_coin(model.total_supply + 1, 0)
+    with pytest.raises(Revert):
+        model.exchange(0, 1, 1, min_dy=1)  # 1 wei of an 18-decimal coin buys nothing of a 6-decimal one
+    with reverts("Exchange resulted in fewer coins than expected"):
+        pool.exchange(0, 1, 1, 1, sender=owner)
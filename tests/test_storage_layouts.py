@@ -0,0 +1,40 @@
+from ape import reverts
+
+import storage_bench
+
+def test_layouts_agree(storage_layouts, owner):
+    a, b = [7, 7, 9, 2**100], [0, 1, 3, 5]
+    for name, c in storage_layouts.items():
+        c.put(7, 1, 11, sender=owner)
+        c.put(7, 0, 10, sender=owner)  # the neighbour shares a slot in MapPackedValue
+        assert c.get(7, 1, sender=owner).return_value == 11, name
+        assert c.get(1, 7, sender=owner).return_value == 0, name
+        c.put_many(a, b, [1, 2, 3, 4], sender=owner)
+        assert c.get_many(a, b, sender=owner).return_value == 10, name
+        assert c.get(7, 1, sender=owner).return_value == 2, name
+
+def test_bounded_layouts_reject_out_of_range(storage_layouts, owner):
+    with reverts("key out of range"):
+        storage_layouts["MapBitPacked"].put(2**128, 0, 1, sender=owner)
+    with reverts("value out of range"):
+        storage_layouts["MapPackedValue"].put(0, 0, 2**128, sender=owner)
+
+def test_storage_layout_benchmark(storage_layouts, owner, chain):
+    rows = storage_bench.run(chain.provider, owner, storage_layouts)
+    paths = storage_bench.path_costs(rows)
+    storage_bench.write_report(rows, paths)
+    print("\n" + storage_bench.summary(rows, paths))
+    g = {(r["layout"], r["distribution"], r["scenario"]): r for r in rows}
+
+    for layout in storage_layouts:
+        # the access list names exactly the distinct slots the batch touches
+        uniform = g[(layout, "uniform", "read_access_list")]
+        assert uniform["listed_slots"] == uniform["distinct_keys"] == storage_bench.BATCH
+        # re-reading one slot in the same transaction is warm after the first touch
+        assert g[(layout, "uniform", "read_repeat")]["gas"] < g[(layout, "uniform", "read")]["gas"]
+        # listing 32 cold slots saves 100 gas each, less 2400 for listing the contract
+        saved = g[(layout, "uniform", "read")]["gas"] - uniform["gas"]
+        assert saved == 100 * storage_bench.BATCH - 2400
+    # neighbouring b keys share a slot, so sequential reads touch half as many
+    assert g[("MapPackedValue", "sequential", "read_access_list")]["listed_slots"] == storage_bench.BATCH // 2
+    assert g[("MapPackedValue", "sequential", "read")]["gas"] < g[("MapNested", "sequential", "read")]["gas"]